@@ -0,0 +1,83 @@
+"""
+Benchmark dos motores de extração de artigos (BeautifulSoup x lxml)
+Mede CPU e pico de memória por página usando as páginas salvas em fixtures/
+
+Uso: python benchmarks/bench_parsers.py [--iterations 200]
+"""
+import sys
+import os
+import glob
+import time
+import argparse
+import tracemalloc
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from shared.base_scraper import BaseScraper
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+
+def load_pages():
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(FIXTURES_DIR, '*.html'))):
+        with open(path, 'rb') as f:
+            pages[os.path.basename(path)] = f.read()
+    return pages
+
+
+def normalize(details):
+    """Ignora diferenças de espaços em branco entre os motores"""
+    content, image_url, video_urls = details
+    return " ".join(content.split()), image_url, video_urls
+
+
+def measure(scraper, page, iterations):
+    """Retorna (ms de CPU por página, pico de memória em KiB)"""
+    start = time.process_time()
+    for _ in range(iterations):
+        scraper.extract_details(page)
+    cpu_ms = (time.process_time() - start) * 1000 / iterations
+
+    tracemalloc.start()
+    scraper.extract_details(page)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return cpu_ms, peak / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--iterations', type=int, default=200)
+    args = parser.parse_args()
+
+    pages = load_pages()
+    if not pages:
+        print(f"❌ Nenhuma página encontrada em {FIXTURES_DIR}")
+        return
+
+    scrapers = {
+        backend: BaseScraper("http://localhost/", storage=None, parser=backend)
+        for backend in ("soup", "lxml")
+    }
+
+    print("=" * 60)
+    print("⏱️  BENCHMARK DOS MOTORES DE EXTRAÇÃO")
+    print("=" * 60)
+
+    for name, page in pages.items():
+        results = {backend: normalize(scraper.extract_details(page)) for backend, scraper in scrapers.items()}
+        same = results["soup"] == results["lxml"]
+
+        print(f"\n📄 {name} ({len(page) / 1024:.1f} KiB) - resultados idênticos: {'✅' if same else '⚠️'}")
+        timings = {}
+        for backend, scraper in scrapers.items():
+            cpu_ms, peak_kib = measure(scraper, page, args.iterations)
+            timings[backend] = cpu_ms
+            print(f"   {backend:5s}  {cpu_ms:8.2f} ms/página   pico {peak_kib:9.1f} KiB")
+        print(f"   🚀 lxml {timings['soup'] / timings['lxml']:.1f}x mais rápido")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+"""
+Benchmark offline da coleta e do pipeline completo (coleta -> tradução -> publicação)
+Usa o feed e as páginas de fixtures/ servidos localmente, com Supabase, Gemini
+e WordPress simulados e latência configurável
+
+Mede vazão, latência p50/p95 por etapa e pico de memória. O relatório em JSON
+leva o commit atual, para comparar execuções entre commits (--compare).
+
+Uso: python benchmarks/bench_pipeline.py [--runs 3] [--limit 30] [--storage sqlite] [--compare relatorio.json]
+"""
+import sys
+import os
+import json
+import time
+import asyncio
+import argparse
+import logging
+import platform
+import tempfile
+import subprocess
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from urllib.parse import urlparse
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from shared.metrics import metrics
+from shared.translator import Translator
+from shared.translation_stage import TranslationStage
+from shared.pipeline import Pipeline
+from stand_in import StandInServer, MemoryStateStore, FakeStorage, FakeModel
+
+DEFAULT_OUTPUT_DIR = os.path.join(project_root, '.cache', 'benchmarks')
+
+# Etapas cuja latência entra no relatório
+REPORTED_TIMINGS = ("stage_seconds", "external_call_seconds", "http_request_seconds")
+
+
+def git_commit():
+    """(commit atual, há alterações não commitadas?)"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=project_root,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = bool(subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"], cwd=project_root,
+            capture_output=True, text=True, check=True
+        ).stdout.strip())
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown", False
+
+
+def percentile(values, pct):
+    """Percentil por posição (nearest-rank)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+class TimingRecorder:
+    """Listener de métricas que guarda cada duração observada
+
+    O host do servidor local (porta aleatória) vira "stand-in", para que os
+    nomes das métricas sejam os mesmos em relatórios de execuções diferentes.
+    """
+
+    def __init__(self, host):
+        self.host = host
+        self.samples = {}
+
+    def __call__(self, event):
+        if event["type"] != "timing" or event["metric"] not in REPORTED_TIMINGS:
+            return
+        labels = dict(event["labels"])
+        labels.pop("source", None)
+        if labels.get("host") == self.host:
+            labels["host"] = "stand-in"
+        labels = ",".join(f"{k}={v}" for k, v in sorted(labels.items()))
+        self.samples.setdefault(f"{event['metric']}{{{labels}}}", []).append(event["value"])
+
+    def summary(self):
+        return {
+            name: {
+                "count": len(values),
+                "p50_ms": round(percentile(values, 50) * 1000, 2),
+                "p95_ms": round(percentile(values, 95) * 1000, 2)
+            }
+            for name, values in sorted(self.samples.items())
+        }
+
+
+def build_scraper(server, storage, state_store):
+    from services.blabbermouth.scraper import BlabbermouthScraper
+    scraper = BlabbermouthScraper(storage, state_store=state_store)
+    scraper.base_url = server.feed_url
+    return scraper
+
+
+@contextmanager
+def open_storage(args):
+    """Supabase simulado em memória (--storage memory) ou SQLiteNewsStorage em arquivo temporário"""
+    if args.storage == "memory":
+        yield FakeStorage(latency=args.supabase_latency)
+        return
+
+    from shared.local_storage import SQLiteNewsStorage
+    with tempfile.TemporaryDirectory(prefix="bench-storage-") as directory:
+        storage = SQLiteNewsStorage(os.path.join(directory, "news.sqlite3"))
+        try:
+            yield storage
+        finally:
+            storage.close()
+
+
+def run_fetch_articles(server, args):
+    """Cenário 1: BlabbermouthScraper.fetch_articles (feed + detalhes + gravação)"""
+    with open_storage(args) as storage:
+        scraper = build_scraper(server, storage, MemoryStateStore())
+        return scraper.fetch_articles(limit=args.limit)
+
+
+def run_pipeline(server, args):
+    """Cenário 2: Pipeline completo com tradução e publicação"""
+    from shared.wordpress import WordPressPublisher
+
+    with open_storage(args) as storage:
+        state_store = MemoryStateStore()
+        translator = Translator(model=FakeModel(latency=args.gemini_latency))
+        stage = TranslationStage(storage, translator, rpm=args.gemini_rpm, tpm=10 ** 9)
+        pipeline = Pipeline(
+            build_scraper(server, storage, state_store), storage, translator,
+            WordPressPublisher(state_store=state_store), translation_stage=stage
+        )
+        return asyncio.run(pipeline.run(limit=args.limit))["published"]
+
+
+SCENARIOS = {
+    "fetch_articles": run_fetch_articles,
+    "pipeline": run_pipeline,
+}
+
+
+def measure(scenario, server, args):
+    """Executa o cenário `runs` vezes e uma vez a mais sob tracemalloc"""
+    recorder = TimingRecorder(urlparse(server.origin).netloc)
+    metrics.add_listener(recorder)
+    walls, items = [], []
+    try:
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            items.append(scenario(server, args))
+            walls.append(time.perf_counter() - start)
+    finally:
+        metrics.remove_listener(recorder)
+
+    # Memória medida à parte: o tracemalloc deixa a execução bem mais lenta
+    tracemalloc.start()
+    scenario(server, args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    total_wall = sum(walls)
+    return {
+        "runs": args.runs,
+        "items_per_run": items,
+        "wall_seconds_p50": round(percentile(walls, 50), 3),
+        "wall_seconds_min": round(min(walls), 3),
+        "throughput_items_per_s": round(sum(items) / total_wall, 2) if total_wall else None,
+        "peak_memory_kib": round(peak / 1024, 1),
+        "latency": recorder.summary()
+    }
+
+
+def compare(report, baseline):
+    """Imprime a variação em relação a um relatório anterior"""
+    print(f"\n📊 Comparação com {baseline['commit']} ({baseline['created_at']})")
+    for name, current in report["scenarios"].items():
+        previous = baseline["scenarios"].get(name)
+        if not previous:
+            continue
+        print(f"\n   {name}")
+        for key in ("throughput_items_per_s", "wall_seconds_p50", "peak_memory_kib"):
+            before, after = previous.get(key), current.get(key)
+            if before and after is not None:
+                print(f"      {key:24s} {before:10.2f} -> {after:10.2f}  ({(after - before) / before:+.1%})")
+        for metric, values in current["latency"].items():
+            before = previous["latency"].get(metric)
+            if before and before["p95_ms"]:
+                change = (values["p95_ms"] - before["p95_ms"]) / before["p95_ms"]
+                print(f"      p95 {metric:40s} {before['p95_ms']:8.2f} -> {values['p95_ms']:8.2f} ms  ({change:+.1%})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scenario', choices=sorted(SCENARIOS), action='append',
+                        help='Cenário a executar (padrão: todos)')
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--limit', type=int, default=30, help='Itens do feed por execução')
+    parser.add_argument('--site-latency', type=float, default=0.05, help='Latência do feed e das páginas (s)')
+    parser.add_argument('--wordpress-latency', type=float, default=0.05)
+    parser.add_argument('--supabase-latency', type=float, default=0.02)
+    parser.add_argument('--storage', choices=('memory', 'sqlite'), default='memory',
+                        help='memory: Supabase simulado com --supabase-latency; sqlite: SQLiteNewsStorage real')
+    parser.add_argument('--gemini-latency', type=float, default=0.3)
+    parser.add_argument('--gemini-rpm', type=int, default=6000,
+                        help='Cota do limitador de taxa (alta para medir o pipeline, não a cota)')
+    parser.add_argument('--output', help=f'Relatório JSON (padrão: {DEFAULT_OUTPUT_DIR}/<commit>.json)')
+    parser.add_argument('--compare', help='Relatório anterior para comparar')
+    parser.add_argument('--verbose', action='store_true', help='Mostra os logs do pipeline')
+    args = parser.parse_args()
+
+    if not args.verbose:
+        logging.disable(logging.WARNING)
+
+    latency = {
+        "feed": args.site_latency,
+        "article": args.site_latency,
+        "image": args.site_latency,
+        "wordpress": args.wordpress_latency
+    }
+
+    commit, dirty = git_commit()
+    report = {
+        "commit": commit,
+        "dirty": dirty,
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "compare", "verbose")},
+        "scenarios": {}
+    }
+
+    print("=" * 60)
+    print(f"⏱️  BENCHMARK DO PIPELINE ({commit}{' + alterações' if dirty else ''})")
+    print("=" * 60)
+
+    with StandInServer(latency=latency) as server:
+        os.environ.update({
+            "WORDPRESS_URL": server.origin,
+            "WORDPRESS_USER": "bench",
+            "WORDPRESS_APP_PASSWORD": "bench"
+        })
+        for name in args.scenario or list(SCENARIOS):
+            result = measure(SCENARIOS[name], server, args)
+            report["scenarios"][name] = result
+
+            print(f"\n🏁 {name}: {result['throughput_items_per_s']} itens/s, "
+                  f"p50 {result['wall_seconds_p50']} s por execução, pico {result['peak_memory_kib']} KiB")
+            for metric, values in result["latency"].items():
+                print(f"   {metric:48s} n={values['count']:<5d} p50 {values['p50_ms']:8.2f} ms   p95 {values['p95_ms']:8.2f} ms")
+
+    output = args.output or os.path.join(DEFAULT_OUTPUT_DIR, f"{commit}{'-dirty' if dirty else ''}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\n💾 Relatório salvo em {output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
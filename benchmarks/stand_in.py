@@ -0,0 +1,283 @@
+"""
+Servidor local e dublês (Supabase, Gemini, WordPress) para os benchmarks
+
+O servidor reproduz o feed e as páginas gravadas em fixtures/ e imita os
+endpoints do WordPress usados pelo WordPressPublisher, com latência
+configurável por tipo de rota. Nada sai da máquina.
+"""
+import os
+import json
+import time
+import glob
+import threading
+import itertools
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from shared.metrics import metrics
+from shared.translator import BATCH_INPUT_MARKER
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+# Links absolutos das fixtures que passam a apontar para o servidor local
+RECORDED_ORIGIN = "https://www.blabbermouth.net"
+
+# Imagem servida para qualquer /img/...: cabeçalho JPEG + corpo de ~20 KiB
+FAKE_IMAGE = b"\xff\xd8\xff\xe0\x00\x10JFIF\x00" + bytes(20 * 1024) + b"\xff\xd9"
+
+
+class StandInServer:
+    """ThreadingHTTPServer em 127.0.0.1 que reproduz as fixtures
+
+    `latency` é um dict rota -> segundos ("feed", "article", "image",
+    "wordpress"), aplicado antes de cada resposta.
+    """
+
+    def __init__(self, latency=None, fixtures_dir=FIXTURES_DIR):
+        self.latency = dict(latency or {})
+        self.requests = {}
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.stand_in = self
+        self.origin = f"http://127.0.0.1:{self.httpd.server_port}"
+
+        with open(os.path.join(fixtures_dir, 'feed.xml'), 'rb') as f:
+            self.feed = self._rewrite(f.read())
+        self.pages = []
+        for path in sorted(glob.glob(os.path.join(fixtures_dir, '*.html'))):
+            with open(path, 'rb') as f:
+                self.pages.append(self._rewrite(f.read()))
+
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def feed_url(self):
+        return f"{self.origin}/feed/"
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def next_id(self):
+        return next(self._ids)
+
+    def count(self, route):
+        with self._lock:
+            self.requests[route] = self.requests.get(route, 0) + 1
+
+    def page_for(self, path):
+        """Sempre a mesma página para o mesmo artigo"""
+        return self.pages[sum(path.encode()) % len(self.pages)]
+
+    def _rewrite(self, body):
+        return body.replace(RECORDED_ORIGIN.encode(), self.origin.encode())
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # Keep-alive, como os sites reais: exercita o pool de conexões da sessão
+    protocol_version = "HTTP/1.1"
+    # Sem Nagle: cabeçalho e corpo saem em escritas separadas (evita +40 ms de delayed ACK)
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        stand_in = self.server.stand_in
+        path = self.path.split("?", 1)[0]
+
+        if path == "/feed/":
+            self._reply("feed", 200, stand_in.feed, "application/rss+xml", {"ETag": '"bench"'})
+        elif path.startswith("/news/"):
+            self._reply("article", 200, stand_in.page_for(path), "text/html; charset=utf-8")
+        elif path.startswith("/img/"):
+            self._reply("image", 200, FAKE_IMAGE, "image/jpeg")
+        elif path in ("/wp-json/wp/v2/posts", "/wp-json/wp/v2/tags"):
+            self._reply("wordpress", 200, b"[]", "application/json", {"X-WP-TotalPages": "1"})
+        else:
+            self._reply("other", 404, b"{}", "application/json")
+
+    def do_POST(self):
+        stand_in = self.server.stand_in
+        self._read_body()
+        if self.path.split("?", 1)[0] in ("/wp-json/wp/v2/posts", "/wp-json/wp/v2/tags", "/wp-json/wp/v2/media"):
+            body = json.dumps({"id": stand_in.next_id()}).encode()
+            self._reply("wordpress", 201, body, "application/json")
+        else:
+            self._reply("other", 404, b"{}", "application/json")
+
+    def _read_body(self):
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            while True:
+                size = int(self.rfile.readline().split(b";", 1)[0], 16)
+                self.rfile.read(size + 2)
+                if size == 0:
+                    return
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+    def _reply(self, route, status, body, content_type, headers=None):
+        stand_in = self.server.stand_in
+        stand_in.count(route)
+        delay = stand_in.latency.get(route, 0)
+        if delay:
+            time.sleep(delay)
+
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class MemoryStateStore:
+    """State store em memória (mesma interface do FileStateStore)"""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            return self._data.get(key, default)
+
+    def get_many(self, keys):
+        with self._lock:
+            return {key: self._data[key] for key in keys if key in self._data}
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+
+
+class FakeStorage:
+    """NewsStorage em memória com latência fixa por chamada (imita o Supabase)"""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.rows = {}
+        self.cursors = {}
+        self._lock = threading.Lock()
+
+    def _call(self, op):
+        with metrics.timer("external_call_seconds", service="supabase", op=op):
+            if self.latency:
+                time.sleep(self.latency)
+
+    def get_cursor(self, source):
+        self._call("get_cursor")
+        return self.cursors.get(source)
+
+    def set_cursor(self, source, cursor):
+        self._call("set_cursor")
+        self.cursors[source] = cursor
+
+    def existing_urls(self, urls, chunk_size=100):
+        self._call("existing_urls")
+        with self._lock:
+            return {url for url in urls if url in self.rows}
+
+    def add_news_batch(self, articles, chunk_size=50):
+        self._call("add_news_batch")
+        added = []
+        with self._lock:
+            for article in articles:
+                is_new = article["url"] not in self.rows
+                if is_new:
+                    self.rows[article["url"]] = dict(
+                        article, id=len(self.rows) + 1, status="collected", claimed=True
+                    )
+                added.append(is_new)
+        return added
+
+    def get_news_by_status(self, status, columns="*", limit=100):
+        self._call("get_news_by_status")
+        with self._lock:
+            return [dict(row) for row in self.rows.values() if row["status"] == status][:limit]
+
+    def claim_news(self, status, columns="*", limit=100):
+        self._call("claim_news")
+        with self._lock:
+            rows = [row for row in self.rows.values() if row["status"] == status and not row.get("claimed")]
+            for row in rows[:limit]:
+                row["claimed"] = True
+            return [dict(row) for row in rows[:limit]]
+
+    def release_claims(self, urls, chunk_size=100):
+        self._call("release_claims")
+        with self._lock:
+            for url in urls:
+                self.rows[url]["claimed"] = False
+
+    def update_translations(self, rows, chunk_size=50, raise_errors=False):
+        self._call("update_translations")
+        with self._lock:
+            for row in rows:
+                self.rows[row["url"]].update(
+                    translated_title=row["translated_title"],
+                    translated_content=row["translated_content"],
+                    entities=row["entities"],
+                    status="translated"
+                )
+        return len(rows)
+
+    def mark_as_published(self, link):
+        self._call("mark_as_published")
+        with self._lock:
+            self.rows[link]["status"] = "published"
+
+    def mark_as_published_batch(self, urls, chunk_size=100):
+        self._call("mark_as_published_batch")
+        with self._lock:
+            for url in urls:
+                self.rows[url]["status"] = "published"
+        return len(urls)
+
+    def flush(self):
+        pass
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeModel:
+    """Imita o GenerativeModel do Gemini com latência fixa por requisição"""
+
+    model_name = "bench-model"
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt):
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+        if BATCH_INPUT_MARKER in prompt:
+            articles = json.loads(prompt.split(BATCH_INPUT_MARKER, 1)[1])
+            return FakeResponse(json.dumps([
+                {"id": a["id"], "title": f"[pt] {a['title']}", "content": f"[pt] {a['content']}",
+                 "tags": ["Metallica", "Slayer", "Iron Maiden"]}
+                for a in articles
+            ]))
+        if prompt.lstrip().startswith("Analise o seguinte texto"):
+            return FakeResponse("Metallica, Slayer, Iron Maiden")
+        return FakeResponse("[pt] " + prompt)
@@ -0,0 +1,10 @@
+-- Garante uma única notícia por URL.
+-- Necessário para o upsert em lote (NewsStorage.add_news_batch, on_conflict=url).
+
+-- Remove duplicadas antigas, mantendo a primeira inserida
+DELETE FROM news a
+USING news b
+WHERE a.url = b.url
+  AND a.id > b.id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS news_url_key ON news (url);
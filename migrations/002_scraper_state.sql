@@ -0,0 +1,11 @@
+-- Estado persistente dos scrapers, via NewsStorage.state (shared/state.py).
+-- Obrigatória em toda instalação com Supabase: os cursores dos feeds e o
+-- registro de posts publicados no WordPress sempre ficam aqui. Com
+-- STATE_BACKEND=supabase, também guarda os validadores ETag/Last-Modified
+-- do feed e os caches de tags e mídia.
+
+CREATE TABLE IF NOT EXISTS scraper_state (
+    key        TEXT PRIMARY KEY,
+    value      JSONB NOT NULL,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
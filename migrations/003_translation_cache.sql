@@ -0,0 +1,8 @@
+-- Cache de traduções compartilhado entre instâncias.
+-- Usado quando TRANSLATION_CACHE=supabase (shared/translation_cache.py).
+
+CREATE TABLE IF NOT EXISTS translation_cache (
+    key        TEXT PRIMARY KEY,
+    value      JSONB NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
@@ -0,0 +1,25 @@
+-- Atualização de traduções em lote, por URL, em uma única chamada.
+-- Usado por NewsStorage.update_translations (client.rpc("update_translations")).
+-- Assume news.entities JSONB; se a coluna for TEXT[], troque o tipo em r(...)
+-- e converta com ARRAY(SELECT jsonb_array_elements_text(...)).
+
+CREATE OR REPLACE FUNCTION update_translations(rows JSONB)
+RETURNS INTEGER
+LANGUAGE SQL
+AS $$
+    WITH updated AS (
+        UPDATE news AS n
+        SET translated_title   = r.translated_title,
+            translated_content = r.translated_content,
+            entities           = r.entities
+        FROM jsonb_to_recordset(rows) AS r(
+            url TEXT,
+            translated_title TEXT,
+            translated_content TEXT,
+            entities JSONB
+        )
+        WHERE n.url = r.url
+        RETURNING 1
+    )
+    SELECT COUNT(*)::INTEGER FROM updated;
+$$;
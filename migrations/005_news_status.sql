@@ -0,0 +1,31 @@
+-- Estado de cada notícia no pipeline: collected -> translated -> published.
+-- Permite retomar apenas as linhas pendentes após uma falha (shared/pipeline.py).
+
+ALTER TABLE news ADD COLUMN IF NOT EXISTS status TEXT NOT NULL DEFAULT 'collected';
+
+UPDATE news SET status = 'published' WHERE published;
+UPDATE news SET status = 'translated'
+WHERE NOT published AND translated_title IS NOT NULL;
+
+-- update_translations agora também avança o status
+CREATE OR REPLACE FUNCTION update_translations(rows JSONB)
+RETURNS INTEGER
+LANGUAGE SQL
+AS $$
+    WITH updated AS (
+        UPDATE news AS n
+        SET translated_title   = r.translated_title,
+            translated_content = r.translated_content,
+            entities           = r.entities,
+            status             = 'translated'
+        FROM jsonb_to_recordset(rows) AS r(
+            url TEXT,
+            translated_title TEXT,
+            translated_content TEXT,
+            entities JSONB
+        )
+        WHERE n.url = r.url
+        RETURNING 1
+    )
+    SELECT COUNT(*)::INTEGER FROM updated;
+$$;
@@ -0,0 +1,19 @@
+-- Índices das consultas do pipeline, para que o custo não cresça com a tabela.
+-- Todas as atualizações são por url (índice único de 001_news_url_unique.sql):
+-- update_translation, update_translations (RPC), mark_as_published e
+-- mark_as_published_batch.
+--
+-- Em tabelas grandes, rode cada CREATE INDEX com CONCURRENTLY pelo psql
+-- (fora de transação) para não bloquear as escritas.
+
+-- get_news_by_status: WHERE status = ? ORDER BY id LIMIT n.
+-- Parcial: só as linhas pendentes (collected/translated) entram no índice,
+-- então ele continua pequeno mesmo com milhares de notícias publicadas.
+CREATE INDEX IF NOT EXISTS news_pending_status_id_idx
+    ON news (status, id)
+    WHERE status <> 'published';
+
+-- Listagens e limpezas por data de publicação na fonte
+CREATE INDEX IF NOT EXISTS news_date_idx ON news (date DESC);
+
+ANALYZE news;
@@ -0,0 +1,34 @@
+-- Reserva (lease) de notícias pendentes, para que vários workers peguem lotes
+-- disjuntos. Usado por NewsStorage.claim_news e pelo Pipeline ao retomar
+-- pendências; linhas novas já são gravadas reservadas por quem as coletou.
+-- Uma reserva vale até claimed_until: se o worker cair, outro assume depois.
+
+ALTER TABLE news ADD COLUMN IF NOT EXISTS claimed_by TEXT;
+ALTER TABLE news ADD COLUMN IF NOT EXISTS claimed_until TIMESTAMPTZ;
+
+CREATE OR REPLACE FUNCTION claim_news(
+    p_status TEXT,
+    p_worker TEXT,
+    p_limit INTEGER,
+    p_lease_seconds INTEGER
+)
+RETURNS SETOF news
+LANGUAGE SQL
+AS $$
+    -- SKIP LOCKED: chamadas simultâneas não esperam nem pegam as mesmas linhas
+    WITH picked AS (
+        SELECT id
+        FROM news
+        WHERE status = p_status
+          AND (claimed_until IS NULL OR claimed_until < now())
+        ORDER BY id
+        LIMIT p_limit
+        FOR UPDATE SKIP LOCKED
+    )
+    UPDATE news AS n
+    SET claimed_by    = p_worker,
+        claimed_until = now() + make_interval(secs => p_lease_seconds)
+    FROM picked
+    WHERE n.id = picked.id
+    RETURNING n.*;
+$$;
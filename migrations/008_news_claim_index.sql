@@ -0,0 +1,24 @@
+-- Índice para a função claim_news (007_news_claims.sql) e get_news_by_status.
+--
+-- O índice parcial de 006 (WHERE status <> 'published') não serve para
+-- "WHERE status = p_status": p_status é um parâmetro da função, e o plano
+-- genérico não consegue provar que ele é diferente de 'published'. Cada
+-- retomada virava uma varredura da tabela inteira. Um índice (status, id)
+-- simples atende à igualdade em status e já entrega as linhas em ordem de
+-- id, então o LIMIT para nas primeiras linhas livres.
+--
+-- Confira o plano depois de aplicar (deve aparecer news_status_id_idx):
+--   EXPLAIN SELECT id FROM news
+--   WHERE status = 'collected'
+--     AND (claimed_until IS NULL OR claimed_until < now())
+--   ORDER BY id LIMIT 20 FOR UPDATE SKIP LOCKED;
+--
+-- Em tabelas grandes, rode o CREATE INDEX com CONCURRENTLY pelo psql
+-- (fora de transação) para não bloquear as escritas.
+
+CREATE INDEX IF NOT EXISTS news_status_id_idx ON news (status, id);
+
+-- Substituído pelo índice acima
+DROP INDEX IF EXISTS news_pending_status_id_idx;
+
+ANALYZE news;
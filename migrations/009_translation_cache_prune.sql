@@ -0,0 +1,26 @@
+-- Limite de tamanho do cache de traduções no Supabase (TRANSLATION_CACHE=supabase).
+-- SupabaseTranslationCache chama prune_translation_cache a cada algumas
+-- centenas de gravações, com TRANSLATION_CACHE_MAX_ENTRIES. Saem as entradas
+-- mais antigas (created_at); leituras não atualizam a tabela.
+
+CREATE INDEX IF NOT EXISTS translation_cache_created_at_idx
+    ON translation_cache (created_at);
+
+CREATE OR REPLACE FUNCTION prune_translation_cache(p_max_entries INTEGER)
+RETURNS INTEGER
+LANGUAGE SQL
+AS $$
+    WITH doomed AS (
+        SELECT key
+        FROM translation_cache
+        ORDER BY created_at DESC
+        OFFSET p_max_entries
+    ),
+    deleted AS (
+        DELETE FROM translation_cache AS t
+        USING doomed
+        WHERE t.key = doomed.key
+        RETURNING 1
+    )
+    SELECT count(*)::INTEGER FROM deleted;
+$$;
@@ -0,0 +1,47 @@
+#!/bin/bash
+# Deploy do serviço único que roda todas as fontes (services/multi)
+# O agendamento de cada fonte fica em shared/registry.py; o Scheduler só chama /tick de hora em hora.
+
+PROJECT_ID="first-fuze-448812-f6"
+REGION="us-central1"
+SERVICE="rock-news-scraper"
+IMAGE="gcr.io/${PROJECT_ID}/${SERVICE}"
+
+cd "$(dirname "$0")/.."
+
+echo "🏗️ Construindo imagem $IMAGE..."
+gcloud builds submit . \
+    --project "$PROJECT_ID" \
+    --config scheduler/cloudbuild-multi.yaml
+
+echo "🚀 Deployando $SERVICE..."
+gcloud run deploy "$SERVICE" \
+    --image "$IMAGE" \
+    --region "$REGION" \
+    --project "$PROJECT_ID" \
+    --allow-unauthenticated \
+    --memory 1Gi \
+    --timeout 540s \
+    --max-instances 1
+
+SERVICE_URL=$(gcloud run services describe "$SERVICE" \
+    --region "$REGION" \
+    --project "$PROJECT_ID" \
+    --format "value(status.url)")
+
+echo "📅 Criando agendamento de hora em hora..."
+gcloud scheduler jobs create http "${SERVICE}-tick" \
+    --schedule "0 * * * *" \
+    --uri "${SERVICE_URL}/tick" \
+    --http-method GET \
+    --region "$REGION" \
+    --project "$PROJECT_ID" \
+    --time-zone "America/Sao_Paulo" \
+    --description "Executa as fontes agendadas no registro" \
+    || gcloud scheduler jobs update http "${SERVICE}-tick" \
+        --schedule "0 * * * *" \
+        --uri "${SERVICE_URL}/tick" \
+        --region "$REGION" \
+        --project "$PROJECT_ID"
+
+echo "✅ $SERVICE configurado: $SERVICE_URL"
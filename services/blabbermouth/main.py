@@ -4,86 +4,74 @@ Cada execução: coleta -> traduz -> publica
 """
 import sys
 import os
-
-# Workaround para Python 3.9.6 - corrige erro do importlib.metadata
-# Deve ser aplicado ANTES de qualquer outro import
-try:
-    import importlib_metadata
-    # Substitui importlib.metadata pelo backport
-    sys.modules['importlib.metadata'] = importlib_metadata
-except ImportError:
-    # Se importlib_metadata não estiver disponível, tenta usar o nativo
-    try:
-        import importlib.metadata
-        if not hasattr(importlib.metadata, 'packages_distributions'):
-            # Se não tiver o atributo, tenta usar o backport
-            try:
-                import importlib_metadata
-                sys.modules['importlib.metadata'] = importlib_metadata
-            except ImportError:
-                pass
-    except ImportError:
-        pass
-
-from dotenv import load_dotenv
+import asyncio
+from contextlib import asynccontextmanager
 
 # Adiciona o diretório raiz do projeto ao path para importar shared
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
 sys.path.insert(0, project_root)
 
-from fastapi import FastAPI, BackgroundTasks
+# Workaround para Python 3.9.6 - deve ser aplicado ANTES de qualquer outro import
+from shared.compat import patch_importlib_metadata
+patch_importlib_metadata()
+
+# Apenas o necessário para responder /health: supabase, Gemini, WordPress e
+# o scraper são importados sob demanda, na primeira chamada a /run
+from fastapi import FastAPI, BackgroundTasks, HTTPException
+from fastapi.responses import JSONResponse, PlainTextResponse
 from shared.config import logger
-from shared.storage import NewsStorage
-from shared.translator import Translator
-from shared.wordpress import WordPressPublisher
-from scraper import BlabbermouthScraper
+from shared.container import Components
+from shared.metrics import metrics
 
-# Carrega variáveis de ambiente
-# Primeiro carrega .env, depois .env.local (sobrescreve valores)
-# Sempre procura no diretório raiz do projeto
-env_path = os.path.join(project_root, '.env')
-env_local_path = os.path.join(project_root, '.env.local')
+LIMIT_PER_RUN = int(os.getenv("LIMIT_PER_RUN", "10"))
 
-if os.path.exists(env_path):
-    load_dotenv(dotenv_path=env_path)
-if os.path.exists(env_local_path):
-    load_dotenv(dotenv_path=env_local_path, override=True)  # override=True sobrescreve valores
+# Clientes reaproveitados entre execuções de uma instância aquecida
+components = Components()
 
-app = FastAPI(title="Blabbermouth Scraper", version="1.0.0")
 
-LIMIT_PER_RUN = int(os.getenv("LIMIT_PER_RUN", "10"))
+@asynccontextmanager
+async def lifespan(app):
+    yield
+    components.close()
 
 
-def run_scraper_job():
+app = FastAPI(title="Blabbermouth Scraper", version="1.0.0", lifespan=lifespan)
+
+
+def build_scraper():
+    from scraper import BlabbermouthScraper
+    return BlabbermouthScraper(
+        components.storage,
+        session=components.session,
+        state_store=components.state_store
+    )
+
+
+def run_scraper_job(run_id):
     """Executa o job completo: coletar -> traduzir -> publicar"""
     try:
-        # 1. Inicializa componentes
-        storage = NewsStorage()
-        translator = Translator()
-        wordpress = WordPressPublisher()
-        scraper = BlabbermouthScraper(storage)
-
-        # 2. Coleta notícias
-        logger.info("🕷️ Coletando notícias do Blabbermouth...")
-        collected = scraper.fetch_articles(limit=LIMIT_PER_RUN)
-        
-        if collected == 0:
-            logger.info("Nenhuma notícia nova coletada")
-            return
-
-        # 3. Busca notícias sem tradução do Supabase
-        logger.info("🌎 Traduzindo notícias...")
-        # TODO: Implementar busca de notícias sem tradução
-        
-        # 4. Publica no WordPress
-        logger.info("📝 Publicando no WordPress...")
-        # TODO: Implementar publicação de notícias traduzidas
+        from shared.pipeline import Pipeline
+
+        # 1. Obtém os componentes (criados só na primeira execução)
+        storage = components.storage
+        translator = components.translator
+        wordpress = components.publisher
+        scraper = components.get("scraper", build_scraper)
+
+        # 2. Coleta, traduz e publica em etapas simultâneas, retomando pendências
+        logger.info("🕷️ Coletando, traduzindo e publicando notícias do Blabbermouth...")
+        pipeline = Pipeline(scraper, storage, translator, wordpress)
+        stats = asyncio.run(pipeline.run(limit=LIMIT_PER_RUN))
+        metrics.finish_run(run_id, result=stats)
         
         logger.info("✅ Processo concluído!")
         
     except Exception as e:
+        metrics.finish_run(run_id, error=e)
         logger.error(f"❌ Erro no job: {e}", exc_info=True)
         raise
+    finally:
+        components.finish_run()
 
 
 @app.get("/")
@@ -98,15 +86,40 @@ def home():
 @app.get("/run")
 def run_scraper(background_tasks: BackgroundTasks):
     """Endpoint para executar o scraper (retorna imediatamente)"""
-    background_tasks.add_task(run_scraper_job)
+    # Evita duas execuções simultâneas coletando e inserindo os mesmos itens
+    if not components.try_start_run():
+        return JSONResponse(status_code=409, content={
+            "status": "busy",
+            "message": "Já existe uma execução em andamento",
+            "service": "blabbermouth"
+        })
+
+    run_id = metrics.start_run("blabbermouth", limit=LIMIT_PER_RUN)
+    background_tasks.add_task(run_scraper_job, run_id)
     return {
         "status": "accepted",
         "message": "Scraper iniciado em background",
         "service": "blabbermouth",
-        "limit": LIMIT_PER_RUN
+        "limit": LIMIT_PER_RUN,
+        "run_id": run_id
     }
 
 
+@app.get("/runs/{run_id}")
+def get_run(run_id: str):
+    """Situação, resultado e tempos por etapa de uma execução"""
+    run = metrics.get_run(run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail="Execução não encontrada")
+    return run
+
+
+@app.get("/metrics")
+def get_metrics():
+    """Métricas do processo no formato do Prometheus"""
+    return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
 @app.get("/health")
 def health():
     """Health check"""
@@ -0,0 +1,156 @@
+"""
+Serviço FastAPI que roda várias fontes em um único processo
+Cada execução: coleta -> traduz -> publica, para cada fonte selecionada
+"""
+import sys
+import os
+import asyncio
+from contextlib import asynccontextmanager
+
+# Adiciona o diretório raiz do projeto ao path para importar shared e services
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+sys.path.insert(0, project_root)
+
+# Workaround para Python 3.9.6 - deve ser aplicado ANTES de qualquer outro import
+from shared.compat import patch_importlib_metadata
+patch_importlib_metadata()
+
+# Apenas o necessário para responder /health; o restante é importado em /run
+from fastapi import FastAPI, BackgroundTasks, HTTPException
+from fastapi.responses import JSONResponse, PlainTextResponse
+from shared.config import logger
+from shared.container import Components
+from shared.metrics import metrics
+from shared.registry import load_sources
+
+SOURCES = load_sources()
+
+# Clientes reaproveitados entre execuções de uma instância aquecida
+components = Components()
+
+
+@asynccontextmanager
+async def lifespan(app):
+    yield
+    components.close()
+
+
+app = FastAPI(title="Rock News Multi-Source Scraper", version="1.0.0", lifespan=lifespan)
+
+
+def build_runner():
+    from shared.runner import MultiSourceRunner
+    return MultiSourceRunner(
+        components.storage,
+        components.translator,
+        components.publisher,
+        components.state_store,
+        session=components.session,
+        sources=SOURCES
+    )
+
+
+def run_sources_job(run_id, names=None):
+    """Executa o pipeline das fontes indicadas (todas, se None)"""
+    try:
+        runner = components.get("runner", build_runner)
+        if names is None:
+            names = runner.due_sources()
+            if not names:
+                metrics.finish_run(run_id, result={})
+                logger.info("Nenhuma fonte agendada para este horário")
+                return
+
+        results = asyncio.run(runner.run(names))
+        metrics.finish_run(run_id, result=results)
+        logger.info(f"✅ Fontes concluídas: {results}")
+    except Exception as e:
+        metrics.finish_run(run_id, error=e)
+        logger.error(f"❌ Erro no job: {e}", exc_info=True)
+        raise
+    finally:
+        components.finish_run()
+
+
+def _busy():
+    return JSONResponse(status_code=409, content={
+        "status": "busy",
+        "message": "Já existe uma execução em andamento"
+    })
+
+
+def _parse_sources(sources):
+    names = [name.strip() for name in sources.split(",") if name.strip()]
+    unknown = [name for name in names if name not in SOURCES]
+    if unknown:
+        raise HTTPException(status_code=404, detail=f"Fontes desconhecidas: {', '.join(unknown)}")
+    return names
+
+
+@app.get("/")
+def home():
+    return {
+        "service": "multi-source-scraper",
+        "status": "running",
+        "version": "1.0.0",
+        "sources": {name: config.get("schedule") for name, config in SOURCES.items()}
+    }
+
+
+@app.get("/run")
+def run_sources(background_tasks: BackgroundTasks, sources: str = ""):
+    """Executa as fontes de `sources` (separadas por vírgula) ou todas"""
+    names = _parse_sources(sources) if sources else list(SOURCES)
+    if not components.try_start_run():
+        return _busy()
+    run_id = metrics.start_run("multi", sources=names)
+    background_tasks.add_task(run_sources_job, run_id, names)
+    return {
+        "status": "accepted",
+        "message": "Fontes iniciadas em background",
+        "sources": names,
+        "run_id": run_id
+    }
+
+
+@app.get("/tick")
+def tick(background_tasks: BackgroundTasks):
+    """Executa as fontes cujo agendamento casa com a hora atual (chamado de hora em hora)"""
+    if not components.try_start_run():
+        return _busy()
+    run_id = metrics.start_run("multi", trigger="tick")
+    background_tasks.add_task(run_sources_job, run_id)
+    return {"status": "accepted", "message": "Fontes agendadas iniciadas em background", "run_id": run_id}
+
+
+@app.get("/runs/{run_id}")
+def get_run(run_id: str):
+    """Situação, resultado e tempos por etapa de uma execução"""
+    run = metrics.get_run(run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail="Execução não encontrada")
+    return run
+
+
+@app.get("/metrics")
+def get_metrics():
+    """Métricas do processo no formato do Prometheus"""
+    return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/health")
+def health():
+    """Health check"""
+    return {"status": "healthy", "service": "multi-source-scraper"}
+
+
+if __name__ == "__main__":
+    import uvicorn
+    port = int(os.getenv("PORT", "8080"))
+    uvicorn.run(
+        app,
+        host="0.0.0.0",
+        port=port,
+        log_level="info",
+        access_log=True
+    )
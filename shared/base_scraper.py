@@ -1,53 +1,255 @@
 """
 Classe base para todos os scrapers
 """
+import os
 import requests
-from bs4 import BeautifulSoup
+import urllib3
 from datetime import datetime
-import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+import threading
 import logging
+from lxml import etree
+from shared.http_client import get_session
+from shared.state import create_state_store
+from shared.parsers import DEFAULT_CONTENT_SELECTORS, get_lxml_extractor, soup_block_text
+from shared.feeds import iter_feed_items
+from shared.metrics import metrics
 
 logger = logging.getLogger(__name__)
 
 
 class BaseScraper:
     """Classe base para scraping de sites de notícias de rock/metal"""
-    
-    def __init__(self, base_url, storage):
+
+    # Nome da fonte usado nos logs
+    name = "scraper"
+    # Motor de extração dos artigos: "soup" (BeautifulSoup) ou "lxml"
+    parser_backend = "soup"
+    # Seletores do corpo do artigo, em ordem de prioridade
+    content_selectors = DEFAULT_CONTENT_SELECTORS
+
+    def __init__(self, base_url, storage, session=None, state_store=None,
+                 max_workers=None, max_per_host=None, parser=None):
         self.base_url = base_url
         self.storage = storage
+        self.parser_backend = parser or os.getenv("SCRAPER_PARSER") or self.parser_backend
+        if self.parser_backend not in ("soup", "lxml"):
+            raise ValueError(f"Motor de extração inválido: {self.parser_backend}")
+        self.session = session or get_session()
+        self.state_store = state_store or create_state_store(storage)
         self.headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
         }
 
+        # Concorrência na busca de detalhes (1 = modo sequencial)
+        self.max_workers = max_workers or int(os.getenv("SCRAPER_MAX_WORKERS", "8"))
+        # Limite de requisições simultâneas por host (cortesia com o site)
+        self.max_per_host = max_per_host or int(os.getenv("SCRAPER_MAX_PER_HOST", "4"))
+        self._host_limits = {}
+        self._host_limits_lock = threading.Lock()
+
     def get_html(self, url):
         """Obtém o HTML de uma URL"""
         try:
-            response = requests.get(url, headers=self.headers, timeout=10)
+            response = self.session.get(url, headers=self.headers, timeout=10)
             response.raise_for_status()
             return response.text
         except requests.RequestException as e:
             logger.error(f"Erro ao acessar {url}: {e}")
             return None
 
+    def fetch_feed(self, url=None):
+        """Baixa o feed com GET condicional (ETag / Last-Modified)
+
+        Retorna None se o feed não mudou desde a última execução (304).
+        Os validadores só são gravados por `remember_feed`, depois que todos
+        os itens forem gravados, para não perder itens se algo falhar.
+        """
+        url = url or self.base_url
+        validators = self.state_store.get(f"feed:{url}") or {}
+
+        headers = dict(self.headers)
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+
+        # stream=True: o corpo é lido sob demanda por `read_feed`
+        with metrics.timer("stage_seconds", stage="feed_fetch", source=self.name):
+            response = self.session.get(url, headers=headers, timeout=10, stream=True)
+        if response.status_code == 304:
+            response.close()
+            metrics.inc("cache_requests_total", cache="feed", result="hit")
+            logger.info(f"Feed sem alterações: {url}")
+            return None
+        metrics.inc("cache_requests_total", cache="feed", result="miss")
+
+        try:
+            response.raise_for_status()
+        except requests.RequestException:
+            response.close()
+            raise
+        response.raw.decode_content = True
+        return response
+
+    def remember_feed(self, response, url=None):
+        """Grava os validadores de cache da resposta do feed"""
+        url = url or self.base_url
+        validators = {
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified")
+        }
+        if any(validators.values()):
+            self.state_store.set(f"feed:{url}", validators)
+
+    def read_feed(self, response, limit, cursor=None):
+        """Lê o feed em streaming até `limit` itens novos ou até o cursor
+
+        Retorna (items, newest): os itens novos, do mais recente ao mais
+        antigo, e o item mais recente do feed (próximo valor do cursor).
+        """
+        newest = None
+        items = []
+        feed = iter_feed_items(response.raw)
+        try:
+            for record in feed:
+                if len(items) >= limit:
+                    break
+                if not record["link"]:
+                    logger.error(f"Item do feed sem link: {record['title']}")
+                    continue
+
+                date = self.format_date(record["pub_date"])
+                if newest is None:
+                    newest = {"guid": record["guid"], "date": date}
+                if self.reached_cursor(record["guid"], date, cursor):
+                    break
+                items.append({"title": record["title"], "url": record["link"], "date": date})
+        finally:
+            feed.close()
+        return items, newest
+
+    def reached_cursor(self, guid, date, cursor):
+        """Indica se o item do feed já foi ingerido em uma execução anterior"""
+        if not cursor:
+            return False
+        if guid and guid == cursor.get("guid"):
+            return True
+
+        try:
+            return datetime.fromisoformat(date) <= datetime.fromisoformat(cursor.get("date") or "")
+        except (TypeError, ValueError):
+            # Datas em formato desconhecido ou sem fuso: compara só pelo guid
+            return False
+
     def parse_html(self, html):
         """Converte HTML em BeautifulSoup"""
+        from bs4 import BeautifulSoup
         return BeautifulSoup(html, "html.parser")
 
     def fetch_articles(self, limit=10):
         """Método abstrato - deve ser implementado por cada scraper"""
         raise NotImplementedError("Cada scraper deve implementar fetch_articles")
 
+    def fetch_feed_articles(self, limit=10):
+        """Coleta artigos a partir do feed RSS/Atom em `base_url`"""
+        collected = sum(len(batch) for batch in self.iter_feed_batches(limit))
+        logger.info(f"✅ {self.name}: {collected} notícias coletadas")
+        return collected
+
+    def iter_feed_batches(self, limit=10, batch_size=None):
+        """Gera, em lotes, as notícias novas do feed já gravadas no banco
+
+        Caminho padrão para scrapers baseados em feed: GET condicional,
+        leitura em streaming até o cursor, descarte das URLs já salvas,
+        busca paralela dos detalhes e gravação em lote na ordem do feed.
+        Cada lote é entregue assim que gravado, para que as etapas
+        seguintes do pipeline comecem antes do fim da coleta.
+        """
+        try:
+            response = self.fetch_feed()
+        except requests.RequestException as e:
+            logger.error(f"Erro ao acessar {self.base_url}: {e}")
+            return
+
+        if response is None:
+            logger.info(f"✅ {self.name}: feed sem novidades")
+            return
+
+        cursor = self.storage.get_cursor(self.base_url)
+        try:
+            with metrics.timer("stage_seconds", stage="feed_parse", source=self.name):
+                items, newest = self.read_feed(response, limit, cursor)
+        except (etree.XMLSyntaxError, urllib3.exceptions.HTTPError, OSError) as e:
+            # O corpo vem em streaming: uma conexão cortada no meio aparece aqui
+            # (ProtocolError do urllib3), não no GET. O cursor não avança.
+            logger.error(f"Erro ao ler feed {self.base_url}: {e}")
+            return
+        finally:
+            response.close()
+
+        # Descarta, com uma única consulta, os itens que já estão no banco
+        known = self.storage.existing_urls([item["url"] for item in items])
+        if known:
+            logger.info(f"{self.name}: {len(known)} notícias já existentes ignoradas")
+            items = [item for item in items if item["url"] not in known]
+
+        batch_size = batch_size or self.max_workers
+        failed = False
+        for start in range(0, len(items), batch_size):
+            chunk = items[start:start + batch_size]
+
+            # Busca os detalhes em paralelo; o resultado mantém a ordem do feed
+            details = self.fetch_articles_details([item["url"] for item in chunk])
+
+            articles = []
+            for item, result in zip(chunk, details):
+                if result is None:
+                    failed = True
+                    continue
+
+                content, image_url, video_urls = result
+                articles.append(dict(item, content=content, image_url=image_url, video_urls=video_urls))
+
+            if not articles:
+                continue
+            added = self.storage.add_news_batch(articles)
+            stored = [article for article, ok in zip(articles, added) if ok]
+            # As já existentes foram descartadas acima: o que não entrou é falha na gravação
+            if len(stored) < len(articles):
+                logger.error(f"{self.name}: {len(articles) - len(stored)} notícias não foram gravadas")
+                failed = True
+            if stored:
+                yield stored
+
+        # Se algum artigo falhou, nem o cursor nem os validadores do feed avançam:
+        # a próxima execução relê o feed (sem 304) e refaz só o que faltou
+        if failed:
+            return
+        self.remember_feed(response)
+        if newest and newest != cursor:
+            self.storage.set_cursor(self.base_url, newest)
+
     def fetch_article_details(self, url):
-        """Extrai detalhes completos de um artigo"""
+        """Extrai (conteúdo, imagem, vídeos) de um artigo; None se a página não puder ser baixada"""
         try:
-            response = requests.get(url, headers=self.headers, timeout=10)
+            with metrics.timer("stage_seconds", stage="detail_fetch", source=self.name):
+                response = self.session.get(url, headers=self.headers, timeout=10)
             response.raise_for_status()
         except requests.RequestException as e:
             logger.error(f"Erro ao acessar {url}: {e}")
-            return "", "", []
+            return None
+
+        with metrics.timer("stage_seconds", stage="parse", source=self.name):
+            return self.extract_details(response.content)
+
+    def extract_details(self, page):
+        """Extrai (conteúdo, imagem, vídeos) do HTML com o motor configurado"""
+        if self.parser_backend == "lxml":
+            return get_lxml_extractor(tuple(self.content_selectors)).extract(page)
 
-        soup = BeautifulSoup(response.content, "html.parser")
+        soup = self.parse_html(page)
 
         # Extrai conteúdo
         content = self._extract_content(soup)
@@ -60,22 +262,49 @@ class BaseScraper:
 
         return content, image_url, video_urls
 
+    def fetch_articles_details(self, urls):
+        """Extrai detalhes de vários artigos em paralelo
+
+        Retorna uma lista na mesma ordem de `urls`; artigos que falharem
+        aparecem como None.
+        """
+        urls = list(urls)
+        if self.max_workers <= 1 or len(urls) <= 1:
+            return [self._fetch_details_safe(url) for url in urls]
+
+        workers = min(self.max_workers, len(urls))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(self._fetch_details_limited, urls))
+
+    def _fetch_details_limited(self, url):
+        """Busca detalhes respeitando o limite de conexões por host"""
+        with self._host_semaphore(url):
+            return self._fetch_details_safe(url)
+
+    def _fetch_details_safe(self, url):
+        try:
+            return self.fetch_article_details(url)
+        except Exception as e:
+            logger.error(f"Erro ao processar artigo {url}: {e}")
+            return None
+
+    def _host_semaphore(self, url):
+        host = urlparse(url).netloc
+        with self._host_limits_lock:
+            semaphore = self._host_limits.get(host)
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore(self.max_per_host)
+                self._host_limits[host] = semaphore
+            return semaphore
+
     def _extract_content(self, soup):
         """Extrai o conteúdo do artigo - pode ser sobrescrito"""
         # Tenta diferentes seletores comuns
-        selectors = [
-            "div.news-content",
-            "div.article-content",
-            "div.post-content",
-            "div.entry-content",
-            "article",
-            "div.content"
-        ]
-        
-        for selector in selectors:
+        for selector in self.content_selectors:
             element = soup.select_one(selector)
             if element:
-                return element.get_text(separator="\n").strip()
+                # Mesmo formato do motor lxml: um parágrafo por bloco, tags inline unidas
+                return soup_block_text(element)
         
         return ""
 
@@ -115,6 +344,12 @@ class BaseScraper:
                 return datetime.strptime(date_str, fmt).isoformat()
             except ValueError:
                 continue
+
+        # Feeds Atom usam ISO 8601 (ex.: 2024-01-31T10:00:00Z)
+        try:
+            return datetime.fromisoformat(date_str.replace("Z", "+00:00")).isoformat()
+        except ValueError:
+            pass
         
         logger.warning(f"Formato de data inválido: {date_str}")
         return date_str
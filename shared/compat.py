@@ -0,0 +1,26 @@
+"""
+Ajustes de compatibilidade entre versões do Python
+"""
+import sys
+
+
+def patch_importlib_metadata():
+    """Workaround para Python 3.9: usa o backport importlib_metadata
+
+    O importlib.metadata nativo do 3.9 não tem packages_distributions,
+    exigido por dependências do supabase/google. Nas versões novas não faz
+    nada (e não importa o backport). Deve rodar antes desses imports.
+    """
+    try:
+        import importlib.metadata
+        if hasattr(importlib.metadata, 'packages_distributions'):
+            return
+    except ImportError:
+        pass
+
+    try:
+        import importlib_metadata
+        # Substitui importlib.metadata pelo backport
+        sys.modules['importlib.metadata'] = importlib_metadata
+    except ImportError:
+        pass
@@ -5,15 +5,31 @@ import os
 import logging
 from dotenv import load_dotenv
 
-# Carrega variáveis de ambiente
-# Primeiro carrega .env, depois .env.local (sobrescreve valores)
-load_dotenv()  # Carrega .env se existir
-# Tenta carregar .env.local a partir do diretório raiz do projeto
-import sys
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-env_local_path = os.path.join(project_root, '.env.local')
-if os.path.exists(env_local_path):
-    load_dotenv(dotenv_path=env_local_path)
+
+_env_loaded = False
+
+
+def load_env():
+    """Carrega as variáveis de ambiente uma única vez por processo
+
+    Primeiro carrega .env (sem sobrescrever o ambiente), depois .env.local,
+    que sobrescreve valores. Sempre procura no diretório raiz do projeto.
+    """
+    global _env_loaded
+    if _env_loaded:
+        return
+    _env_loaded = True
+
+    env_path = os.path.join(project_root, '.env')
+    env_local_path = os.path.join(project_root, '.env.local')
+    if os.path.exists(env_path):
+        load_dotenv(dotenv_path=env_path)
+    if os.path.exists(env_local_path):
+        load_dotenv(dotenv_path=env_local_path, override=True)  # override=True sobrescreve valores
+
+
+load_env()
 
 # Configuração de logging
 logging.basicConfig(
@@ -22,4 +38,3 @@ logging.basicConfig(
 )
 
 logger = logging.getLogger(__name__)
-
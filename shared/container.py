@@ -0,0 +1,89 @@
+"""
+Container de componentes de longa duração do processo
+"""
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Components:
+    """Cria NewsStorage, Translator, WordPressPublisher etc. uma única vez
+
+    Os clientes são criados sob demanda (na primeira execução, não no
+    startup) e reaproveitados pelas execuções seguintes de uma instância
+    aquecida, junto com seus pools de conexão. Também controla que só uma
+    execução rode por vez.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._components = {}
+        self._run_lock = threading.Lock()
+
+    def get(self, name, factory):
+        """Retorna o componente `name`, criando-o com `factory()` se necessário"""
+        with self._lock:
+            if name not in self._components:
+                self._components[name] = factory()
+                logger.info(f"Componente criado: {name}")
+            return self._components[name]
+
+    @property
+    def session(self):
+        from shared.http_client import get_session
+        return self.get("session", get_session)
+
+    @property
+    def storage(self):
+        from shared.storage import create_storage
+        return self.get("storage", create_storage)
+
+    @property
+    def state_store(self):
+        from shared.state import create_state_store
+        return self.get("state_store", lambda: create_state_store(self.storage))
+
+    @property
+    def translator(self):
+        from shared.translator import Translator
+        from shared.translation_cache import create_translation_cache
+        return self.get("translator", lambda: Translator(cache=create_translation_cache(self.storage)))
+
+    @property
+    def publisher(self):
+        from shared.wordpress import WordPressPublisher
+        # O registro de posts publicados fica no estado do storage (Supabase), que
+        # sobrevive ao disco efêmero do Cloud Run, mesmo com STATE_BACKEND=file
+        return self.get("publisher", lambda: WordPressPublisher(
+            session=self.session, state_store=self.state_store, published_store=self.storage.state
+        ))
+
+    def try_start_run(self):
+        """Reserva a execução; retorna False se já houver uma em andamento"""
+        return self._run_lock.acquire(blocking=False)
+
+    def finish_run(self):
+        self._run_lock.release()
+
+    def is_running(self):
+        return self._run_lock.locked()
+
+    def close(self):
+        """Libera os recursos no desligamento do serviço"""
+        with self._lock:
+            publisher = self._components.get("publisher")
+            if publisher is not None:
+                publisher.close()
+            translator = self._components.get("translator")
+            if translator is not None and translator.cache is not None:
+                # Grava os accessed_at ainda pendentes do cache SQLite
+                translator.cache.close()
+            storage = self._components.get("storage")
+            if storage is not None:
+                # Com write-behind, envia as gravações locais pendentes
+                storage.close()
+            session = self._components.pop("session", None)
+            if session is not None:
+                session.close()
+            self._components.clear()
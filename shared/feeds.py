@@ -0,0 +1,69 @@
+"""
+Leitura de feeds RSS/Atom em streaming (lxml iterparse)
+"""
+import logging
+from lxml import etree
+
+logger = logging.getLogger(__name__)
+
+ATOM = "{http://www.w3.org/2005/Atom}"
+
+
+def iter_feed_items(source):
+    """Gera um dict leve por item do feed (title, link, guid, pub_date)
+
+    `source` pode ser um arquivo ou um stream (ex.: `response.raw`). Cada
+    item é descartado da árvore logo após ser lido, então a memória fica
+    constante e parar o gerador interrompe a leitura do restante do feed.
+    """
+    context = etree.iterparse(
+        source,
+        events=("end",),
+        tag=("item", f"{ATOM}entry"),
+        resolve_entities=False,
+        no_network=True
+    )
+    for _, element in context:
+        if element.tag == "item":
+            record = _rss_item(element)
+        else:
+            record = _atom_entry(element)
+
+        # Libera o item e os irmãos já processados
+        element.clear()
+        while element.getprevious() is not None:
+            del element.getparent()[0]
+
+        yield record
+
+
+def _text(element, path):
+    found = element.find(path)
+    if found is None or found.text is None:
+        return ""
+    return found.text.strip()
+
+
+def _rss_item(element):
+    link = _text(element, "link")
+    return {
+        "title": _text(element, "title"),
+        "link": link,
+        "guid": _text(element, "guid") or link,
+        "pub_date": _text(element, "pubDate")
+    }
+
+
+def _atom_entry(element):
+    link = ""
+    for link_tag in element.iterfind(f"{ATOM}link"):
+        if link_tag.get("rel", "alternate") == "alternate":
+            link = (link_tag.get("href") or "").strip()
+            break
+
+    return {
+        "title": _text(element, f"{ATOM}title"),
+        "link": link,
+        "guid": _text(element, f"{ATOM}id") or link,
+        "pub_date": _text(element, f"{ATOM}published") or _text(element, f"{ATOM}updated")
+    }
@@ -0,0 +1,67 @@
+"""
+Cliente HTTP compartilhado (pool de conexões, keep-alive e retries)
+"""
+import os
+import threading
+import logging
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from shared.metrics import record_response
+
+logger = logging.getLogger(__name__)
+
+# O urllib3 só descomprime brotli se o pacote estiver instalado
+try:
+    import brotli  # noqa: F401
+    ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    ACCEPT_ENCODING = "gzip, deflate"
+
+# Status que valem nova tentativa (somente para métodos idempotentes)
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def create_session(pool_size=None, retries=None, backoff_factor=None):
+    """Cria uma sessão com pool de conexões por host e retry com backoff"""
+    if pool_size is None:
+        pool_size = int(os.getenv("HTTP_POOL_SIZE", "10"))
+    if retries is None:
+        retries = int(os.getenv("HTTP_RETRIES", "3"))
+    if backoff_factor is None:
+        backoff_factor = float(os.getenv("HTTP_BACKOFF", "0.5"))
+
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUS,
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=retry
+    )
+
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["Accept-Encoding"] = ACCEPT_ENCODING
+    # Tempo, bytes e retries por host (ver shared/metrics.py)
+    session.hooks["response"].append(record_response)
+    return session
+
+
+def get_session():
+    """Retorna a sessão compartilhada do processo (criada sob demanda)"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = create_session()
+            logger.info("Sessão HTTP compartilhada criada")
+        return _session
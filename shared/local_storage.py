@@ -0,0 +1,622 @@
+"""
+Armazenamento de notícias em SQLite local (execuções offline e cache write-behind)
+"""
+import os
+import json
+import uuid
+import socket
+import sqlite3
+import threading
+import logging
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from shared.state import SQLiteStateStore
+from shared.storage import (
+    BaseNewsStorage, STATUS_COLLECTED, STATUS_TRANSLATED, STATUS_PUBLISHED
+)
+from shared.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_STORAGE_PATH = os.path.join(project_root, ".cache", "news.sqlite3")
+
+# Colunas da tabela news (as mesmas do Supabase); as JSON são gravadas como texto
+NEWS_COLUMNS = (
+    "id", "title", "url", "date", "content", "image_url", "video_urls",
+    "translated_title", "translated_content", "entities",
+    "published", "published_at", "status", "claimed_by", "claimed_until"
+)
+JSON_COLUMNS = ("video_urls", "entities")
+
+# Ordem dos estados no pipeline
+STATUS_ORDER = (STATUS_COLLECTED, STATUS_TRANSLATED, STATUS_PUBLISHED)
+
+# Operações aguardando envio ao Supabase, na ordem em que são aplicadas
+SYNC_ADD = "add"
+SYNC_TRANSLATE = "translate"
+SYNC_PUBLISH = "publish"
+SYNC_OPS = (SYNC_ADD, SYNC_TRANSLATE, SYNC_PUBLISH)
+
+# URLs conhecidas só no Supabase lembradas pelo WriteBehindNewsStorage
+REMOTE_URLS_MAX = 10000
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS news ("
+    " id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT, url TEXT NOT NULL, date TEXT,"
+    " content TEXT, image_url TEXT, video_urls TEXT, translated_title TEXT,"
+    " translated_content TEXT, entities TEXT, published INTEGER NOT NULL DEFAULT 0,"
+    " published_at TEXT, status TEXT NOT NULL DEFAULT 'collected', claimed_by TEXT,"
+    " claimed_until TEXT)",
+    # Equivalentes a migrations/001_news_url_unique.sql e 008_news_claim_index.sql
+    "CREATE UNIQUE INDEX IF NOT EXISTS news_url_key ON news (url)",
+    "CREATE INDEX IF NOT EXISTS news_status_id_idx ON news (status, id)",
+    "DROP INDEX IF EXISTS news_pending_status_id_idx",
+    "CREATE TABLE IF NOT EXISTS sync_queue ("
+    " id INTEGER PRIMARY KEY AUTOINCREMENT, op TEXT NOT NULL, url TEXT NOT NULL)",
+)
+
+
+def _now():
+    return datetime.utcnow().isoformat()
+
+
+def _columns(columns):
+    """Valida a lista de colunas ("*" ou "id, url, ...") usada no SELECT"""
+    if columns == "*":
+        return list(NEWS_COLUMNS)
+    names = [column.strip() for column in columns.split(",") if column.strip()]
+    unknown = [name for name in names if name not in NEWS_COLUMNS]
+    if unknown:
+        raise ValueError(f"Colunas desconhecidas: {', '.join(unknown)}")
+    return names
+
+
+def _encode(column, value):
+    if column in JSON_COLUMNS:
+        return None if value is None else json.dumps(value, ensure_ascii=False)
+    if column == "published":
+        return int(bool(value))
+    return value
+
+
+def _decode(names, values):
+    row = dict(zip(names, values))
+    for column in JSON_COLUMNS:
+        if row.get(column) is not None:
+            row[column] = json.loads(row[column])
+    if "published" in row:
+        row["published"] = bool(row["published"])
+    return row
+
+
+class SQLiteNewsStorage(BaseNewsStorage):
+    """Tabela news em um arquivo SQLite (modo WAL), com a mesma API do NewsStorage
+
+    Serve para rodar scrapers, testes e benchmarks sem Supabase
+    (STORAGE_BACKEND=sqlite) e como cache local do WriteBehindNewsStorage.
+    Lotes são gravados com executemany em uma única transação, e as
+    reservas (claim_news) usam BEGIN IMMEDIATE, então processos que
+    compartilham o arquivo também recebem lotes disjuntos.
+    """
+
+    def __init__(self, path=None, lease_seconds=None):
+        self.path = path or os.getenv("STORAGE_PATH", DEFAULT_STORAGE_PATH)
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+        self._lock = threading.RLock()
+        # Autocommit: as transações são abertas explicitamente em _transaction
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        for statement in SCHEMA:
+            self._conn.execute(statement)
+        self.state = SQLiteStateStore(self._conn, self._lock)
+
+        self.worker_id = f"{socket.gethostname()}-{uuid.uuid4().hex[:8]}"
+        self.lease_seconds = lease_seconds or int(os.getenv("CLAIM_LEASE_SECONDS", "900"))
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock, metrics.timer("external_call_seconds", service="sqlite"):
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def _select(self, sql, params, columns):
+        names = _columns(columns)
+        with self._lock:
+            cursor = self._conn.execute(sql.format(columns=", ".join(names)), params)
+            return [_decode(names, values) for values in cursor.fetchall()]
+
+    def news_exists(self, link):
+        return link in self.existing_urls([link])
+
+    def existing_urls(self, urls, chunk_size=500):
+        """Retorna o subconjunto de URLs que já existem (consulta no índice de url)"""
+        urls = [url for url in dict.fromkeys(urls) if url]
+        existing = set()
+        with self._lock:
+            for start in range(0, len(urls), chunk_size):
+                chunk = urls[start:start + chunk_size]
+                placeholders = ", ".join("?" * len(chunk))
+                existing.update(row[0] for row in self._conn.execute(
+                    f"SELECT url FROM news WHERE url IN ({placeholders})", chunk
+                ))
+        return existing
+
+    def get_news_by_url(self, urls, columns="*"):
+        """Retorna as linhas das URLs informadas, indexadas pela url"""
+        names = _columns(columns)
+        if "url" not in names:
+            names.append("url")
+        rows = {}
+        urls = list(dict.fromkeys(urls))
+        for start in range(0, len(urls), 500):
+            chunk = urls[start:start + 500]
+            placeholders = ", ".join("?" * len(chunk))
+            for row in self._select(
+                f"SELECT {{columns}} FROM news WHERE url IN ({placeholders})", chunk, ", ".join(names)
+            ):
+                rows[row["url"]] = row
+        return rows
+
+    def add_news(self, title, link, date, content, image_url, video_urls):
+        """Adiciona uma nova notícia ao banco de dados"""
+        added = self.add_news_batch([{
+            "title": title, "url": link, "date": date, "content": content,
+            "image_url": image_url, "video_urls": video_urls
+        }])[0]
+        if not added:
+            logger.info(f"Notícia '{title}' já existe. Pulando...")
+        return added
+
+    def add_news_batch(self, articles, raise_errors=False):
+        """Adiciona várias notícias em uma transação, ignorando URLs já existentes
+
+        Retorna uma lista de booleanos na mesma ordem de `articles`, como
+        NewsStorage.add_news_batch; com `raise_errors`, erros do SQLite são
+        propagados, senão são registrados e nada conta como inserido.
+        """
+        claimed_until = (datetime.utcnow() + timedelta(seconds=self.lease_seconds)).isoformat()
+        rows = {}
+        for article in articles:
+            rows.setdefault(article["url"], (
+                article["title"], article["url"], article["date"], article["content"],
+                article["image_url"], _encode("video_urls", article["video_urls"]),
+                STATUS_COLLECTED, self.worker_id, claimed_until
+            ))
+
+        try:
+            with self._transaction() as conn:
+                existing = self.existing_urls(rows)
+                conn.executemany(
+                    "INSERT INTO news (title, url, date, content, image_url, video_urls,"
+                    " status, claimed_by, claimed_until) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+                    " ON CONFLICT (url) DO NOTHING",
+                    [row for url, row in rows.items() if url not in existing]
+                )
+        except sqlite3.Error as e:
+            logger.error(f"Erro ao adicionar lote de notícias: {e}")
+            if raise_errors:
+                raise
+            return [False] * len(articles)
+
+        inserted = set(rows) - existing
+        results = []
+        for article in articles:
+            # Uma URL repetida no mesmo lote só conta uma vez
+            results.append(article["url"] in inserted)
+            inserted.discard(article["url"])
+
+        logger.info(f"Notícias adicionadas em lote: {sum(results)}/{len(articles)}")
+        return results
+
+    def upsert_rows(self, rows):
+        """Grava linhas completas ou parciais, pela url (INSERT ... ON CONFLICT DO UPDATE)
+
+        Só as colunas conhecidas presentes em cada linha são atualizadas; o
+        id é sempre o local. Usado pelo WriteBehindNewsStorage para espelhar linhas do
+        Supabase.
+        """
+        groups = {}
+        for row in rows:
+            names = tuple(name for name in row if name in NEWS_COLUMNS and name != "id")
+            groups.setdefault(names, []).append(tuple(_encode(name, row[name]) for name in names))
+
+        with self._transaction() as conn:
+            for names, values in groups.items():
+                updates = ", ".join(f"{name} = excluded.{name}" for name in names if name != "url")
+                conn.executemany(
+                    f"INSERT INTO news ({', '.join(names)}) VALUES ({', '.join('?' * len(names))})"
+                    f" ON CONFLICT (url) DO {f'UPDATE SET {updates}' if updates else 'NOTHING'}",
+                    values
+                )
+        return len(rows)
+
+    def update_translation(self, *, link, translated_title, translated_content, tags):
+        """Atualiza a notícia (pela url) com tradução e tags"""
+        return self.update_translations([{
+            "url": link,
+            "translated_title": translated_title,
+            "translated_content": translated_content,
+            "entities": tags
+        }]) > 0
+
+    def update_translations(self, rows, raise_errors=False):
+        """Grava traduções em lote, por url, e passa o status para "translated"
+
+        Com `raise_errors`, erros do SQLite são propagados; senão, retorna 0.
+        """
+        try:
+            with self._transaction() as conn:
+                before = conn.total_changes
+                conn.executemany(
+                    "UPDATE news SET translated_title = ?, translated_content = ?, entities = ?,"
+                    " status = ? WHERE url = ?",
+                    [
+                        (row["translated_title"], row["translated_content"],
+                         _encode("entities", row["entities"]), STATUS_TRANSLATED, row["url"])
+                        for row in rows
+                    ]
+                )
+                updated = conn.total_changes - before
+        except sqlite3.Error as e:
+            logger.error(f"Erro ao salvar lote de traduções: {e}")
+            if raise_errors:
+                raise
+            return 0
+
+        logger.info(f"Traduções salvas em lote: {updated}/{len(rows)}")
+        return updated
+
+    def get_news_by_status(self, status, columns="*", limit=100):
+        """Retorna notícias em um estado do pipeline, das mais antigas às mais novas"""
+        return self._select(
+            "SELECT {columns} FROM news WHERE status = ? ORDER BY id LIMIT ?", (status, limit), columns
+        )
+
+    def iter_news_by_status(self, status, columns="*", page_size=100):
+        """Percorre as notícias em um estado, em páginas de `page_size` (id > último id)"""
+        if columns != "*" and "id" not in _columns(columns):
+            columns = f"id, {columns}"
+
+        last_id = 0
+        while True:
+            rows = self._select(
+                "SELECT {columns} FROM news WHERE status = ? AND id > ? ORDER BY id LIMIT ?",
+                (status, last_id, page_size), columns
+            )
+            yield from rows
+            if len(rows) < page_size:
+                return
+            last_id = rows[-1]["id"]
+
+    def claim_news(self, status, columns="*", limit=100):
+        """Reserva até `limit` notícias livres no estado `status` para este worker
+
+        Mesma regra da função claim_news do Supabase: só linhas sem reserva
+        ou com a reserva vencida. Retorna as linhas em ordem de id.
+        """
+        now = datetime.utcnow()
+        claimed_until = (now + timedelta(seconds=self.lease_seconds)).isoformat()
+        names = _columns(columns)
+        with self._transaction() as conn:
+            ids = [row[0] for row in conn.execute(
+                "SELECT id FROM news WHERE status = ?"
+                " AND (claimed_until IS NULL OR claimed_until < ?) ORDER BY id LIMIT ?",
+                (status, now.isoformat(), limit)
+            )]
+            if not ids:
+                return []
+            placeholders = ", ".join("?" * len(ids))
+            conn.execute(
+                f"UPDATE news SET claimed_by = ?, claimed_until = ? WHERE id IN ({placeholders})",
+                [self.worker_id, claimed_until, *ids]
+            )
+            cursor = conn.execute(
+                f"SELECT {', '.join(names)} FROM news WHERE id IN ({placeholders}) ORDER BY id", ids
+            )
+            return [_decode(names, values) for values in cursor.fetchall()]
+
+    def release_claims(self, urls):
+        """Libera as reservas deste worker (ex.: notícias que falharam), para nova tentativa"""
+        with self._transaction() as conn:
+            conn.executemany(
+                "UPDATE news SET claimed_by = NULL, claimed_until = NULL"
+                " WHERE url = ? AND claimed_by = ?",
+                [(url, self.worker_id) for url in dict.fromkeys(urls)]
+            )
+
+    def mark_as_published(self, link):
+        """Marca a notícia como publicada"""
+        return self.mark_as_published_batch([link]) > 0
+
+    def mark_as_published_batch(self, urls, raise_errors=False):
+        """Marca várias notícias como publicadas; retorna quantas linhas foram atualizadas
+
+        Com `raise_errors`, erros do SQLite são propagados; senão, retorna 0.
+        """
+        urls = list(dict.fromkeys(urls))
+        now = _now()
+        try:
+            with self._transaction() as conn:
+                before = conn.total_changes
+                conn.executemany(
+                    "UPDATE news SET published = 1, published_at = ?, status = ? WHERE url = ?",
+                    [(now, STATUS_PUBLISHED, url) for url in urls]
+                )
+                updated = conn.total_changes - before
+        except sqlite3.Error as e:
+            logger.error(f"Erro ao marcar notícias como publicadas: {e}")
+            if raise_errors:
+                raise
+            return 0
+
+        logger.info(f"Notícias marcadas como publicadas: {updated}/{len(urls)}")
+        return updated
+
+    def queue_sync(self, op, urls):
+        """Registra que as URLs mudaram localmente e precisam ir para o Supabase"""
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT INTO sync_queue (op, url) VALUES (?, ?)", [(op, url) for url in urls]
+            )
+
+    def pending_sync(self, limit=100):
+        """Retorna as operações pendentes mais antigas: [(id, op, url)]"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT id, op, url FROM sync_queue ORDER BY id LIMIT ?", (limit,)
+            ).fetchall()
+
+    def clear_sync(self, ids):
+        with self._transaction() as conn:
+            conn.executemany("DELETE FROM sync_queue WHERE id = ?", [(i,) for i in ids])
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class WriteBehindNewsStorage(BaseNewsStorage):
+    """SQLite local na frente do Supabase, com envio das gravações em lotes
+
+    As verificações de duplicadas consultam primeiro o banco local (e as
+    URLs já vistas no Supabase), e as gravações do pipeline (coleta,
+    tradução, publicação) vão para o SQLite e para a fila sync_queue. A
+    fila é enviada ao Supabase a cada WRITE_BEHIND_BATCH operações, antes
+    de ler ou reservar pendências e em `flush`/`close`. Reservas, cursores
+    e o estado continuam no Supabase, compartilhados entre os workers.
+    """
+
+    def __init__(self, local, remote, batch_size=None):
+        self.local = local
+        self.remote = remote
+        self.batch_size = batch_size or int(os.getenv("WRITE_BEHIND_BATCH", "100"))
+
+        # Linhas novas gravadas localmente nascem reservadas pelo worker remoto
+        self.local.worker_id = self.remote.worker_id
+        self.worker_id = self.remote.worker_id
+        self.state = self.remote.state
+        self.client = getattr(self.remote, "client", None)
+
+        # URLs que existem só no Supabase (as locais já são achadas no SQLite);
+        # LRU limitado a REMOTE_URLS_MAX para não crescer com o processo
+        self._remote_urls = OrderedDict()
+        self._remote_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+
+    def news_exists(self, link):
+        return link in self.existing_urls([link])
+
+    def existing_urls(self, urls):
+        """Consulta o Supabase só pelas URLs que não são conhecidas localmente"""
+        urls = [url for url in dict.fromkeys(urls) if url]
+        existing = self.local.existing_urls(urls)
+        with self._remote_lock:
+            for url in urls:
+                if url in self._remote_urls:
+                    self._remote_urls.move_to_end(url)
+                    existing.add(url)
+
+        missing = [url for url in urls if url not in existing]
+        if existing:
+            metrics.inc("cache_requests_total", len(existing), cache="storage", result="hit")
+        if missing:
+            metrics.inc("cache_requests_total", len(missing), cache="storage", result="miss")
+            found = self.remote.existing_urls(missing)
+            with self._remote_lock:
+                for url in missing:
+                    if url in found:
+                        self._remote_urls[url] = True
+                while len(self._remote_urls) > REMOTE_URLS_MAX:
+                    self._remote_urls.popitem(last=False)
+            existing.update(found)
+        return existing
+
+    def add_news(self, title, link, date, content, image_url, video_urls):
+        """Adiciona uma nova notícia ao banco de dados"""
+        added = self.add_news_batch([{
+            "title": title, "url": link, "date": date, "content": content,
+            "image_url": image_url, "video_urls": video_urls
+        }])[0]
+        if not added:
+            logger.info(f"Notícia '{title}' já existe. Pulando...")
+        return added
+
+    def add_news_batch(self, articles, raise_errors=False):
+        existing = self.existing_urls(article["url"] for article in articles)
+        new = [article for article in articles if article["url"] not in existing]
+        added = dict(zip(
+            (article["url"] for article in new), self.local.add_news_batch(new, raise_errors=raise_errors)
+        ))
+        self._queue(SYNC_ADD, [url for url, is_new in added.items() if is_new])
+
+        results = []
+        for article in articles:
+            results.append(added.pop(article["url"], False))
+        return results
+
+    def update_translation(self, *, link, translated_title, translated_content, tags):
+        return self.update_translations([{
+            "url": link,
+            "translated_title": translated_title,
+            "translated_content": translated_content,
+            "entities": tags
+        }]) > 0
+
+    def update_translations(self, rows, raise_errors=False):
+        # Upsert: a linha pode ter vindo do Supabase sem passar pelo SQLite
+        self.local.upsert_rows([
+            {
+                "url": row["url"],
+                "translated_title": row["translated_title"],
+                "translated_content": row["translated_content"],
+                "entities": row["entities"],
+                "status": STATUS_TRANSLATED
+            }
+            for row in rows
+        ])
+        self._queue(SYNC_TRANSLATE, [row["url"] for row in rows])
+        return len(rows)
+
+    def mark_as_published(self, link):
+        return self.mark_as_published_batch([link]) > 0
+
+    def mark_as_published_batch(self, urls, raise_errors=False):
+        urls = list(dict.fromkeys(urls))
+        now = _now()
+        self.local.upsert_rows([
+            {"url": url, "published": True, "published_at": now, "status": STATUS_PUBLISHED}
+            for url in urls
+        ])
+        self._queue(SYNC_PUBLISH, urls)
+        return len(urls)
+
+    def get_news_by_status(self, status, columns="*", limit=100):
+        self.flush()
+        return self.remote.get_news_by_status(status, columns, limit)
+
+    def iter_news_by_status(self, status, columns="*", page_size=100):
+        self.flush()
+        return self.remote.iter_news_by_status(status, columns, page_size)
+
+    def claim_news(self, status, columns="*", limit=100):
+        """Reserva no Supabase e espelha as linhas no SQLite, para as gravações seguintes
+
+        Linhas que localmente já passaram desse estado (a gravação ainda não
+        chegou ao Supabase) não são retornadas, para não serem traduzidas ou
+        publicadas de novo; a fila sync_queue atualiza o Supabase depois.
+        """
+        self.flush()
+        rows = self.remote.claim_news(status, columns, limit)
+        if not rows or "url" not in rows[0]:
+            return rows
+
+        known = self.local.get_news_by_url([row["url"] for row in rows], "url, status")
+        ahead = {
+            url for url, row in known.items()
+            if STATUS_ORDER.index(row["status"]) > STATUS_ORDER.index(status)
+        }
+        if ahead:
+            logger.info(f"Reservas já adiantadas localmente, aguardando sincronização: {len(ahead)}")
+        rows = [row for row in rows if row["url"] not in ahead]
+        self.local.upsert_rows([dict(row, status=status) for row in rows])
+        return rows
+
+    def release_claims(self, urls):
+        # O que já foi feito precisa chegar ao Supabase antes de outro worker reservar
+        self.flush()
+        self.remote.release_claims(urls)
+
+    def get_cursor(self, source):
+        return self.remote.get_cursor(source)
+
+    def set_cursor(self, source, cursor):
+        self.remote.set_cursor(source, cursor)
+
+    def _queue(self, op, urls):
+        if not urls:
+            return
+        self.local.queue_sync(op, urls)
+        if len(self.local.pending_sync(self.batch_size)) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Envia a fila sync_queue ao Supabase, em lotes de WRITE_BEHIND_BATCH
+
+        Só saem da fila as operações confirmadas pelo Supabase; se ele
+        falhar, o restante fica para o próximo flush. Retorna quantas
+        operações foram enviadas.
+        """
+        with self._flush_lock:
+            sent = 0
+            while True:
+                entries = self.local.pending_sync(self.batch_size)
+                if not entries:
+                    break
+
+                synced = self._sync(entries)
+                self.local.clear_sync(synced)
+                sent += len(synced)
+                if len(synced) < len(entries):
+                    logger.warning(
+                        f"⚠️ Supabase indisponível: {len(entries) - len(synced)} gravações "
+                        f"continuam na fila local"
+                    )
+                    break
+
+        if sent:
+            logger.info(f"🔄 Gravações locais enviadas ao Supabase: {sent}")
+        return sent
+
+    def _sync(self, entries):
+        """Envia um lote da fila (inserções, depois traduções, depois publicações)
+
+        Para na primeira operação que falhar, porque as seguintes podem
+        depender dela (ex.: traduzir uma linha que ainda não chegou ao
+        Supabase). Retorna os ids da fila que foram enviados.
+        """
+        by_op = {op: [] for op in SYNC_OPS}
+        for entry_id, op, url in entries:
+            by_op[op].append((entry_id, url))
+        rows = self.local.get_news_by_url(url for _, _, url in entries)
+
+        synced = []
+        for op in SYNC_OPS:
+            if not by_op[op]:
+                continue
+            urls = list(dict.fromkeys(url for _, url in by_op[op]))
+            try:
+                self._send(op, urls, rows)
+            except Exception as e:
+                logger.error(f"Erro ao enviar gravações locais ({op}) ao Supabase: {e}")
+                break
+            synced.extend(entry_id for entry_id, _ in by_op[op])
+        return synced
+
+    def _send(self, op, urls, rows):
+        if op == SYNC_ADD:
+            added = [rows[url] for url in urls if url in rows]
+            self.remote.add_news_batch(added, raise_errors=True)
+        elif op == SYNC_TRANSLATE:
+            translated = [
+                rows[url] for url in urls
+                if url in rows and rows[url]["translated_title"] is not None
+            ]
+            if translated:
+                self.remote.update_translations(translated, raise_errors=True)
+        else:
+            self.remote.mark_as_published_batch(urls, raise_errors=True)
+
+    def close(self):
+        self.flush()
+        self.local.close()
@@ -0,0 +1,246 @@
+"""
+Upload de imagens destacadas para o WordPress (streaming + cache de mídia)
+"""
+import os
+import re
+import hashlib
+import tempfile
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+from shared.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Tamanho dos blocos lidos do download e enviados no upload
+CHUNK_SIZE = 64 * 1024
+
+# Assinaturas (magic bytes) dos formatos aceitos pela biblioteca de mídia
+IMAGE_SIGNATURES = (
+    (b"\xff\xd8\xff", "image/jpeg", "jpg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png", "png"),
+    (b"GIF87a", "image/gif", "gif"),
+    (b"GIF89a", "image/gif", "gif"),
+)
+
+
+def sniff_image_type(head):
+    """Identifica o tipo da imagem pelos primeiros bytes; None se não for imagem"""
+    for signature, mime, extension in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return mime, extension
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp", "webp"
+    if head[4:8] == b"ftyp" and head[8:12] in (b"avif", b"avis"):
+        return "image/avif", "avif"
+    return None
+
+
+class _UploadBody:
+    """Corpo do upload lido do arquivo em blocos, com Content-Length conhecido"""
+
+    def __init__(self, file, size):
+        self.file = file
+        self.size = size
+
+    def __len__(self):
+        return self.size
+
+    def read(self, size=-1):
+        return self.file.read(size)
+
+    def __iter__(self):
+        while True:
+            chunk = self.file.read(CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+
+class MediaUploader:
+    """Baixa e envia imagens à biblioteca de mídia sem manter o arquivo em memória
+
+    O download é lido em blocos para um SpooledTemporaryFile (vai para o disco
+    acima de MEDIA_SPOOL_BYTES) enquanto o SHA-256 é calculado. O cache
+    URL/hash -> id de mídia evita reenviar a mesma imagem, e `prefetch`
+    adianta os uploads em segundo plano. No state store, cada entrada do
+    cache é uma chave própria: um upload grava só as suas.
+    """
+
+    def __init__(self, session, media_endpoint, authorization, state_store=None,
+                 max_workers=None, spool_bytes=None, max_bytes=None, max_entries=None):
+        self.session = session
+        self.media_endpoint = media_endpoint
+        self.authorization = authorization
+        # Se informado, o cache de mídia é persistido entre execuções
+        self.state_store = state_store
+        self.max_workers = max_workers or int(os.getenv("MEDIA_WORKERS", "4"))
+        self.spool_bytes = spool_bytes or int(os.getenv("MEDIA_SPOOL_BYTES", str(1024 * 1024)))
+        self.max_bytes = max_bytes or int(os.getenv("MEDIA_MAX_BYTES", str(15 * 1024 * 1024)))
+        self.max_entries = max_entries or int(os.getenv("MEDIA_CACHE_MAX_ENTRIES", "5000"))
+
+        # "url:<url>" / "sha256:<hash>" -> id de mídia; em memória, as entradas
+        # usadas mais recentemente (até MEDIA_CACHE_MAX_ENTRIES)
+        self._cache = {}
+        self._cache_lock = threading.Lock()
+
+        # Uploads em andamento, para que a mesma URL não seja enviada duas vezes
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._executor = None
+
+    def upload(self, image_url):
+        """Retorna o id de mídia da imagem, enviando-a só se ainda não estiver no WordPress"""
+        if not image_url:
+            return None
+
+        cached = self._cache_get(f"url:{image_url}")
+        if cached:
+            metrics.inc("cache_requests_total", cache="media", result="hit")
+            return cached
+
+        with self._pending_lock:
+            future = self._pending.get(image_url)
+        if future is not None:
+            return future.result()
+        return self._upload(image_url)
+
+    def prefetch(self, image_urls):
+        """Agenda o upload das imagens em segundo plano (ex.: enquanto a tradução roda)
+
+        Só consulta o cache em memória: a leitura do state store fica para a
+        thread do upload, então quem chama (ex.: o loop do pipeline) não espera.
+        """
+        for image_url in image_urls:
+            if not image_url:
+                continue
+            with self._cache_lock:
+                if f"url:{image_url}" in self._cache:
+                    continue
+            with self._pending_lock:
+                if image_url in self._pending:
+                    continue
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="media")
+                future = self._executor.submit(self._upload, image_url)
+                self._pending[image_url] = future
+            future.add_done_callback(lambda _, url=image_url: self._forget_pending(url))
+
+    def close(self):
+        with self._pending_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def _forget_pending(self, image_url):
+        with self._pending_lock:
+            self._pending.pop(image_url, None)
+
+    def _upload(self, image_url):
+        cached = self._cache_get(f"url:{image_url}")
+        if cached:
+            metrics.inc("cache_requests_total", cache="media", result="hit")
+            return cached
+        try:
+            with tempfile.SpooledTemporaryFile(max_size=self.spool_bytes) as file:
+                downloaded = self._download(image_url, file)
+                if downloaded is None:
+                    return None
+                digest, size, (mime, extension) = downloaded
+
+                media_id = self._cache_get(f"sha256:{digest}")
+                if media_id:
+                    # Mesma imagem publicada antes com outra URL
+                    metrics.inc("cache_requests_total", cache="media", result="hit")
+                else:
+                    metrics.inc("cache_requests_total", cache="media", result="miss")
+                    file.seek(0)
+                    media_id = self._send(file, size, mime, _filename(image_url, extension))
+                    if not media_id:
+                        return None
+
+                self._cache_set({f"url:{image_url}": media_id, f"sha256:{digest}": media_id})
+                return media_id
+        except Exception as e:
+            logger.error(f"Erro ao fazer upload da imagem: {e}")
+            return None
+
+    def _download(self, image_url, file):
+        """Grava a imagem em `file`; retorna (sha256, tamanho, (mime, extensão)) ou None"""
+        with self.session.get(image_url, timeout=10, stream=True) as response:
+            response.raise_for_status()
+
+            digest = hashlib.sha256()
+            size = 0
+            image_type = None
+            for chunk in response.iter_content(CHUNK_SIZE):
+                if image_type is None:
+                    image_type = sniff_image_type(chunk)
+                    if image_type is None:
+                        logger.error(f"Conteúdo não é uma imagem suportada: {image_url}")
+                        return None
+
+                size += len(chunk)
+                if size > self.max_bytes:
+                    logger.error(f"Imagem maior que {self.max_bytes} bytes: {image_url}")
+                    return None
+                digest.update(chunk)
+                file.write(chunk)
+
+        if image_type is None:
+            logger.error(f"Imagem vazia: {image_url}")
+            return None
+        return digest.hexdigest(), size, image_type
+
+    def _send(self, file, size, mime, filename):
+        response = self.session.post(
+            self.media_endpoint,
+            headers={
+                "Authorization": self.authorization,
+                "Content-Type": mime,
+                "Content-Disposition": f'attachment; filename="{filename}"'
+            },
+            data=_UploadBody(file, size),
+            timeout=30
+        )
+        if response.status_code == 201:
+            return response.json().get("id")
+        logger.error(f"Erro ao fazer upload da imagem: {response.status_code}")
+        return None
+
+    def _state_key(self, key):
+        return f"wordpress:media:{self.media_endpoint}:{key}"
+
+    def _cache_get(self, key):
+        with self._cache_lock:
+            media_id = self._cache.get(key)
+        if media_id is None and self.state_store:
+            media_id = self.state_store.get(self._state_key(key))
+            if media_id:
+                self._remember({key: media_id})
+        return media_id
+
+    def _cache_set(self, entries):
+        with self._cache_lock:
+            changed = {key: value for key, value in entries.items() if self._cache.get(key) != value}
+        self._remember(entries)
+        if self.state_store:
+            for key, value in changed.items():
+                self.state_store.set(self._state_key(key), value)
+
+    def _remember(self, entries):
+        with self._cache_lock:
+            for key, value in entries.items():
+                # Reinsere no fim: as entradas mais antigas são descartadas primeiro
+                self._cache.pop(key, None)
+                self._cache[key] = value
+            while len(self._cache) > self.max_entries:
+                self._cache.pop(next(iter(self._cache)))
+
+
+def _filename(image_url, extension):
+    """Nome do arquivo a partir da URL, com a extensão do tipo detectado"""
+    name = os.path.splitext(os.path.basename(urlparse(image_url).path))[0]
+    name = re.sub(r"[^A-Za-z0-9._-]+", "-", name).strip("-.") or "image"
+    return f"{name[:80]}.{extension}"
@@ -0,0 +1,301 @@
+"""
+Instrumentação: tempos por etapa e por host, bytes, retries e cache
+
+Os valores ficam em memória no processo e são expostos em formato
+Prometheus (`/metrics`) e, por execução, em JSON (`/runs/{id}`).
+"""
+import os
+import time
+import uuid
+import functools
+import importlib
+import threading
+import logging
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+PREFIX = "rocknews"
+
+# Limites (em segundos) dos buckets dos histogramas de tempo
+BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+HELP = {
+    "stage_seconds": "Tempo de cada etapa do scraper/pipeline",
+    "http_request_seconds": "Tempo até a resposta das requisições HTTP, por host",
+    "http_responses_total": "Respostas HTTP por host e status",
+    "http_response_bytes_total": "Bytes recebidos por host (como trafegados, antes da descompressão)",
+    "http_retries_total": "Novas tentativas feitas pelo urllib3, por host",
+    "external_call_seconds": "Tempo das chamadas ao Supabase e ao Gemini",
+    "errors_total": "Chamadas medidas que terminaram em exceção",
+    "cache_requests_total": "Consultas aos caches (feed, traduções, tags)",
+    "retries_total": "Novas tentativas feitas pela aplicação",
+    "runs_total": "Execuções concluídas por serviço e resultado",
+}
+
+
+def _labels_key(labels):
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key, extra=None):
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class Metrics:
+    """Contadores e histogramas do processo, com registro por execução
+
+    Enquanto uma execução está ativa (`start_run`), cada valor também é
+    somado ao registro dela. Os listeners recebem cada observação e servem
+    de gancho para um profiler no próprio processo.
+    """
+
+    def __init__(self, buckets=BUCKETS, max_runs=None):
+        self.buckets = tuple(buckets)
+        self.max_runs = max_runs or int(os.getenv("METRICS_MAX_RUNS", "50"))
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._listeners = []
+        self._runs = OrderedDict()
+        self._current_run = None
+
+    def inc(self, name, value=1, **labels):
+        """Soma `value` ao contador `name`"""
+        key = _labels_key(labels)
+        with self._lock:
+            self._counters[(name, key)] = self._counters.get((name, key), 0) + value
+            run = self._current_run
+            if run is not None:
+                counters = run["counters"].setdefault(name, {})
+                label = _run_label(key)
+                counters[label] = counters.get(label, 0) + value
+        self._notify("counter", name, labels, value)
+
+    def observe(self, name, seconds, **labels):
+        """Registra uma duração no histograma `name`"""
+        key = _labels_key(labels)
+        with self._lock:
+            histogram = self._histograms.get((name, key))
+            if histogram is None:
+                histogram = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+                self._histograms[(name, key)] = histogram
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    histogram["buckets"][i] += 1
+                    break
+            histogram["sum"] += seconds
+            histogram["count"] += 1
+
+            run = self._current_run
+            if run is not None:
+                timings = run["timings"].setdefault(name, {})
+                timing = timings.setdefault(_run_label(key), {"count": 0, "seconds": 0.0, "max_seconds": 0.0})
+                timing["count"] += 1
+                timing["seconds"] = round(timing["seconds"] + seconds, 6)
+                timing["max_seconds"] = round(max(timing["max_seconds"], seconds), 6)
+        self._notify("timing", name, labels, seconds)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Mede o bloco; exceções também são contadas em errors_total"""
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.inc("errors_total", metric=name, **labels)
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def add_listener(self, callback):
+        """Registra `callback(event)` chamado a cada contador/tempo registrado
+
+        `event` é um dict com type ("counter" ou "timing"), metric, labels,
+        value e run_id (None fora de uma execução).
+        """
+        with self._lock:
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        with self._lock:
+            self._listeners.remove(callback)
+
+    def _notify(self, kind, name, labels, value):
+        listeners = self._listeners
+        if not listeners:
+            return
+        run = self._current_run
+        event = {
+            "type": kind,
+            "metric": name,
+            "labels": labels,
+            "value": value,
+            "run_id": run["id"] if run else None
+        }
+        for callback in list(listeners):
+            try:
+                callback(event)
+            except Exception as e:
+                logger.error(f"Erro no listener de métricas: {e}")
+
+    def start_run(self, service, **info):
+        """Abre o registro de uma execução e retorna seu id"""
+        run = {
+            "id": uuid.uuid4().hex[:12],
+            "service": service,
+            "status": "running",
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "finished_at": None,
+            "duration_seconds": None,
+            "result": None,
+            "error": None,
+            "timings": {},
+            "counters": {},
+            "_start": time.perf_counter()
+        }
+        run.update(info)
+        with self._lock:
+            self._runs[run["id"]] = run
+            while len(self._runs) > self.max_runs:
+                self._runs.popitem(last=False)
+            self._current_run = run
+        return run["id"]
+
+    def finish_run(self, run_id, result=None, error=None):
+        """Fecha o registro da execução com o resultado ou o erro"""
+        with self._lock:
+            run = self._runs.get(run_id)
+            if run is None:
+                return
+            run["status"] = "failed" if error is not None else "succeeded"
+            run["finished_at"] = datetime.now(timezone.utc).isoformat()
+            run["duration_seconds"] = round(time.perf_counter() - run["_start"], 3)
+            run["result"] = result
+            run["error"] = str(error) if error is not None else None
+            if self._current_run is run:
+                self._current_run = None
+        self.inc("runs_total", service=run["service"], status=run["status"])
+
+    def get_run(self, run_id):
+        """Cópia do registro da execução (None se desconhecida ou já descartada)"""
+        with self._lock:
+            run = self._runs.get(run_id)
+            if run is None:
+                return None
+            return _copy_run(run)
+
+    def render_prometheus(self):
+        """Todas as métricas no formato de texto do Prometheus"""
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(
+                (key, dict(value, buckets=list(value["buckets"])))
+                for key, value in self._histograms.items()
+            )
+
+        lines = []
+        declared = set()
+
+        def declare(name, kind):
+            if name in declared:
+                return
+            declared.add(name)
+            if name in HELP:
+                lines.append(f"# HELP {PREFIX}_{name} {HELP[name]}")
+            lines.append(f"# TYPE {PREFIX}_{name} {kind}")
+
+        for (name, key), value in counters:
+            declare(name, "counter")
+            lines.append(f"{PREFIX}_{name}{_format_labels(key)} {value}")
+
+        for (name, key), histogram in histograms:
+            declare(name, "histogram")
+            cumulative = 0
+            for bound, count in zip(self.buckets, histogram["buckets"]):
+                cumulative += count
+                lines.append(f"{PREFIX}_{name}_bucket{_format_labels(key, ('le', str(bound)))} {cumulative}")
+            lines.append(f"{PREFIX}_{name}_bucket{_format_labels(key, ('le', '+Inf'))} {histogram['count']}")
+            lines.append(f"{PREFIX}_{name}_sum{_format_labels(key)} {histogram['sum']:.6f}")
+            lines.append(f"{PREFIX}_{name}_count{_format_labels(key)} {histogram['count']}")
+
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        """Zera contadores, histogramas e execuções (usado nos testes)"""
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+            self._runs.clear()
+            self._current_run = None
+
+
+def _run_label(key):
+    return ",".join(f"{name}={value}" for name, value in key) or "total"
+
+
+def _copy_run(run):
+    copy = {key: value for key, value in run.items() if not key.startswith("_")}
+    copy["timings"] = {name: {label: dict(value) for label, value in values.items()}
+                       for name, values in run["timings"].items()}
+    copy["counters"] = {name: dict(values) for name, values in run["counters"].items()}
+    return copy
+
+
+def load_hook(spec):
+    """Importa o listener a partir de "pacote.modulo:funcao" """
+    module_name, _, attr = spec.partition(":")
+    return getattr(importlib.import_module(module_name), attr)
+
+
+# Instância única do processo
+metrics = Metrics()
+
+if os.getenv("METRICS_HOOK"):
+    metrics.add_listener(load_hook(os.environ["METRICS_HOOK"]))
+
+
+def timed(name, **labels):
+    """Decorador que mede cada chamada (label op = nome da função)"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with metrics.timer(name, op=func.__name__, **labels):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_response(response, *args, **kwargs):
+    """Hook de resposta do requests: tempo, status, bytes e retries por host"""
+    host = urlparse(response.url).netloc
+    metrics.observe(
+        "http_request_seconds", response.elapsed.total_seconds(),
+        host=host, method=response.request.method
+    )
+    metrics.inc("http_responses_total", host=host, status=response.status_code)
+
+    raw = response.raw
+    retries = getattr(raw, "retries", None)
+    if retries is not None and retries.history:
+        metrics.inc("http_retries_total", len(retries.history), host=host)
+
+    if kwargs.get("stream"):
+        # Corpo ainda não lido: usa o tamanho declarado, se houver
+        size = int(response.headers.get("Content-Length") or 0)
+    else:
+        # O requests lê o corpo logo após os hooks; ler aqui permite contar os bytes trafegados
+        response.content
+        size = raw.tell() if hasattr(raw, "tell") else len(response.content)
+    if size:
+        metrics.inc("http_response_bytes_total", size, host=host)
@@ -0,0 +1,188 @@
+"""
+Extração rápida de artigos com lxml (XPath compilado uma única vez)
+"""
+import re
+import logging
+from functools import lru_cache
+from lxml import etree, html as lxml_html
+
+logger = logging.getLogger(__name__)
+
+# Seletores usados por padrão para localizar o corpo do artigo
+DEFAULT_CONTENT_SELECTORS = (
+    "div.news-content",
+    "div.article-content",
+    "div.post-content",
+    "div.entry-content",
+    "article",
+    "div.content"
+)
+
+# Suporta apenas a forma simples usada pelos scrapers: tag, tag.classe, tag#id
+_SIMPLE_SELECTOR = re.compile(r"^(?P<tag>[a-zA-Z][\w-]*)?(?:\.(?P<cls>[\w-]+))?(?:#(?P<id>[\w-]+))?$")
+
+# Elementos que delimitam parágrafos no texto extraído; os demais (a, b, em...) são inline
+BLOCK_TAGS = frozenset({
+    "address", "article", "aside", "blockquote", "dd", "div", "dl", "dt", "figcaption",
+    "figure", "footer", "h1", "h2", "h3", "h4", "h5", "h6", "header", "hr", "li", "main",
+    "ol", "p", "pre", "section", "table", "td", "th", "tr", "ul"
+})
+SKIPPED_TAGS = frozenset({"script", "style", "noscript", "template"})
+
+_UPPER = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+_LOWER = "abcdefghijklmnopqrstuvwxyz"
+
+
+def css_to_xpath(selector):
+    """Converte um seletor CSS simples na expressão XPath do primeiro elemento"""
+    match = _SIMPLE_SELECTOR.match(selector.strip())
+    if not match or not any(match.groupdict().values()):
+        raise ValueError(f"Seletor não suportado pelo motor lxml: {selector}")
+
+    predicates = []
+    if match.group("cls"):
+        predicates.append(
+            f"contains(concat(' ', normalize-space(@class), ' '), ' {match.group('cls')} ')"
+        )
+    if match.group("id"):
+        predicates.append(f"@id='{match.group('id')}'")
+
+    path = f"//{match.group('tag') or '*'}"
+    if predicates:
+        path += f"[{' and '.join(predicates)}]"
+    return f"({path})[1]"
+
+
+class _Paragraphs:
+    """Junta os pedaços de texto em parágrafos; usado por block_text e soup_block_text"""
+
+    def __init__(self):
+        self.paragraphs = []
+        self.parts = []
+
+    def add(self, text):
+        self.parts.append(text)
+
+    def end(self):
+        lines = (" ".join(line.split()) for line in "".join(self.parts).split("\n"))
+        text = "\n".join(line for line in lines if line)
+        if text:
+            self.paragraphs.append(text)
+        self.parts.clear()
+
+    def text(self):
+        self.end()
+        return "\n\n".join(self.paragraphs)
+
+
+def block_text(element):
+    """Texto do elemento com um parágrafo por bloco (p, li, h2...), separados por linha em branco
+
+    Tags inline não quebram o texto: `<p>A <a>B</a> C.</p>` vira um único
+    parágrafo "A B C.". `<br>` vira uma quebra de linha dentro do parágrafo.
+    É o formato esperado por `shared.translator.split_paragraphs`.
+    """
+    paragraphs = _Paragraphs()
+
+    def walk(node):
+        tag = node.tag.lower() if isinstance(node.tag, str) else None
+        if tag is not None and tag not in SKIPPED_TAGS:
+            block = tag in BLOCK_TAGS
+            if block:
+                paragraphs.end()
+            if tag == "br":
+                paragraphs.add("\n")
+            if node.text:
+                paragraphs.add(node.text)
+            for child in node:
+                walk(child)
+            if block:
+                paragraphs.end()
+        # Comentários e scripts não têm texto útil, mas o texto depois deles (tail) tem
+        if node.tail:
+            paragraphs.add(node.tail)
+
+    if element.text:
+        paragraphs.add(element.text)
+    for child in element:
+        walk(child)
+    return paragraphs.text()
+
+
+def soup_block_text(element):
+    """`block_text` para um elemento do BeautifulSoup, percorrendo a própria árvore"""
+    from bs4.element import NavigableString, PreformattedString
+
+    paragraphs = _Paragraphs()
+
+    def walk(node):
+        for child in node.children:
+            if isinstance(child, NavigableString):
+                # Comentários, CDATA e doctype não têm texto útil
+                if not isinstance(child, PreformattedString):
+                    paragraphs.add(str(child))
+                continue
+            tag = child.name.lower()
+            if tag in SKIPPED_TAGS:
+                continue
+            block = tag in BLOCK_TAGS
+            if block:
+                paragraphs.end()
+            if tag == "br":
+                paragraphs.add("\n")
+            walk(child)
+            if block:
+                paragraphs.end()
+
+    walk(element)
+    return paragraphs.text()
+
+
+class LxmlExtractor:
+    """Extrai conteúdo, imagem principal e vídeos de uma página com lxml"""
+
+    _og_image = etree.XPath("(//meta[@property='og:image'])[1]/@content")
+    _featured_image = etree.XPath(
+        f"(//img[contains(translate(@class, '{_UPPER}', '{_LOWER}'), 'featured')"
+        f" or contains(translate(@class, '{_UPPER}', '{_LOWER}'), 'main')])[1]/@src"
+    )
+    _iframes = etree.XPath("//iframe/@src")
+
+    def __init__(self, content_selectors=DEFAULT_CONTENT_SELECTORS):
+        self._content_paths = [etree.XPath(css_to_xpath(s)) for s in content_selectors]
+
+    def extract(self, page):
+        """Retorna (content, image_url, video_urls) a partir do HTML bruto"""
+        try:
+            root = lxml_html.fromstring(page)
+        except (etree.ParserError, ValueError) as e:
+            logger.warning(f"HTML inválido: {e}")
+            return "", "", []
+
+        return self.extract_content(root), self.extract_main_image(root), self.extract_videos(root)
+
+    def extract_content(self, root):
+        for path in self._content_paths:
+            found = path(root)
+            if found:
+                return block_text(found[0])
+        return ""
+
+    def extract_main_image(self, root):
+        for path in (self._og_image, self._featured_image):
+            found = path(root)
+            if found and found[0]:
+                return str(found[0])
+        return ""
+
+    def extract_videos(self, root):
+        return [
+            str(src) for src in self._iframes(root)
+            if src and ("youtube.com" in src or "youtu.be" in src)
+        ]
+
+
+@lru_cache(maxsize=None)
+def get_lxml_extractor(content_selectors=DEFAULT_CONTENT_SELECTORS):
+    """Retorna um extrator compilado por conjunto de seletores (cache do processo)"""
+    return LxmlExtractor(tuple(content_selectors))
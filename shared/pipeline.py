@@ -0,0 +1,226 @@
+"""
+Pipeline em etapas (coleta -> tradução -> publicação) com retomada
+"""
+import os
+import time
+import asyncio
+import logging
+from shared.storage import STATUS_COLLECTED, STATUS_TRANSLATED
+from shared.translation_stage import TranslationStage
+from shared.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Sinaliza para os workers que a etapa anterior terminou
+_DONE = object()
+
+COLLECTED_COLUMNS = "id, url, title, content, image_url"
+TRANSLATED_COLUMNS = "id, url, translated_title, translated_content, entities, image_url"
+
+
+class Pipeline:
+    """Executa coleta, tradução e publicação ao mesmo tempo, ligadas por filas
+
+    Cada etapa grava o novo estado da notícia (news.status), então uma
+    execução interrompida é retomada a partir das linhas pendentes.
+    """
+
+    def __init__(self, scraper, storage, translator, publisher, queue_size=None,
+                 resume_limit=None, translation_stage=None, publish_batch=None):
+        self.scraper = scraper
+        self.storage = storage
+        self.publisher = publisher
+        self.translation = translation_stage or TranslationStage(storage, translator)
+        self.queue_size = queue_size or int(os.getenv("PIPELINE_QUEUE_SIZE", "20"))
+        self.resume_limit = resume_limit or int(os.getenv("PIPELINE_RESUME_LIMIT", "100"))
+        # Notícias entregues de uma vez ao WordPressPublisher.publish_batch
+        self.publish_batch_size = publish_batch or int(os.getenv("PUBLISH_BATCH", "10"))
+
+    async def run(self, limit=10):
+        """Executa o pipeline; retorna contadores por etapa"""
+        self.stats = {"collected": 0, "resumed": 0, "translated": 0, "published": 0}
+        self._seen = set()
+        self._translated = []
+        self._flush_lock = asyncio.Lock()
+        self._published = set()
+        self._started = time.perf_counter()
+
+        translate_queue = asyncio.Queue(maxsize=self.queue_size)
+        publish_queue = asyncio.Queue(maxsize=self.queue_size)
+
+        producers = [
+            asyncio.create_task(self._collect(limit, translate_queue)),
+            asyncio.create_task(self._resume(STATUS_COLLECTED, COLLECTED_COLUMNS, translate_queue)),
+            asyncio.create_task(self._resume(STATUS_TRANSLATED, TRANSLATED_COLUMNS, publish_queue))
+        ]
+        translators = [
+            asyncio.create_task(self._translate_worker(translate_queue, publish_queue))
+            for _ in range(self.translation.concurrency)
+        ]
+        publisher = asyncio.create_task(self._publish_worker(publish_queue))
+        driver = asyncio.create_task(
+            self._drive(producers, translators, publisher, translate_queue, publish_queue)
+        )
+        tasks = producers + translators + [publisher, driver]
+
+        # Um erro em qualquer etapa encerra a execução: sem isso, as filas
+        # limitadas enchem e as outras etapas esperam para sempre em put()
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+            failed = [task for task in done if not task.cancelled() and task.exception() is not None]
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        if failed:
+            await self._release_unfinished()
+            raise failed[0].exception()
+
+        # Gravações locais pendentes (STORAGE_BACKEND=write_behind) vão para o Supabase
+        await asyncio.to_thread(self.storage.flush)
+
+        # O que falhou fica livre para a próxima execução (de qualquer worker)
+        await self._release_unfinished()
+
+        metrics.observe("stage_seconds", time.perf_counter() - self._started, stage="pipeline")
+        logger.info(f"✅ Pipeline concluído: {self.stats}")
+        return self.stats
+
+    async def _drive(self, producers, translators, publisher, translate_queue, publish_queue):
+        """Encerra cada etapa quando a anterior termina"""
+        await asyncio.gather(*producers)
+        for _ in translators:
+            await translate_queue.put(_DONE)
+        await asyncio.gather(*translators)
+        await self._flush_translations(publish_queue)
+        await publish_queue.put(_DONE)
+        await publisher
+
+    async def _release_unfinished(self):
+        unfinished = self._seen - self._published
+        if not unfinished:
+            return
+        try:
+            await asyncio.to_thread(self.storage.release_claims, unfinished)
+        except Exception as e:
+            logger.error(f"Erro ao liberar reservas: {e}")
+
+    async def _collect(self, limit, queue):
+        """Etapa 1: coleta do feed, entregando cada lote gravado à tradução"""
+        batches = self.scraper.iter_feed_batches(limit)
+        while True:
+            batch = await asyncio.to_thread(next, batches, None)
+            if batch is None:
+                return
+            self.stats["collected"] += len(batch)
+            for row in batch:
+                await self._put(queue, row)
+
+    async def _resume(self, status, columns, queue):
+        """Reserva as notícias pendentes em páginas e as recoloca nas filas
+
+        Só uma página fica em memória de cada vez (a fila é limitada). As
+        linhas coletadas nesta execução já estão reservadas por este worker
+        e não são retomadas de novo; outros workers recebem lotes disjuntos.
+        """
+        remaining = self.resume_limit
+        while remaining > 0:
+            rows = await asyncio.to_thread(
+                self.storage.claim_news, status, columns, min(self.queue_size, remaining)
+            )
+            if not rows:
+                return
+            remaining -= len(rows)
+            for row in rows:
+                if await self._put(queue, row):
+                    self.stats["resumed"] += 1
+
+    async def _put(self, queue, row):
+        if row["url"] in self._seen:
+            return False
+        self._seen.add(row["url"])
+        if row.get("image_url"):
+            # A imagem destacada sobe enquanto a notícia é traduzida
+            self.publisher.prefetch_images([row["image_url"]])
+        await queue.put(row)
+        return True
+
+    async def _translate_worker(self, queue, publish_queue):
+        """Etapa 2: tradução, gravada em lotes antes de seguir para publicação"""
+        while True:
+            row = await queue.get()
+            if row is _DONE:
+                return
+
+            with metrics.timer("stage_seconds", stage="translate"):
+                result = await self.translation.translate_row(row)
+            if result is not None:
+                self._translated.append(dict(
+                    row,
+                    translated_title=result["title"],
+                    translated_content=result["content"],
+                    entities=result["tags"]
+                ))
+
+            if len(self._translated) >= self.translation.write_batch or queue.empty():
+                await self._flush_translations(publish_queue)
+
+    async def _flush_translations(self, publish_queue):
+        async with self._flush_lock:
+            if not self._translated:
+                return
+            rows, self._translated = self._translated, []
+            saved = await asyncio.to_thread(self._save_translations, rows)
+            self.stats["translated"] += len(saved)
+            for row in saved:
+                await publish_queue.put(row)
+
+    def _save_translations(self, rows):
+        """Grava as traduções; retorna só as linhas confirmadas pelo storage
+
+        Só elas seguem para publicação: publicar uma tradução não gravada
+        marcaria como publicada uma notícia sem translated_title. Se o lote
+        confirmar menos linhas que as enviadas, cada uma é gravada de novo
+        sozinha (a escrita é idempotente) para saber quais existem.
+        """
+        try:
+            if self.storage.update_translations(rows, raise_errors=True) == len(rows):
+                return rows
+            if len(rows) == 1:
+                return []
+            return [row for row in rows if self.storage.update_translations([row], raise_errors=True)]
+        except Exception as e:
+            # Continuam reservadas até o fim da execução e são liberadas para a próxima
+            logger.error(f"Erro ao gravar traduções; {len(rows)} notícias ficam para a próxima execução: {e}")
+            return []
+
+    async def _publish_worker(self, queue):
+        """Etapa 3: publicação no WordPress, em lotes do que já estiver na fila"""
+        done = False
+        while not done:
+            rows = []
+            row = await queue.get()
+            while row is not _DONE:
+                rows.append(row)
+                if len(rows) >= self.publish_batch_size or queue.empty():
+                    break
+                row = queue.get_nowait()
+            done = row is _DONE
+
+            if rows:
+                with metrics.timer("stage_seconds", stage="publish"):
+                    self.stats["published"] += await asyncio.to_thread(self.publish_rows, rows)
+
+    def publish_rows(self, rows):
+        """Publica as notícias traduzidas e marca todas como publicadas de uma vez
+
+        Notícias que já estavam no WordPress (ex.: falha após publicar) só
+        têm o status atualizado. Retorna quantas foram publicadas agora.
+        """
+        result = self.publisher.publish_batch(rows)
+        published = result["published"] + result["existing"]
+        if published:
+            self.storage.mark_as_published_batch(published)
+            self._published.update(published)
+        return len(result["published"])
@@ -0,0 +1,70 @@
+"""
+Registro das fontes (scrapers) disponíveis e seus agendamentos
+"""
+import os
+import json
+import importlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+# nome -> classe do scraper ("módulo:Classe"), agendamento (cron) e limites.
+# Pode ser substituído por um JSON no mesmo formato via SOURCES_FILE.
+SOURCES = {
+    "blabbermouth": {
+        "scraper": "services.blabbermouth.scraper:BlabbermouthScraper",
+        "schedule": "0 8,12,16,20 * * *",
+        "limit": 10,
+        "max_workers": 8
+    },
+}
+
+
+def load_sources():
+    """Retorna o registro de fontes (SOURCES ou o arquivo em SOURCES_FILE)"""
+    path = os.getenv("SOURCES_FILE")
+    if not path:
+        return dict(SOURCES)
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_scraper_class(spec):
+    """Importa a classe a partir de "pacote.modulo:Classe" """
+    module_name, _, class_name = spec.partition(":")
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def cron_matches(expression, moment):
+    """Verifica se `moment` (datetime) casa com uma expressão cron de 5 campos
+
+    Suporta *, listas (a,b), intervalos (a-b) e passos (*/n, a-b/n).
+    """
+    fields = expression.split()
+    if len(fields) != 5:
+        raise ValueError(f"Expressão cron inválida: {expression}")
+
+    # Domingo = 0, como no cron
+    values = (moment.minute, moment.hour, moment.day, moment.month, (moment.isoweekday() % 7))
+    limits = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 6))
+    return all(
+        _field_matches(field, value, low, high)
+        for field, value, (low, high) in zip(fields, values, limits)
+    )
+
+
+def _field_matches(field, value, low, high):
+    for part in field.split(","):
+        part, _, step = part.partition("/")
+        step = int(step) if step else 1
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start, end = (int(v) for v in part.split("-", 1))
+        else:
+            start = int(part)
+            # "a/n" equivale a "a-max/n"
+            end = high if step > 1 else start
+        if start <= value <= end and (value - start) % step == 0:
+            return True
+    return False
@@ -0,0 +1,83 @@
+"""
+Execução de várias fontes em um único processo, compartilhando os clientes
+"""
+import os
+import asyncio
+import logging
+from datetime import datetime
+from zoneinfo import ZoneInfo
+from shared.http_client import get_session
+from shared.pipeline import Pipeline
+from shared.registry import load_sources, load_scraper_class, cron_matches
+from shared.translation_stage import TranslationStage
+
+logger = logging.getLogger(__name__)
+
+
+class MultiSourceRunner:
+    """Roda o pipeline de várias fontes ao mesmo tempo
+
+    Todas as fontes usam a mesma sessão HTTP, o mesmo NewsStorage, o mesmo
+    Translator (e limitador de taxa do Gemini) e o mesmo WordPressPublisher.
+    """
+
+    def __init__(self, storage, translator, publisher, state_store, session=None,
+                 sources=None, max_sources=None):
+        self.storage = storage
+        self.translator = translator
+        self.publisher = publisher
+        self.state_store = state_store
+        self.session = session or get_session()
+        self.sources = sources or load_sources()
+        self.max_sources = max_sources or int(os.getenv("RUNNER_MAX_SOURCES", "3"))
+        self.timezone = ZoneInfo(os.getenv("SCHEDULE_TZ", "America/Sao_Paulo"))
+        self.default_limit = int(os.getenv("LIMIT_PER_RUN", "10"))
+
+    def due_sources(self, moment=None):
+        """Fontes cujo agendamento casa com o horário atual (minuto ignorado)"""
+        moment = (moment or datetime.now(self.timezone)).replace(minute=0)
+        return [
+            name for name, config in self.sources.items()
+            if config.get("schedule") and cron_matches(config["schedule"], moment)
+        ]
+
+    def build_scraper(self, name):
+        config = self.sources[name]
+        scraper_class = load_scraper_class(config["scraper"])
+        return scraper_class(
+            self.storage,
+            session=self.session,
+            state_store=self.state_store,
+            max_workers=config.get("max_workers")
+        )
+
+    async def run(self, names=None):
+        """Executa as fontes indicadas (todas, se None); retorna estatísticas por fonte"""
+        names = list(names) if names is not None else list(self.sources)
+        unknown = [name for name in names if name not in self.sources]
+        if unknown:
+            raise ValueError(f"Fontes desconhecidas: {', '.join(unknown)}")
+
+        # Um único limitador de taxa do Gemini para todas as fontes
+        translation = TranslationStage(self.storage, self.translator)
+        semaphore = asyncio.Semaphore(self.max_sources)
+
+        async def run_source(name):
+            async with semaphore:
+                logger.info(f"🕷️ Iniciando fonte: {name}")
+                pipeline = Pipeline(
+                    self.build_scraper(name), self.storage, self.translator, self.publisher,
+                    translation_stage=translation
+                )
+                return await pipeline.run(limit=self.sources[name].get("limit", self.default_limit))
+
+        outcomes = await asyncio.gather(*(run_source(name) for name in names), return_exceptions=True)
+
+        results = {}
+        for name, outcome in zip(names, outcomes):
+            if isinstance(outcome, Exception):
+                logger.error(f"❌ Erro na fonte {name}: {outcome}", exc_info=outcome)
+                results[name] = {"error": str(outcome)}
+            else:
+                results[name] = outcome
+        return results
@@ -0,0 +1,158 @@
+"""
+Armazenamento de estado dos scrapers (validadores de cache do feed, etc.)
+"""
+import os
+import json
+import threading
+import logging
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_STATE_FILE = os.path.join(project_root, ".cache", "scraper_state.json")
+
+# Um único FileStateStore por arquivo, para que instâncias não sobrescrevam umas às outras
+_file_stores = {}
+_file_stores_lock = threading.Lock()
+
+
+class FileStateStore:
+    """Guarda o estado em um arquivo JSON local"""
+
+    def __init__(self, path=None):
+        self.path = path or os.getenv("STATE_FILE", DEFAULT_STATE_FILE)
+        self._lock = threading.Lock()
+        self._data = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Estado local ilegível ({self.path}), ignorando: {e}")
+            return {}
+
+    def get(self, key, default=None):
+        with self._lock:
+            return self._data.get(key, default)
+
+    def get_many(self, keys):
+        """Retorna {chave: valor} das chaves que existem"""
+        with self._lock:
+            return {key: self._data[key] for key in keys if key in self._data}
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                tmp_path = f"{self.path}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(self._data, f)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                logger.error(f"Erro ao salvar estado local: {e}")
+
+
+class SupabaseStateStore:
+    """Guarda o estado na tabela scraper_state do Supabase"""
+
+    def __init__(self, client):
+        self.client = client
+
+    def get(self, key, default=None):
+        try:
+            response = self.client.table("scraper_state").select("value").eq("key", key).execute()
+            if response.data:
+                return response.data[0]["value"]
+        except Exception as e:
+            logger.error(f"Erro ao ler estado '{key}': {e}")
+        return default
+
+    def get_many(self, keys, chunk_size=100):
+        """Retorna {chave: valor} das chaves que existem, com um `in` por bloco"""
+        keys = list(keys)
+        found = {}
+        for start in range(0, len(keys), chunk_size):
+            try:
+                response = self.client.table("scraper_state").select("key, value").in_(
+                    "key", keys[start:start + chunk_size]
+                ).execute()
+                found.update((row["key"], row["value"]) for row in response.data or [])
+            except Exception as e:
+                logger.error(f"Erro ao ler estado em lote: {e}")
+        return found
+
+    def set(self, key, value):
+        try:
+            self.client.table("scraper_state").upsert({
+                "key": key,
+                "value": value,
+                "updated_at": datetime.utcnow().isoformat()
+            }, on_conflict="key").execute()
+        except Exception as e:
+            logger.error(f"Erro ao salvar estado '{key}': {e}")
+
+
+class SQLiteStateStore:
+    """Guarda o estado na tabela scraper_state de um banco SQLite (SQLiteNewsStorage)"""
+
+    def __init__(self, conn, lock):
+        self.conn = conn
+        self._lock = lock
+        with self._lock:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS scraper_state ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL, updated_at TEXT NOT NULL)"
+            )
+
+    def get(self, key, default=None):
+        with self._lock:
+            row = self.conn.execute("SELECT value FROM scraper_state WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def get_many(self, keys, chunk_size=500):
+        """Retorna {chave: valor} das chaves que existem"""
+        keys = list(keys)
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), chunk_size):
+                chunk = keys[start:start + chunk_size]
+                placeholders = ", ".join("?" * len(chunk))
+                found.update(
+                    (key, json.loads(value)) for key, value in self.conn.execute(
+                        f"SELECT key, value FROM scraper_state WHERE key IN ({placeholders})", chunk
+                    )
+                )
+        return found
+
+    def set(self, key, value):
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO scraper_state (key, value, updated_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), datetime.utcnow().isoformat())
+            )
+
+
+def create_state_store(storage=None):
+    """Cria o store configurado em STATE_BACKEND (file ou supabase)
+
+    Com supabase, usa o estado do próprio storage: a tabela scraper_state do
+    Supabase ou, com STORAGE_BACKEND=sqlite, a do banco local.
+    """
+    backend = os.getenv("STATE_BACKEND", "file").lower()
+    if backend == "supabase":
+        if storage is None:
+            raise ValueError("STATE_BACKEND=supabase requer um NewsStorage")
+        return storage.state
+    if backend != "file":
+        raise ValueError(f"STATE_BACKEND inválido: {backend}")
+
+    path = os.getenv("STATE_FILE", DEFAULT_STATE_FILE)
+    with _file_stores_lock:
+        if path not in _file_stores:
+            _file_stores[path] = FileStateStore(path)
+        return _file_stores[path]
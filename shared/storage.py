@@ -1,16 +1,87 @@
 """
-Gerenciamento de armazenamento de notícias (Supabase)
+Gerenciamento de armazenamento de notícias (Supabase ou SQLite local)
 """
 import json
 import os
+import uuid
+import socket
 import logging
-from supabase import create_client, Client
-from datetime import datetime
+from typing import TYPE_CHECKING
+from datetime import datetime, timedelta
+from shared.state import SupabaseStateStore
+from shared.metrics import metrics, timed
+
+if TYPE_CHECKING:
+    from supabase import Client
 
 logger = logging.getLogger(__name__)
 
+# Estados de cada notícia no pipeline (coluna news.status)
+STATUS_COLLECTED = "collected"
+STATUS_TRANSLATED = "translated"
+STATUS_PUBLISHED = "published"
+
+
+class BaseNewsStorage:
+    """Interface comum dos backends de notícias (NewsStorage, SQLiteNewsStorage...)
+
+    Scrapers e Pipeline só usam estes métodos; as
+    atualizações são sempre pela url. Veja `create_storage`.
+    """
+
+    def news_exists(self, link):
+        raise NotImplementedError
+
+    def existing_urls(self, urls):
+        raise NotImplementedError
+
+    def add_news(self, title, link, date, content, image_url, video_urls):
+        raise NotImplementedError
+
+    def add_news_batch(self, articles, raise_errors=False):
+        raise NotImplementedError
+
+    def update_translation(self, *, link, translated_title, translated_content, tags):
+        raise NotImplementedError
+
+    def update_translations(self, rows, raise_errors=False):
+        raise NotImplementedError
+
+    def get_news_by_status(self, status, columns="*", limit=100):
+        raise NotImplementedError
+
+    def iter_news_by_status(self, status, columns="*", page_size=100):
+        raise NotImplementedError
+
+    def claim_news(self, status, columns="*", limit=100):
+        raise NotImplementedError
+
+    def release_claims(self, urls):
+        raise NotImplementedError
+
+    def mark_as_published(self, link):
+        raise NotImplementedError
+
+    def mark_as_published_batch(self, urls, raise_errors=False):
+        raise NotImplementedError
 
-class NewsStorage:
+    def get_cursor(self, source):
+        """Retorna o item mais recente já ingerido da fonte ({"guid", "date"})"""
+        return self.state.get(f"cursor:{source}")
+
+    def set_cursor(self, source, cursor):
+        """Avança o cursor da fonte para o item mais recente ingerido"""
+        self.state.set(f"cursor:{source}", cursor)
+
+    def flush(self):
+        """Envia gravações pendentes (só os backends com write-behind têm alguma)"""
+
+    def close(self):
+        """Libera os recursos no desligamento do serviço"""
+        self.flush()
+
+
+class NewsStorage(BaseNewsStorage):
     """Gerencia o armazenamento de notícias no Supabase"""
     
     def __init__(self):
@@ -20,8 +91,16 @@ class NewsStorage:
         if not self.supabase_url or not self.supabase_key:
             raise ValueError("SUPABASE_URL e SUPABASE_KEY devem estar definidas")
 
-        self.client: Client = create_client(self.supabase_url, self.supabase_key)
+        # Import sob demanda: o supabase é pesado e só é necessário aqui
+        from supabase import create_client
+        self.client: "Client" = create_client(self.supabase_url, self.supabase_key)
+        self.state = SupabaseStateStore(self.client)
 
+        # Identifica as reservas (claims) deste processo; veja claim_news
+        self.worker_id = f"{socket.gethostname()}-{uuid.uuid4().hex[:8]}"
+        self.lease_seconds = int(os.getenv("CLAIM_LEASE_SECONDS", "900"))
+
+    @timed("external_call_seconds", service="supabase")
     def news_exists(self, link):
         """Verifica se a notícia já existe no banco de dados"""
         try:
@@ -31,21 +110,31 @@ class NewsStorage:
             logger.error(f"Erro ao verificar existência da notícia: {e}")
             return False
 
+    @timed("external_call_seconds", service="supabase")
+    def existing_urls(self, urls, chunk_size=100):
+        """Retorna o subconjunto de URLs que já existem no banco de dados
+
+        Faz uma única consulta `in` por lote, em vez de uma por notícia.
+        """
+        urls = [url for url in dict.fromkeys(urls) if url]
+        existing = set()
+        for start in range(0, len(urls), chunk_size):
+            chunk = urls[start:start + chunk_size]
+            try:
+                response = self.client.table("news").select("url").in_("url", chunk).execute()
+                existing.update(row["url"] for row in response.data)
+            except Exception as e:
+                logger.error(f"Erro ao verificar existência das notícias: {e}")
+        return existing
+
+    @timed("external_call_seconds", service="supabase")
     def add_news(self, title, link, date, content, image_url, video_urls):
         """Adiciona uma nova notícia ao banco de dados"""
         if self.news_exists(link):
             logger.info(f"Notícia '{title}' já existe. Pulando...")
             return False
 
-        data = {
-            "title": title,
-            "url": link,
-            "date": date,
-            "content": content,
-            "image_url": image_url,
-            "video_urls": video_urls,
-            "published": False
-        }
+        data = self._news_row(title, link, date, content, image_url, video_urls)
 
         try:
             self.client.table("news").insert(data).execute()
@@ -55,30 +144,206 @@ class NewsStorage:
             logger.error(f"Erro ao adicionar notícia: {e}")
             return False
 
-    def update_translation(self, title, translated_title, translated_content, tags):
-        """Atualiza a notícia com tradução e tags"""
+    @timed("external_call_seconds", service="supabase")
+    def add_news_batch(self, articles, chunk_size=50, raise_errors=False):
+        """Adiciona várias notícias em lotes (upsert com on_conflict=url)
+
+        `articles` é uma lista de dicts com as chaves title, url, date, content,
+        image_url e video_urls. Retorna uma lista de booleanos na mesma ordem,
+        indicando quais notícias foram inseridas; duplicadas retornam False.
+        Com `raise_errors`, erros do Supabase são propagados em vez de virarem
+        False. Requer o índice único em news.url (migrations/001_news_url_unique.sql).
+        """
+        rows = []
+        seen = set()
+        for article in articles:
+            if article["url"] in seen:
+                continue
+            seen.add(article["url"])
+            rows.append(self._news_row(
+                article["title"], article["url"], article["date"],
+                article["content"], article["image_url"], article["video_urls"]
+            ))
+
+        inserted = set()
+        for start in range(0, len(rows), chunk_size):
+            chunk = rows[start:start + chunk_size]
+            try:
+                response = self.client.table("news").upsert(
+                    chunk, on_conflict="url", ignore_duplicates=True
+                ).execute()
+                inserted.update(row["url"] for row in response.data)
+            except Exception as e:
+                logger.error(f"Erro ao adicionar lote de notícias: {e}")
+                if raise_errors:
+                    raise
+
+        results = []
+        for article in articles:
+            added = article["url"] in inserted
+            # Uma URL repetida no mesmo lote só conta uma vez
+            inserted.discard(article["url"])
+            results.append(added)
+
+        logger.info(f"Notícias adicionadas em lote: {sum(results)}/{len(articles)}")
+        return results
+
+    def _news_row(self, title, link, date, content, image_url, video_urls):
+        return {
+            "title": title,
+            "url": link,
+            "date": date,
+            "content": content,
+            "image_url": image_url,
+            "video_urls": video_urls,
+            "published": False,
+            "status": STATUS_COLLECTED,
+            # Já nasce reservada por quem coletou: outros workers não a retomam
+            "claimed_by": self.worker_id,
+            "claimed_until": (datetime.utcnow() + timedelta(seconds=self.lease_seconds)).isoformat()
+        }
+
+    @timed("external_call_seconds", service="supabase")
+    def update_translation(self, *, link, translated_title, translated_content, tags):
+        """Atualiza a notícia (pela url, como as demais atualizações) com tradução e tags
+
+        Os argumentos são nomeados: chamadas antigas, que passavam o título
+        na primeira posição, falham em vez de gravar na notícia errada.
+        Para várias notícias, prefira `update_translations`.
+        """
         try:
             response = self.client.table("news").update({
                 "translated_title": translated_title,
                 "translated_content": translated_content,
-                "entities": tags
-            }).eq("title", title).execute()
+                "entities": tags,
+                "status": STATUS_TRANSLATED
+            }).eq("url", link).execute()
 
             if response.data:
-                logger.info(f"Tradução salva para: {title}")
+                logger.info(f"Tradução salva para: {link}")
                 return True
             return False
         except Exception as e:
             logger.error(f"Erro ao atualizar tradução: {e}")
             return False
 
+    @timed("external_call_seconds", service="supabase")
+    def get_news_by_status(self, status, columns="*", limit=100):
+        """Retorna notícias em um estado do pipeline, das mais antigas às mais novas
+
+        Usa o índice (status, id) de migrations/008_news_claim_index.sql.
+        """
+        try:
+            response = self.client.table("news").select(columns).eq(
+                "status", status
+            ).order("id").limit(limit).execute()
+            return response.data
+        except Exception as e:
+            logger.error(f"Erro ao buscar notícias com status '{status}': {e}")
+            return []
+
+    def iter_news_by_status(self, status, columns="*", page_size=100):
+        """Percorre as notícias em um estado, em páginas de `page_size`
+
+        Paginação por chave (id > último id visto), não por offset: cada
+        página usa o índice (status, id) e custa o mesmo, e só uma página
+        fica em memória por vez.
+        """
+        if columns != "*" and "id" not in [column.strip() for column in columns.split(",")]:
+            columns = f"id, {columns}"
+
+        last_id = 0
+        while True:
+            try:
+                with metrics.timer("external_call_seconds", service="supabase", op="iter_news_by_status"):
+                    response = self.client.table("news").select(columns).eq(
+                        "status", status
+                    ).gt("id", last_id).order("id").limit(page_size).execute()
+            except Exception as e:
+                logger.error(f"Erro ao paginar notícias com status '{status}': {e}")
+                return
+
+            rows = response.data
+            yield from rows
+            if len(rows) < page_size:
+                return
+            last_id = rows[-1]["id"]
+
+    @timed("external_call_seconds", service="supabase")
+    def claim_news(self, status, columns="*", limit=100):
+        """Reserva até `limit` notícias livres no estado `status` para este worker
+
+        Função claim_news (migrations/007_news_claims.sql): SELECT ... FOR
+        UPDATE SKIP LOCKED, então workers simultâneos recebem lotes
+        disjuntos. A reserva expira em CLAIM_LEASE_SECONDS; se o worker cair,
+        as linhas voltam a ficar disponíveis. Retorna as linhas em ordem de id.
+        """
+        try:
+            response = self.client.rpc("claim_news", {
+                "p_status": status,
+                "p_worker": self.worker_id,
+                "p_limit": limit,
+                "p_lease_seconds": self.lease_seconds
+            }).select(columns).execute()
+            rows = response.data or []
+            return sorted(rows, key=lambda row: row["id"]) if rows and "id" in rows[0] else rows
+        except Exception as e:
+            logger.error(f"Erro ao reservar notícias com status '{status}': {e}")
+            return []
+
+    @timed("external_call_seconds", service="supabase")
+    def release_claims(self, urls, chunk_size=100):
+        """Libera as reservas deste worker (ex.: notícias que falharam), para nova tentativa"""
+        urls = list(dict.fromkeys(urls))
+        for start in range(0, len(urls), chunk_size):
+            try:
+                self.client.table("news").update({
+                    "claimed_by": None,
+                    "claimed_until": None
+                }).in_("url", urls[start:start + chunk_size]).eq("claimed_by", self.worker_id).execute()
+            except Exception as e:
+                logger.error(f"Erro ao liberar reservas: {e}")
+
+    @timed("external_call_seconds", service="supabase")
+    def update_translations(self, rows, chunk_size=50, raise_errors=False):
+        """Grava traduções em lote, por url (função update_translations)
+
+        `rows` é uma lista de dicts com url, translated_title,
+        translated_content e entities. Retorna quantas linhas foram
+        atualizadas e passa o status para "translated"; com `raise_errors`,
+        erros do Supabase são propagados. Requer migrations/005_news_status.sql.
+        """
+        updated = 0
+        for start in range(0, len(rows), chunk_size):
+            chunk = [
+                {
+                    "url": row["url"],
+                    "translated_title": row["translated_title"],
+                    "translated_content": row["translated_content"],
+                    "entities": row["entities"]
+                }
+                for row in rows[start:start + chunk_size]
+            ]
+            try:
+                response = self.client.rpc("update_translations", {"rows": chunk}).execute()
+                updated += response.data or 0
+            except Exception as e:
+                logger.error(f"Erro ao salvar lote de traduções: {e}")
+                if raise_errors:
+                    raise
+
+        logger.info(f"Traduções salvas em lote: {updated}/{len(rows)}")
+        return updated
+
+    @timed("external_call_seconds", service="supabase")
     def mark_as_published(self, link):
         """Marca a notícia como publicada"""
         try:
             now = datetime.utcnow().isoformat()
             response = self.client.table("news").update({
                 "published": True,
-                "published_at": now
+                "published_at": now,
+                "status": STATUS_PUBLISHED
             }).eq("url", link).execute()
             
             if response.data:
@@ -89,3 +354,56 @@ class NewsStorage:
             logger.error(f"Erro ao marcar como publicada: {e}")
             return False
 
+    @timed("external_call_seconds", service="supabase")
+    def mark_as_published_batch(self, urls, chunk_size=100, raise_errors=False):
+        """Marca várias notícias como publicadas com um UPDATE ... WHERE url IN (...)
+
+        Retorna quantas linhas foram atualizadas; com `raise_errors`, erros do
+        Supabase são propagados.
+        """
+        urls = list(dict.fromkeys(urls))
+        now = datetime.utcnow().isoformat()
+        updated = 0
+        for start in range(0, len(urls), chunk_size):
+            chunk = urls[start:start + chunk_size]
+            try:
+                response = self.client.table("news").update({
+                    "published": True,
+                    "published_at": now,
+                    "status": STATUS_PUBLISHED
+                }).in_("url", chunk).execute()
+                updated += len(response.data or [])
+            except Exception as e:
+                logger.error(f"Erro ao marcar lote como publicado: {e}")
+                if raise_errors:
+                    raise
+
+        logger.info(f"Notícias marcadas como publicadas: {updated}/{len(urls)}")
+        return updated
+
+    @timed("external_call_seconds", service="supabase")
+    def get_cursor(self, source):
+        return super().get_cursor(source)
+
+    @timed("external_call_seconds", service="supabase")
+    def set_cursor(self, source, cursor):
+        super().set_cursor(source, cursor)
+
+
+def create_storage():
+    """Cria o storage configurado em STORAGE_BACKEND
+
+    - supabase: NewsStorage (padrão)
+    - sqlite: SQLiteNewsStorage em STORAGE_PATH, sem nenhum serviço externo
+    - write_behind: SQLite local na frente do Supabase (WriteBehindNewsStorage)
+    """
+    backend = os.getenv("STORAGE_BACKEND", "supabase").lower()
+    if backend == "supabase":
+        return NewsStorage()
+    if backend not in ("sqlite", "write_behind"):
+        raise ValueError(f"STORAGE_BACKEND inválido: {backend}")
+
+    from shared.local_storage import SQLiteNewsStorage, WriteBehindNewsStorage
+    if backend == "sqlite":
+        return SQLiteNewsStorage()
+    return WriteBehindNewsStorage(SQLiteNewsStorage(), NewsStorage())
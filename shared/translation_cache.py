@@ -0,0 +1,233 @@
+"""
+Cache de traduções (SQLite local ou Supabase) chaveado por hash do texto
+"""
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+import logging
+from collections import OrderedDict
+from shared.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CACHE_PATH = os.path.join(project_root, ".cache", "translations.sqlite3")
+
+# Entradas mantidas em memória na frente do backend
+MEMORY_ENTRIES = 1024
+
+# Leituras do SQLite acumuladas antes de gravar os novos accessed_at
+TOUCH_BATCH = 100
+
+# Gravações no Supabase entre duas limpezas das entradas mais antigas
+PRUNE_EVERY = 500
+
+
+def make_key(kind, text, model_name, prompt_version):
+    """Hash do texto normalizado + modelo + versão do prompt"""
+    normalized = re.sub(r"[ \t]+", " ", (text or "").replace("\r\n", "\n").strip())
+    raw = f"{kind}\0{model_name}\0{prompt_version}\0{normalized}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class TranslationCache:
+    """Interface comum: memória LRU + backend persistente + contadores"""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._memory_lock = threading.Lock()
+
+    def get(self, key):
+        with self._memory_lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                value = self._memory[key]
+                metrics.inc("cache_requests_total", cache="translation", result="hit")
+                return value
+
+        value = self._load(key)
+        with self._memory_lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._remember(key, value)
+        metrics.inc("cache_requests_total", cache="translation", result="miss" if value is None else "hit")
+        return value
+
+    def set(self, key, value):
+        with self._memory_lock:
+            self._remember(key, value)
+        self._store(key, value)
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses}
+
+    def close(self):
+        """Grava o que estiver pendente no backend"""
+
+    def _remember(self, key, value):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > MEMORY_ENTRIES:
+            self._memory.popitem(last=False)
+
+    def _load(self, key):
+        raise NotImplementedError
+
+    def _store(self, key, value):
+        raise NotImplementedError
+
+
+class SQLiteTranslationCache(TranslationCache):
+    """Cache em arquivo SQLite com remoção LRU acima de `max_entries`"""
+
+    def __init__(self, path=None, max_entries=None):
+        super().__init__()
+        self.path = path or os.getenv("TRANSLATION_CACHE_PATH", DEFAULT_CACHE_PATH)
+        self.max_entries = max_entries or int(os.getenv("TRANSLATION_CACHE_MAX_ENTRIES", "20000"))
+
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS translations ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS translations_accessed ON translations (accessed_at)")
+        self._conn.commit()
+        # Mantido em memória: só é contado de novo ao abrir o arquivo
+        self._size = self._conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+        # Chaves lidas e quando; o UPDATE de accessed_at vai em lote
+        self._touched = {}
+
+    def stats(self):
+        return dict(super().stats(), size=self._size)
+
+    def close(self):
+        with self._lock:
+            self._flush_touched()
+            self._conn.commit()
+
+    def _load(self, key):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM translations WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._touched[key] = time.time()
+            if len(self._touched) >= TOUCH_BATCH:
+                self._flush_touched()
+                self._conn.commit()
+        return json.loads(row[0])
+
+    def _store(self, key, value):
+        encoded = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            # Antes de remover as menos usadas, as leituras recentes precisam contar
+            self._flush_touched()
+            now = time.time()
+            inserted = self._conn.execute(
+                "INSERT OR IGNORE INTO translations (key, value, accessed_at) VALUES (?, ?, ?)",
+                (key, encoded, now)
+            ).rowcount
+            if inserted:
+                self._size += 1
+            else:
+                self._conn.execute(
+                    "UPDATE translations SET value = ?, accessed_at = ? WHERE key = ?", (encoded, now, key)
+                )
+            if self._size > self.max_entries:
+                # Remove 10% a mais para não limpar a cada inserção
+                excess = self._size - int(self.max_entries * 0.9)
+                self._size -= self._conn.execute(
+                    "DELETE FROM translations WHERE key IN ("
+                    " SELECT key FROM translations ORDER BY accessed_at LIMIT ?)",
+                    (excess,)
+                ).rowcount
+            self._conn.commit()
+
+    def _flush_touched(self):
+        if not self._touched:
+            return
+        touched, self._touched = self._touched, {}
+        self._conn.executemany(
+            "UPDATE translations SET accessed_at = ? WHERE key = ?",
+            [(accessed_at, key) for key, accessed_at in touched.items()]
+        )
+
+
+class SupabaseTranslationCache(TranslationCache):
+    """Cache compartilhado entre instâncias na tabela translation_cache
+
+    A cada `PRUNE_EVERY` gravações, remove as entradas mais antigas (por
+    created_at) acima de `max_entries` com a função prune_translation_cache
+    (migrations/009_translation_cache_prune.sql). Leituras não gravam nada.
+    """
+
+    def __init__(self, client, max_entries=None):
+        super().__init__()
+        self.client = client
+        self.max_entries = max_entries or int(os.getenv("TRANSLATION_CACHE_MAX_ENTRIES", "20000"))
+        self._stores = 0
+        self._stores_lock = threading.Lock()
+
+    def _load(self, key):
+        try:
+            response = self.client.table("translation_cache").select("value").eq("key", key).execute()
+            if response.data:
+                return response.data[0]["value"]
+        except Exception as e:
+            logger.error(f"Erro ao ler cache de tradução: {e}")
+        return None
+
+    def _store(self, key, value):
+        try:
+            self.client.table("translation_cache").upsert(
+                {"key": key, "value": value}, on_conflict="key"
+            ).execute()
+        except Exception as e:
+            logger.error(f"Erro ao salvar cache de tradução: {e}")
+            return
+
+        with self._stores_lock:
+            self._stores += 1
+            due = self._stores % PRUNE_EVERY == 0
+        if due:
+            self.prune()
+
+    def prune(self):
+        """Remove as entradas mais antigas acima de `max_entries`; retorna quantas"""
+        try:
+            response = self.client.rpc(
+                "prune_translation_cache", {"p_max_entries": self.max_entries}
+            ).execute()
+            removed = response.data or 0
+            if removed:
+                logger.info(f"🧹 Cache de tradução: {removed} entradas antigas removidas")
+            return removed
+        except Exception as e:
+            logger.error(f"Erro ao limpar cache de tradução: {e}")
+            return 0
+
+
+def create_translation_cache(storage=None):
+    """Cria o cache configurado em TRANSLATION_CACHE (sqlite, supabase ou off)"""
+    backend = os.getenv("TRANSLATION_CACHE", "sqlite").lower()
+    if backend == "off":
+        return None
+    if backend == "supabase":
+        if getattr(storage, "client", None) is None:
+            raise ValueError("TRANSLATION_CACHE=supabase requer um storage com Supabase")
+        return SupabaseTranslationCache(storage.client)
+    if backend != "sqlite":
+        raise ValueError(f"TRANSLATION_CACHE inválido: {backend}")
+    return SQLiteTranslationCache()
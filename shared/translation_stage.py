@@ -0,0 +1,118 @@
+"""
+Etapa de tradução assíncrona e concorrente, limitada pelas cotas do Gemini
+"""
+import os
+import time
+import random
+import asyncio
+import logging
+from shared.translator import estimate_tokens, is_rate_limit_error
+from shared.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Limitador de requisições e tokens por minuto com ajuste adaptativo
+
+    Cada 429 reduz a taxa pela metade e esvazia o balde; cada sucesso
+    devolve 5% da taxa, até o limite configurado. `clock` e `sleep` podem
+    ser trocados (ex.: relógio falso nos testes).
+    """
+
+    def __init__(self, rpm, tpm, clock=time.monotonic, sleep=asyncio.sleep):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.rate_factor = 1.0
+        self.clock = clock
+        self.sleep = sleep
+        self._requests = float(rpm)
+        self._tokens = float(tpm)
+        self._updated = clock()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, tokens=1, requests=1):
+        """Aguarda até haver cota para `requests` requisições com `tokens` tokens"""
+        tokens = min(tokens, self.tpm)
+        requests = min(requests, self.rpm)
+        while True:
+            async with self._lock:
+                self._refill()
+                if self._requests >= requests and self._tokens >= tokens:
+                    self._requests -= requests
+                    self._tokens -= tokens
+                    return
+
+                wait = max(
+                    (requests - self._requests) / self._rate(self.rpm),
+                    (tokens - self._tokens) / self._rate(self.tpm)
+                )
+            await self.sleep(max(wait, 0.01))
+
+    def penalize(self):
+        """Recebeu 429: reduz a taxa e descarta a cota acumulada"""
+        self.rate_factor = max(0.1, self.rate_factor / 2)
+        self._requests = 0.0
+
+    def reward(self):
+        self.rate_factor = min(1.0, self.rate_factor + 0.05)
+
+    def _rate(self, per_minute):
+        return per_minute * self.rate_factor / 60
+
+    def _refill(self):
+        now = self.clock()
+        elapsed = now - self._updated
+        self._updated = now
+        self._requests = min(self.rpm, self._requests + elapsed * self._rate(self.rpm))
+        self._tokens = min(self.tpm, self._tokens + elapsed * self._rate(self.tpm))
+
+
+class TranslationStage:
+    """Traduz notícias uma a uma respeitando as cotas do Gemini
+
+    O Pipeline reserva as linhas (claim_news), chama `translate_row` em
+    `concurrency` workers e grava os resultados em lotes de `write_batch`.
+    """
+
+    def __init__(self, storage, translator, concurrency=None, rpm=None, tpm=None,
+                 write_batch=None, max_retries=4, limiter=None):
+        self.storage = storage
+        self.translator = translator
+        self.concurrency = concurrency or int(os.getenv("TRANSLATION_CONCURRENCY", "4"))
+        self.limiter = limiter or TokenBucket(
+            rpm or int(os.getenv("GEMINI_RPM", "30")),
+            tpm or int(os.getenv("GEMINI_TPM", "1000000"))
+        )
+        self.write_batch = write_batch or int(os.getenv("TRANSLATION_WRITE_BATCH", "20"))
+        self.max_retries = max_retries
+
+    async def translate_row(self, row):
+        """Traduz uma notícia respeitando o limitador; repete em caso de 429"""
+        content = row.get("content") or ""
+        # Entrada + saída têm tamanho parecido
+        tokens = 2 * (estimate_tokens(row["title"]) + estimate_tokens(content))
+        # Artigos longos são traduzidos em blocos: uma requisição por bloco
+        requests = self.translator.estimate_requests(content)
+
+        for attempt in range(self.max_retries + 1):
+            await self.limiter.acquire(tokens, requests)
+            try:
+                result = await asyncio.to_thread(
+                    self.translator.translate_article, row["title"], content, raise_errors=True
+                )
+            except Exception as e:
+                if not is_rate_limit_error(e) or attempt == self.max_retries:
+                    logger.error(f"Erro ao traduzir '{row['title']}': {e}")
+                    return None
+
+                self.limiter.penalize()
+                metrics.inc("retries_total", service="gemini")
+                delay = min(60, 2 ** attempt) + random.uniform(0, 1)
+                logger.warning(f"Limite do Gemini atingido, nova tentativa em {delay:.1f}s")
+                await self.limiter.sleep(delay)
+                continue
+
+            self.limiter.reward()
+            return result
+        return None
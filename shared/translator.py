@@ -2,39 +2,142 @@
 Tradução de notícias usando Google Gemini AI
 """
 import os
+import re
+import json
 import logging
-import google.generativeai as genai
+from concurrent.futures import ThreadPoolExecutor
+from shared.translation_cache import make_key
+from shared.metrics import metrics
 
 logger = logging.getLogger(__name__)
 
+MODEL_NAME = "gemini-2.0-flash-lite"
+
+# Incrementar ao mudar um prompt invalida as entradas antigas do cache
+PROMPT_VERSIONS = {"text": "1", "tags": "1", "article": "1"}
+
+TEXT_PROMPT = "Analise o {text}, e retorne somente a tradução em portugues sem mais textos e/ou comentários adicionais, pois estamos publicando no wordpress"
+
+# Marcador que separa as instruções dos artigos no prompt em lote
+BATCH_INPUT_MARKER = "ARTIGOS (JSON):"
+
+BATCH_PROMPT = """
+Traduza para português os artigos abaixo e extraia de cada um até 10 palavras-chave
+relevantes (bandas, artistas, festivais, eventos, álbuns e termos de rock e heavy metal).
+O conteúdo será publicado no WordPress: não adicione comentários nem textos extras.
+
+Responda somente com um array JSON, um objeto por artigo, no formato:
+[{{"id": <id>, "title": "<título traduzido>", "content": "<conteúdo traduzido>", "tags": ["tag1", "tag2"]}}]
+
+{marker}
+{articles}
+"""
+
+
+class TranslationError(Exception):
+    """Falha na tradução (ex.: blocos de um texto longo que não foram traduzidos)"""
+
 
 class Translator:
     """Gerencia tradução de notícias com Gemini AI"""
     
-    def __init__(self):
-        self.api_key = os.getenv("GEMINI_API_KEY")
-        if not self.api_key:
-            raise ValueError("GEMINI_API_KEY não foi definida")
+    def __init__(self, model=None, cache=None):
+        if model is None:
+            self.api_key = os.getenv("GEMINI_API_KEY")
+            if not self.api_key:
+                raise ValueError("GEMINI_API_KEY não foi definida")
+
+            # Import sob demanda: o SDK do Gemini é pesado e só é necessário aqui
+            import google.generativeai as genai
+            genai.configure(api_key=self.api_key)
+            model = genai.GenerativeModel(MODEL_NAME)
 
-        genai.configure(api_key=self.api_key)
-        self.model = genai.GenerativeModel("gemini-2.0-flash-lite")
+        self.model = model
+        self.model_name = getattr(model, "model_name", MODEL_NAME)
+        # Cache opcional (shared.translation_cache); None desativa
+        self.cache = cache
+        # Orçamento aproximado de tokens de entrada por requisição em lote
+        self.batch_token_budget = int(os.getenv("TRANSLATION_BATCH_TOKENS", "6000"))
+        # Textos maiores que isso são traduzidos em blocos de parágrafos, em paralelo
+        self.chunk_chars = int(os.getenv("TRANSLATION_CHUNK_CHARS", "4000"))
+        self.chunk_workers = int(os.getenv("TRANSLATION_CHUNK_WORKERS", "4"))
 
-    def translate_text(self, text):
-        """Traduz texto para português"""
+    def translate_text(self, text, raise_errors=False):
+        """Traduz texto para português
+
+        Retorna None se a tradução falhar (nunca o texto original); com
+        `raise_errors`, o erro é propagado, como em `translate_article`.
+        """
         if not text.strip():
             return ""
 
-        prompt = f"Analise o {text}, e retorne somente a tradução em portugues sem mais textos e/ou comentários adicionais, pois estamos publicando no wordpress"
-        
         try:
-            response = self.model.generate_content(prompt)
-            return response.text.strip()
+            if len(text) > self.chunk_chars:
+                return self.translate_chunked(text)
+            return self._translate_plain(text)
         except Exception as e:
+            if raise_errors:
+                raise
             logger.error(f"Erro na tradução: {e}")
-            return text
+            return None
+
+    def translate_chunked(self, text):
+        """Traduz um texto longo em blocos de parágrafos, em paralelo
+
+        Os blocos são remontados na ordem original. Cada bloco traduzido vai
+        para o cache, então uma nova tentativa só refaz os que falharam; se
+        algum falhar, levanta o erro (429 tem prioridade) ou TranslationError.
+        """
+        return self._translate_chunks(split_paragraphs(text, self.chunk_chars))
+
+    def _translate_chunks(self, chunks):
+        if not chunks:
+            return ""
+        workers = max(1, min(self.chunk_workers, len(chunks)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            outcomes = list(executor.map(self._translate_chunk, chunks))
+
+        errors = [outcome for outcome in outcomes if isinstance(outcome, Exception)]
+        if errors:
+            logger.warning(f"Tradução parcial: {len(errors)}/{len(chunks)} blocos falharam")
+            for error in errors:
+                if is_rate_limit_error(error):
+                    raise error
+            raise TranslationError(f"{len(errors)}/{len(chunks)} blocos não foram traduzidos") from errors[0]
+
+        return "\n\n".join(outcomes)
+
+    def estimate_requests(self, content):
+        """Quantas chamadas ao modelo `translate_article` fará para este conteúdo"""
+        if len(content or "") <= self.chunk_chars:
+            return 1
+        # O primeiro bloco vai junto com o título; os demais, um por requisição
+        return max(1, len(split_paragraphs(content, self.chunk_chars)))
+
+    def _translate_chunk(self, chunk):
+        try:
+            return self._translate_plain(chunk)
+        except Exception as e:
+            return e
+
+    def _translate_plain(self, text):
+        cached = self._cache_get("text", text)
+        if cached is not None:
+            return cached
+
+        response = self._generate(TEXT_PROMPT.format(text=text), "text")
+        translated = response.text.strip()
+        if not translated:
+            raise TranslationError("Resposta vazia do modelo")
+        self._cache_set("text", text, translated)
+        return translated
 
     def extract_tags(self, text):
         """Extrai tags relevantes do texto"""
+        cached = self._cache_get("tags", text)
+        if cached is not None:
+            return cached
+
         prompt = f"""
         Analise o seguinte texto e extraia palavras-chave relevantes como bandas, artistas, festivais, 
         eventos, álbuns e termos relacionados ao rock e heavy metal. 
@@ -45,10 +148,219 @@ class Translator:
         """
 
         try:
-            response = self.model.generate_content(prompt)
+            response = self._generate(prompt, "tags")
             tags = response.text.strip().split(", ")
-            return [tag.strip() for tag in tags if tag]
+            tags = [tag.strip() for tag in tags if tag]
+            self._cache_set("tags", text, tags)
+            return tags
         except Exception as e:
             logger.error(f"Erro ao extrair tags: {e}")
             return []
 
+    def translate_article(self, title, content, raise_errors=False):
+        """Traduz título e conteúdo e extrai tags em uma única requisição
+
+        Retorna {"title", "content", "tags"} ou None se a tradução falhar.
+        """
+        return self.translate_articles([{"title": title, "content": content}], raise_errors=raise_errors)[0]
+
+    def translate_articles(self, articles, token_budget=None, raise_errors=False):
+        """Traduz vários artigos, agrupando os curtos na mesma requisição
+
+        `articles` é uma lista de dicts com title e content. Retorna uma
+        lista na mesma ordem com {"title", "content", "tags"}, ou None para
+        os artigos cuja tradução falhou. Com `raise_errors`, erros da API
+        (ex.: 429) são propagados para quem controla as novas tentativas.
+        """
+        results = [None] * len(articles)
+        pending = []
+        for index, article in enumerate(articles):
+            results[index] = self._cache_get("article", self._article_text(article))
+            if results[index] is not None:
+                continue
+
+            # Artigos longos não cabem em um prompt: tradução em blocos
+            if len(article["content"] or "") > self.chunk_chars:
+                results[index] = self._translate_long(article, raise_errors)
+                if results[index] is not None:
+                    self._cache_set("article", self._article_text(article), results[index])
+            else:
+                pending.append(index)
+
+        for batch in self._pack([articles[i] for i in pending], token_budget or self.batch_token_budget):
+            batch = [pending[i] for i in batch]
+            translated = self._translate_batch([articles[i] for i in batch], raise_errors)
+
+            # Se um lote com vários artigos falhar, tenta cada um isoladamente
+            if translated is None and len(batch) > 1:
+                translated = [self._translate_one(articles[i], raise_errors) for i in batch]
+            elif translated is None:
+                translated = [None]
+
+            for index, result in zip(batch, translated):
+                results[index] = result
+                if result is not None:
+                    self._cache_set("article", self._article_text(articles[index]), result)
+        return results
+
+    def _generate(self, prompt, op):
+        """Chamada ao modelo, medida em external_call_seconds"""
+        with metrics.timer("external_call_seconds", service="gemini", op=op):
+            return self.model.generate_content(prompt)
+
+    def cache_stats(self):
+        """Contadores de acerto/erro do cache de tradução"""
+        return self.cache.stats() if self.cache else {}
+
+    def _article_text(self, article):
+        return f"{article['title']}\n\n{article['content']}"
+
+    def _cache_get(self, kind, text):
+        if not self.cache:
+            return None
+        return self.cache.get(make_key(kind, text, self.model_name, PROMPT_VERSIONS[kind]))
+
+    def _cache_set(self, kind, text, value):
+        if self.cache:
+            self.cache.set(make_key(kind, text, self.model_name, PROMPT_VERSIONS[kind]), value)
+
+    def _pack(self, articles, token_budget):
+        """Agrupa índices de artigos consecutivos dentro do orçamento de tokens"""
+        batch, used = [], 0
+        for index, article in enumerate(articles):
+            tokens = estimate_tokens(article["title"]) + estimate_tokens(article["content"])
+            if batch and used + tokens > token_budget:
+                yield batch
+                batch, used = [], 0
+            batch.append(index)
+            used += tokens
+        if batch:
+            yield batch
+
+    def _translate_long(self, article, raise_errors=False):
+        """Título e tags vêm de uma requisição com o primeiro bloco; o resto em blocos"""
+        chunks = split_paragraphs(article["content"], self.chunk_chars)
+        if not chunks:
+            return self._translate_one({"title": article["title"], "content": ""}, raise_errors)
+        head = self._translate_one({"title": article["title"], "content": chunks[0]}, raise_errors)
+        if head is None:
+            return None
+
+        # O primeiro bloco já veio traduzido com o título; só os demais são
+        # traduzidos (e guardados no cache) com o prompt de texto
+        try:
+            rest = self._translate_chunks(chunks[1:])
+        except Exception as e:
+            if raise_errors:
+                raise
+            logger.error(f"Erro ao traduzir artigo longo '{article['title']}': {e}")
+            return None
+
+        content = "\n\n".join(part for part in (head["content"], rest) if part)
+        return {"title": head["title"], "content": content, "tags": head["tags"]}
+
+    def _translate_one(self, article, raise_errors=False):
+        translated = self._translate_batch([article], raise_errors)
+        return translated[0] if translated else None
+
+    def _translate_batch(self, articles, raise_errors=False):
+        """Envia um lote em uma requisição; retorna a lista de resultados ou None"""
+        payload = [
+            {"id": i, "title": article["title"], "content": article["content"]}
+            for i, article in enumerate(articles)
+        ]
+        prompt = BATCH_PROMPT.format(
+            marker=BATCH_INPUT_MARKER,
+            articles=json.dumps(payload, ensure_ascii=False)
+        )
+
+        try:
+            response = self._generate(prompt, "batch")
+        except Exception as e:
+            if raise_errors:
+                raise
+            logger.error(f"Erro na tradução em lote ({len(articles)} artigos): {e}")
+            return None
+
+        try:
+            data = parse_json_response(response.text)
+            by_id = {int(item["id"]): item for item in data}
+        except Exception as e:
+            logger.error(f"Erro na tradução em lote ({len(articles)} artigos): {e}")
+            return None
+
+        results = []
+        for i in range(len(articles)):
+            item = by_id.get(i)
+            if not item or not str(item.get("title", "")).strip():
+                logger.error(f"Tradução em lote sem resultado para o artigo {i}")
+                results.append(None)
+                continue
+            results.append({
+                "title": str(item["title"]).strip(),
+                "content": str(item.get("content", "")).strip(),
+                "tags": [str(tag).strip() for tag in item.get("tags", []) if str(tag).strip()][:10]
+            })
+        return results
+
+
+def is_rate_limit_error(error):
+    """Identifica erros de cota/limite de taxa (HTTP 429) da API do Gemini"""
+    return type(error).__name__ in ("ResourceExhausted", "TooManyRequests") or "429" in str(error)
+
+
+def split_paragraphs(text, max_chars):
+    """Divide o texto em blocos de parágrafos com até `max_chars` caracteres
+
+    Parágrafos são separados por linha em branco (veja
+    `shared.parsers.block_text`); quebras de linha simples ficam dentro do
+    parágrafo. Parágrafos maiores que o limite são quebrados por frases, e
+    frases maiores só em espaços, nunca no meio de uma palavra.
+    """
+    chunks, current = [], ""
+    for paragraph in re.split(r"\n\s*\n", text or ""):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        pieces = [paragraph] if len(paragraph) <= max_chars else _split_sentences(paragraph, max_chars)
+        for index, piece in enumerate(pieces):
+            # Pedaços do mesmo parágrafo continuam na mesma linha
+            separator = " " if index else "\n\n"
+            if current and len(current) + len(separator) + len(piece) > max_chars:
+                chunks.append(current)
+                current = piece
+            else:
+                current = f"{current}{separator}{piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _split_sentences(paragraph, max_chars):
+    """Quebra um parágrafo longo em frases, e frases longas no último espaço antes do limite"""
+    pieces = []
+    for sentence in re.split(r"(?<=[.!?])\s+", paragraph):
+        while len(sentence) > max_chars:
+            cut = max(sentence.rfind(space, 0, max_chars + 1) for space in " \n\t")
+            if cut <= 0:
+                # Uma única "palavra" maior que o bloco (ex.: URL): não há onde quebrar
+                cut = max_chars
+            pieces.append(sentence[:cut].rstrip())
+            sentence = sentence[cut:].lstrip()
+        if sentence:
+            pieces.append(sentence)
+    return pieces
+
+
+def estimate_tokens(text):
+    """Estimativa simples de tokens (~4 caracteres por token)"""
+    return len(text or "") // 4 + 1
+
+
+def parse_json_response(text):
+    """Lê o JSON da resposta do modelo, ignorando cercas de código markdown"""
+    text = text.strip()
+    fenced = re.match(r"^```(?:json)?\s*(.*?)\s*```$", text, re.DOTALL)
+    if fenced:
+        text = fenced.group(1)
+    return json.loads(text)
@@ -1,19 +1,34 @@
 """
 Publicação de notícias no WordPress
 """
-import requests
 import os
 import base64
+import hashlib
+import html
+import time
+import threading
 import logging
-from requests.auth import HTTPBasicAuth
+from concurrent.futures import ThreadPoolExecutor
+from shared.http_client import get_session
+from shared.metrics import metrics
+from shared.media import MediaUploader
 
 logger = logging.getLogger(__name__)
 
+# Espera antes de listar as tags de novo depois de uma listagem incompleta
+TAGS_RETRY_SECONDS = 60
+
 
 class WordPressPublisher:
     """Gerencia publicação de notícias no WordPress"""
     
-    def __init__(self):
+    def __init__(self, session=None, state_store=None, published_store=None):
+        self.session = session or get_session()
+        # Se informado, o cache de tags é persistido entre execuções
+        self.state_store = state_store
+        # Registro dos posts publicados, uma entrada por post; precisa sobreviver
+        # ao fim da instância (ex.: storage.state, no Supabase)
+        self.published_store = published_store or state_store
         self.url = os.getenv("WORDPRESS_URL", "").rstrip("/")
         self.user = os.getenv("WORDPRESS_USER")
         self.password = os.getenv("WORDPRESS_APP_PASSWORD") or os.getenv("WORDPRESS_PASSWORD")
@@ -34,10 +49,35 @@ class WordPressPublisher:
             "Content-Type": "application/json"
         }
 
+        # Posts publicados ao mesmo tempo por `publish_batch`
+        self.publish_workers = int(os.getenv("WORDPRESS_PUBLISH_WORKERS", "4"))
+
+        # Imagens destacadas: upload em streaming com cache URL/hash -> id de mídia
+        self.media = MediaUploader(
+            self.session,
+            self.media_endpoint,
+            self.headers["Authorization"],
+            state_store=state_store
+        )
+
+        # Cache nome da tag (minúsculo) -> id, carregado na primeira utilização e
+        # recarregado do WordPress quando a cópia persistida passa do TTL
+        self.tags_ttl = int(os.getenv("WORDPRESS_TAGS_TTL", "86400"))
+        self._tags = None
+        self._tags_loaded_at = None
+        self._tags_retry_at = 0
+        self._tags_lock = threading.Lock()
+        self._tags_load_lock = threading.Lock()
+
+        # Chaves já confirmadas neste processo e títulos dos posts recentes
+        self._published = set()
+        self._recent_titles = None
+        self._published_lock = threading.Lock()
+
     def get_published_titles(self):
         """Obtém títulos dos posts já publicados"""
         try:
-            response = requests.get(
+            response = self.session.get(
                 f"{self.posts_endpoint}?per_page=100",
                 headers=self.headers,
                 timeout=10
@@ -48,66 +88,307 @@ class WordPressPublisher:
             logger.error(f"Erro ao buscar posts: {e}")
         return set()
 
+    def load_recent_titles(self):
+        """Carrega as chaves dos títulos dos últimos 100 posts (uma vez por processo)
+
+        Cobrem os posts sem URL de origem publicados antes do registro existir.
+        """
+        keys = {self.dedupe_key(title=html.unescape(t)) for t in self.get_published_titles()}
+        with self._published_lock:
+            self._recent_titles = keys
+        logger.info(f"Títulos dos posts recentes carregados: {len(keys)}")
+        return keys
+
+    def is_published(self, title, source_url=None):
+        """Verifica se o post já foi publicado, pela URL de origem quando houver
+
+        Com URL, é uma leitura da entrada dessa URL no registro, e o título
+        não é comparado: notícias diferentes podem ter o mesmo título
+        traduzido. Sem URL, compara o título no registro e nos últimos 100 posts.
+        """
+        key = self.dedupe_key(title=title, source_url=source_url)
+        if self.published_keys([key]):
+            return True
+        if source_url:
+            return False
+
+        if self._recent_titles is None:
+            self.load_recent_titles()
+        return key in self._recent_titles
+
+    def published_keys(self, keys):
+        """Retorna, das chaves de dedupe informadas, as que já estão no registro
+
+        As que não foram confirmadas neste processo são lidas do registro
+        com uma única consulta (get_many), qualquer que seja o tamanho do lote.
+        """
+        keys = set(keys)
+        with self._published_lock:
+            found = keys & self._published
+        missing = keys - found
+        if missing and self.published_store:
+            state_keys = {self._published_state_key(key): key for key in missing}
+            stored = self.published_store.get_many(list(state_keys))
+            loaded = {state_keys[state_key] for state_key, value in stored.items() if value}
+            with self._published_lock:
+                self._published.update(loaded)
+            found |= loaded
+        return found
+
+    def dedupe_key(self, title=None, source_url=None):
+        """Chave de dedupe: hash da URL de origem ou do título normalizado"""
+        if source_url:
+            value = f"url:{source_url.strip()}"
+        else:
+            value = "title:" + " ".join((title or "").lower().split())
+        return hashlib.sha1(value.encode("utf-8")).hexdigest()[:16]
+
+    def _remember_published(self, title, source_url, post_id=None):
+        """Grava só a entrada deste post: o custo não cresce com o número de posts"""
+        key = self.dedupe_key(title=title, source_url=source_url)
+        with self._published_lock:
+            self._published.add(key)
+        if self.published_store:
+            self.published_store.set(
+                self._published_state_key(key), {"post_id": post_id, "source_url": source_url}
+            )
+
+    def _published_state_key(self, key):
+        return f"wordpress:published:{self.url}:{key}"
+
     def upload_image(self, image_url):
-        """Faz upload de imagem para o WordPress"""
+        """Faz upload de imagem para o WordPress (ou reaproveita a já enviada)"""
+        return self.media.upload(image_url)
+
+    def prefetch_images(self, image_urls):
+        """Adianta, em segundo plano, o upload das imagens destacadas"""
+        self.media.prefetch(image_urls)
+
+    def close(self):
+        """Aguarda os uploads em segundo plano e libera as threads"""
+        self.media.close()
+
+    def warm_tag_cache(self):
+        """Carrega todas as tags do WordPress no cache (paginando /tags)
+
+        Só uma listagem completa vira o cache (com loaded_at) e é gravada:
+        se uma página falhar, o cache anterior continua valendo e a carga é
+        refeita na próxima chamada.
+        """
+        tags = {}
+        page = 1
+        complete = False
         try:
-            img_response = requests.get(image_url, timeout=10)
-            img_response.raise_for_status()
-            
-            files = {
-                'file': ('image.jpg', img_response.content, 'image/jpeg')
-            }
-            
-            response = requests.post(
-                self.media_endpoint,
-                headers={"Authorization": self.headers["Authorization"]},
-                files=files,
-                timeout=30
-            )
-            
-            if response.status_code == 201:
-                return response.json().get("id")
+            while True:
+                response = self.session.get(
+                    self.tags_endpoint,
+                    params={"per_page": 100, "page": page, "_fields": "id,name"},
+                    headers=self.headers,
+                    timeout=10
+                )
+                if response.status_code != 200:
+                    logger.error(f"Erro ao listar tags: {response.status_code}")
+                    break
+
+                for tag in response.json():
+                    tags[html.unescape(tag["name"]).lower()] = tag["id"]
+
+                if page >= int(response.headers.get("X-WP-TotalPages", "1")):
+                    complete = True
+                    break
+                page += 1
         except Exception as e:
-            logger.error(f"Erro ao fazer upload da imagem: {e}")
-        return None
+            logger.error(f"Erro ao carregar tags: {e}")
+
+        with self._tags_lock:
+            if not complete:
+                # O cache anterior (e o loaded_at dele) continua; as páginas lidas
+                # entram nele, e a listagem é refeita depois de TAGS_RETRY_SECONDS
+                self._tags = dict(self._tags or {}, **tags)
+                self._tags_retry_at = time.time() + TAGS_RETRY_SECONDS
+                return self._tags
+            self._tags = tags
+            self._tags_loaded_at = time.time()
+            self._save_tags()
+        logger.info(f"Cache de tags carregado: {len(tags)} tags")
+        return tags
+
+    def _ensure_tags(self):
+        """Carrega o cache de tags uma única vez, mesmo com publicações em paralelo"""
+        if self._tags_usable():
+            return
+        with self._tags_load_lock:
+            if self._tags_usable():
+                return
+
+            cached = self.state_store.get(self._tags_state_key()) if self.state_store else None
+            # Formato antigo (só o mapa, sem loaded_at) é ignorado; uma cópia mais
+            # nova que a nossa (ex.: de outra instância) é adotada
+            if cached and "loaded_at" in cached and (
+                    self._tags_loaded_at is None or cached["loaded_at"] > self._tags_loaded_at):
+                with self._tags_lock:
+                    self._tags = dict(cached["tags"])
+                    self._tags_loaded_at = cached["loaded_at"]
+            if not self._tags_usable():
+                self.warm_tag_cache()
+
+    def _tags_usable(self):
+        """Cache dentro do TTL, ou recarga que falhou há menos de TAGS_RETRY_SECONDS"""
+        if self._tags is None:
+            return False
+        now = time.time()
+        if self._tags_loaded_at is not None and now - self._tags_loaded_at < self.tags_ttl:
+            return True
+        return now < self._tags_retry_at
+
+    def resolve_tags(self, names):
+        """Converte nomes de tags em IDs, criando apenas as que não existem
+
+        A comparação ignora maiúsculas/minúsculas e nomes repetidos. As tags
+        novas são criadas fora do lock, para não serializar as publicações
+        em paralelo, e depois entram no cache.
+        """
+        self._ensure_tags()
+
+        wanted = {}
+        for name in names:
+            name = name.strip()
+            if name:
+                wanted.setdefault(name.lower(), name)
+
+        with self._tags_lock:
+            found = {key: self._tags.get(key) for key in wanted}
+        for tag_id in found.values():
+            metrics.inc("cache_requests_total", cache="tags", result="miss" if tag_id is None else "hit")
+
+        # Duas threads podem criar a mesma tag: o WordPress responde term_exists com o id
+        created = {}
+        for key, tag_id in found.items():
+            if tag_id is None:
+                tag_id = self._create_tag(wanted[key])
+                if tag_id:
+                    created[key] = tag_id
+        if created:
+            with self._tags_lock:
+                self._tags.update(created)
+                self._save_tags()
+            found.update(created)
+
+        tag_ids = []
+        for tag_id in found.values():
+            if tag_id and tag_id not in tag_ids:
+                tag_ids.append(tag_id)
+        return tag_ids
 
     def create_or_get_tag(self, tag_name):
         """Cria ou obtém uma tag"""
+        tag_ids = self.resolve_tags([tag_name])
+        return tag_ids[0] if tag_ids else None
+
+    def _create_tag(self, tag_name):
         try:
-            # Busca tag existente
-            response = requests.get(
-                f"{self.tags_endpoint}?search={tag_name}",
-                headers=self.headers,
-                timeout=10
-            )
-            
-            if response.status_code == 200:
-                tags = response.json()
-                for tag in tags:
-                    if tag["name"].lower() == tag_name.lower():
-                        return tag["id"]
-            
-            # Cria nova tag
-            response = requests.post(
+            response = self.session.post(
                 self.tags_endpoint,
                 json={"name": tag_name},
                 headers=self.headers,
                 timeout=10
             )
-            
+
             if response.status_code == 201:
                 return response.json().get("id")
+
+            # A tag já existe (criada fora do cache): o WordPress informa o id
+            data = response.json()
+            if data.get("code") == "term_exists":
+                return data.get("data", {}).get("term_id")
+
+            logger.error(f"Erro ao criar tag '{tag_name}': {response.status_code}")
         except Exception as e:
             logger.error(f"Erro ao criar/buscar tag: {e}")
         return None
 
-    def publish_post(self, title, content, image_url=None, tags=None):
-        """Publica um post no WordPress"""
-        published_titles = self.get_published_titles()
-        
-        if title in published_titles:
+    def _tags_state_key(self):
+        return f"wordpress:tags:{self.url}"
+
+    def _save_tags(self):
+        if self.state_store:
+            self.state_store.set(self._tags_state_key(), {"loaded_at": self._tags_loaded_at, "tags": self._tags})
+
+    def publish_batch(self, rows, max_workers=None):
+        """Publica várias notícias traduzidas, com até `max_workers` posts em paralelo
+
+        As tags e as imagens do lote inteiro são resolvidas antes (uma
+        passada no cache de tags e uploads em paralelo), então cada post é
+        só um POST. `rows` tem translated_title, translated_content,
+        entities, image_url e url. Retorna as URLs separadas em
+        "published", "existing" (já estavam no WordPress) e "failed".
+        """
+        result = {"published": [], "existing": [], "failed": []}
+        keyed = [(self.dedupe_key(title=row["translated_title"], source_url=row["url"]), row) for row in rows]
+        # Uma consulta ao registro para o lote todo; o que não está lá vale só para este lote
+        published = self.published_keys(key for key, row in keyed if row["url"])
+
+        pending = []
+        keys = set()
+        for key, row in keyed:
+            # Repetidas dentro do lote também contam como existentes: só uma é enviada
+            if key in keys or key in published or (
+                    not row["url"] and self.is_published(row["translated_title"])):
+                result["existing"].append(row["url"])
+            else:
+                keys.add(key)
+                pending.append(row)
+        if not pending:
+            return result
+
+        # Cria de uma vez as tags que faltam; depois cada post só consulta o cache
+        self.resolve_tags([tag for row in pending for tag in (row.get("entities") or [])])
+
+        image_urls = list(dict.fromkeys(row["image_url"] for row in pending if row.get("image_url")))
+        self.media.prefetch(image_urls)
+        media = {image_url: self.media.upload(image_url) for image_url in image_urls}
+
+        def publish(row):
+            return self._publish_post(
+                row["translated_title"],
+                row["translated_content"],
+                tags=row.get("entities") or [],
+                source_url=row["url"],
+                featured_media=media.get(row.get("image_url")),
+                checked=True
+            )
+
+        workers = min(max_workers or self.publish_workers, len(pending))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for row, outcome in zip(pending, executor.map(publish, pending)):
+                result[outcome].append(row["url"])
+
+        logger.info(
+            f"Lote publicado: {len(result['published'])} novos, "
+            f"{len(result['existing'])} já existentes, {len(result['failed'])} com erro"
+        )
+        return result
+
+    def publish_post(self, title, content, image_url=None, tags=None, source_url=None,
+                     featured_media=None):
+        """Publica um post no WordPress
+
+        `featured_media` é o id de uma mídia já enviada; sem ele, a imagem
+        de `image_url` é enviada (ou reaproveitada do cache de mídia).
+        Retorna False se o post já existia ou se a publicação falhou.
+        """
+        outcome = self._publish_post(title, content, image_url, tags, source_url, featured_media)
+        return outcome == "published"
+
+    def _publish_post(self, title, content, image_url=None, tags=None, source_url=None,
+                      featured_media=None, checked=False):
+        """Publica o post; retorna "published", "existing" ou "failed"
+
+        Com `checked`, o registro já foi consultado (ex.: por `publish_batch`).
+        """
+        if not checked and self.is_published(title, source_url):
             logger.info(f"Post já existe: {title}")
-            return False
+            return "existing"
 
         post_data = {
             "title": title,
@@ -116,23 +397,19 @@ class WordPressPublisher:
         }
 
         # Adiciona imagem destacada
-        if image_url:
-            image_id = self.upload_image(image_url)
-            if image_id:
-                post_data["featured_media"] = image_id
+        if featured_media is None and image_url:
+            featured_media = self.upload_image(image_url)
+        if featured_media:
+            post_data["featured_media"] = featured_media
 
         # Adiciona tags
         if tags:
-            tag_ids = []
-            for tag in tags:
-                tag_id = self.create_or_get_tag(tag)
-                if tag_id:
-                    tag_ids.append(tag_id)
+            tag_ids = self.resolve_tags(tags)
             if tag_ids:
                 post_data["tags"] = tag_ids
 
         try:
-            response = requests.post(
+            response = self.session.post(
                 self.posts_endpoint,
                 json=post_data,
                 headers=self.headers,
@@ -141,11 +418,12 @@ class WordPressPublisher:
             
             if response.status_code == 201:
                 logger.info(f"Post publicado: {title}")
-                return True
+                self._remember_published(title, source_url, response.json().get("id"))
+                return "published"
             else:
                 logger.error(f"Erro ao publicar: {response.status_code} - {response.text}")
-                return False
+                return "failed"
         except Exception as e:
             logger.error(f"Erro ao publicar post: {e}")
-            return False
+            return "failed"
 
@@ -0,0 +1,207 @@
+"""
+Testes da coleta pelo feed (cursor, cache do feed e extração) com sessão e storage falsos
+"""
+import sys
+import os
+import io
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import requests
+import urllib3
+from shared.base_scraper import BaseScraper
+
+FEED_URL = "https://example.com/feed/"
+
+
+def feed(*numbers):
+    items = "".join(
+        f"<item><title>News {n}</title><link>https://example.com/news/{n}</link>"
+        f"<guid>guid-{n}</guid><pubDate>Mon, 20 May 2024 1{n}:00:00 +0000</pubDate></item>"
+        for n in numbers
+    )
+    return f'<?xml version="1.0"?><rss version="2.0"><channel>{items}</channel></rss>'.encode()
+
+
+class FakeResponse:
+    def __init__(self, body=b"", status_code=200, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.content = body
+        self.raw = io.BytesIO(body)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code}")
+
+    def close(self):
+        pass
+
+
+class TruncatedBody(io.BytesIO):
+    """Corpo que cai no meio, como uma conexão cortada pelo servidor"""
+
+    def read(self, *args):
+        data = super().read(*args)
+        if not data or self.tell() >= len(self.getvalue()):
+            raise urllib3.exceptions.ProtocolError("Connection broken: IncompleteRead")
+        return data
+
+
+class FakeSession:
+    """Serve o feed e as páginas; URLs em `broken` respondem 500"""
+
+    def __init__(self, feed_body, broken=()):
+        self.feed_body = feed_body
+        self.broken = set(broken)
+        self.requests = []
+
+    def get(self, url, headers=None, **kwargs):
+        self.requests.append((url, dict(headers or {})))
+        if url == FEED_URL:
+            if (headers or {}).get("If-None-Match") == '"v1"':
+                return FakeResponse(status_code=304)
+            return FakeResponse(self.feed_body, headers={"ETag": '"v1"'})
+        if url in self.broken:
+            return FakeResponse(status_code=500)
+        return FakeResponse(b"<html><body><article><p>Texto</p></article></body></html>")
+
+
+class FakeStorage:
+    """Grava as notícias em memória; URLs em `rejected` falham na gravação"""
+
+    def __init__(self, rejected=()):
+        self.rows = {}
+        self.cursors = {}
+        self.rejected = set(rejected)
+
+    def get_cursor(self, source):
+        return self.cursors.get(source)
+
+    def set_cursor(self, source, cursor):
+        self.cursors[source] = cursor
+
+    def existing_urls(self, urls):
+        return {url for url in urls if url in self.rows}
+
+    def add_news_batch(self, articles):
+        added = []
+        for article in articles:
+            ok = article["url"] not in self.rows and article["url"] not in self.rejected
+            if ok:
+                self.rows[article["url"]] = article
+            added.append(ok)
+        return added
+
+
+class MemoryStateStore:
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    def set(self, key, value):
+        self.data[key] = value
+
+
+def make_scraper(session, storage, state_store=None):
+    return BaseScraper(FEED_URL, storage, session=session, state_store=state_store or MemoryStateStore(),
+                       max_workers=1, parser="lxml")
+
+
+def collect(scraper):
+    return [article["url"] for batch in scraper.iter_feed_batches(limit=10) for article in batch]
+
+
+def test_cursor_advances_when_every_item_is_stored():
+    storage = FakeStorage()
+    scraper = make_scraper(FakeSession(feed(3, 2, 1)), storage)
+
+    assert collect(scraper) == [f"https://example.com/news/{n}" for n in (3, 2, 1)]
+    assert storage.cursors[FEED_URL]["guid"] == "guid-3"
+
+
+def test_cursor_stays_when_a_page_fails_to_download():
+    storage = FakeStorage()
+    session = FakeSession(feed(3, 2, 1), broken={"https://example.com/news/2"})
+    scraper = make_scraper(session, storage)
+
+    # A página com erro HTTP não vira uma notícia vazia
+    assert collect(scraper) == ["https://example.com/news/3", "https://example.com/news/1"]
+    assert "https://example.com/news/2" not in storage.rows
+    assert FEED_URL not in storage.cursors
+
+    # Na próxima execução, só a notícia que faltou é buscada
+    session.broken.clear()
+    assert collect(make_scraper(session, storage)) == ["https://example.com/news/2"]
+    assert storage.cursors[FEED_URL]["guid"] == "guid-3"
+
+
+def test_feed_validators_are_saved_only_when_nothing_failed():
+    storage = FakeStorage()
+    state_store = MemoryStateStore()
+    session = FakeSession(feed(2, 1), broken={"https://example.com/news/1"})
+
+    # Com falha, o feed é baixado por inteiro de novo, sem If-None-Match
+    collect(make_scraper(session, storage, state_store))
+    assert f"feed:{FEED_URL}" not in state_store.data
+    session.broken.clear()
+    assert collect(make_scraper(session, storage, state_store)) == ["https://example.com/news/1"]
+    assert state_store.data[f"feed:{FEED_URL}"]["etag"] == '"v1"'
+
+    # Feed inalterado: 304 e nenhuma página é buscada
+    session.requests.clear()
+    assert collect(make_scraper(session, storage, state_store)) == []
+    assert [url for url, _ in session.requests] == [FEED_URL]
+    assert session.requests[0][1]["If-None-Match"] == '"v1"'
+
+
+def test_cursor_stays_when_an_article_is_not_stored():
+    storage = FakeStorage(rejected={"https://example.com/news/1"})
+    scraper = make_scraper(FakeSession(feed(2, 1)), storage)
+
+    assert collect(scraper) == ["https://example.com/news/2"]
+    assert FEED_URL not in storage.cursors
+
+
+def test_both_parsers_keep_inline_tags_inside_the_paragraph():
+    page = (b"<html><body><article><p>METALLICA has <a href='#'>announced</a> a new tour.</p>"
+            b"<p>Tickets go on sale <b>Friday</b>.</p></article></body></html>")
+    for parser in ("soup", "lxml"):
+        scraper = BaseScraper(FEED_URL, FakeStorage(), session=FakeSession(b""),
+                              state_store=MemoryStateStore(), parser=parser)
+        content, _, _ = scraper.extract_details(page)
+        assert content == "METALLICA has announced a new tour.\n\nTickets go on sale Friday."
+
+
+def test_connection_drop_while_streaming_the_feed_keeps_the_cursor():
+    storage = FakeStorage()
+    state_store = MemoryStateStore()
+    session = FakeSession(feed(3, 2, 1))
+    original_get = session.get
+
+    def truncated_get(url, headers=None, **kwargs):
+        response = original_get(url, headers=headers, **kwargs)
+        if url == FEED_URL:
+            response.raw = TruncatedBody(response.content[:len(response.content) // 2])
+        return response
+    session.get = truncated_get
+
+    # Não derruba a coleta: nenhum lote, e nada de cursor nem validadores gravados
+    assert collect(make_scraper(session, storage, state_store)) == []
+    assert FEED_URL not in storage.cursors
+    assert f"feed:{FEED_URL}" not in state_store.data
+
+
+def test_both_parsers_split_blocks_the_same_way():
+    page = (b"<html><body><div class='entry-content'><h2>Tour</h2><!-- ad --><script>var x = 1;</script>"
+            b"<p>Line one<br>line two</p><ul><li>First</li><li>Second <em>date</em></li></ul>"
+            b"<div>Nested <div>block</div> tail</div></div></body></html>")
+    contents = []
+    for parser in ("soup", "lxml"):
+        scraper = BaseScraper(FEED_URL, FakeStorage(), session=FakeSession(b""),
+                              state_store=MemoryStateStore(), parser=parser)
+        contents.append(scraper.extract_details(page)[0])
+    assert contents[0] == contents[1] == \
+        "Tour\n\nLine one\nline two\n\nFirst\n\nSecond date\n\nNested\n\nblock\n\ntail"
@@ -0,0 +1,54 @@
+"""
+Orçamento de tempo de import dos serviços (cold start do Cloud Run)
+Usa `python -X importtime` para medir o import de cada main.py
+"""
+import sys
+import os
+import subprocess
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+project_root = os.path.dirname(os.path.abspath(__file__))
+
+SERVICES = ["blabbermouth", "multi"]
+
+# Tempo máximo de import do main.py (ajustável para máquinas lentas)
+BUDGET_MS = float(os.getenv("IMPORT_TIME_BUDGET_MS", "800"))
+
+# Dependências pesadas que só podem ser carregadas na primeira chamada a /run
+LAZY_MODULES = ["supabase", "google.generativeai", "bs4", "requests", "lxml"]
+
+
+def import_times(service):
+    """Retorna {módulo: tempo cumulativo em ms} do import de services/<service>/main.py"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=os.path.join(project_root, "services", service),
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative) / 1000
+    return times
+
+
+@pytest.mark.parametrize("service", SERVICES)
+def test_heavy_dependencies_are_lazy(service):
+    times = import_times(service)
+
+    assert [module for module in LAZY_MODULES if module in times] == []
+
+
+@pytest.mark.parametrize("service", SERVICES)
+def test_import_time_within_budget(service):
+    times = import_times(service)
+
+    assert times["main"] < BUDGET_MS, f"import de {service}/main.py levou {times['main']:.0f} ms"
@@ -0,0 +1,194 @@
+"""
+Testes do SQLiteNewsStorage e do WriteBehindNewsStorage (sem Supabase)
+"""
+import sys
+import os
+import sqlite3
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import shared.local_storage as local_storage
+from shared.local_storage import SQLiteNewsStorage, WriteBehindNewsStorage
+
+
+def article(i):
+    return {"title": f"News {i}", "url": f"https://example.com/news/{i}", "date": "2024-01-01",
+            "content": "x", "image_url": None, "video_urls": [f"https://youtu.be/{i}"]}
+
+
+class CountingStorage(SQLiteNewsStorage):
+    """Faz o papel do Supabase e conta as chamadas recebidas"""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.calls = []
+
+    def existing_urls(self, urls, chunk_size=500):
+        urls = list(urls)
+        self.calls.append(("existing_urls", len(urls)))
+        return super().existing_urls(urls, chunk_size)
+
+    def update_translations(self, rows, raise_errors=False):
+        self.calls.append(("update_translations", len(rows)))
+        return super().update_translations(rows)
+
+
+class FlakyStorage(SQLiteNewsStorage):
+    """Supabase fora do ar enquanto `down`: como o NewsStorage, só lança com raise_errors"""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.down = False
+
+    def add_news_batch(self, articles, raise_errors=False):
+        if self.down:
+            if raise_errors:
+                raise ConnectionError("Supabase indisponível")
+            return [False] * len(articles)
+        return super().add_news_batch(articles)
+
+    def mark_as_published_batch(self, urls, raise_errors=False):
+        if self.down:
+            if raise_errors:
+                raise ConnectionError("Supabase indisponível")
+            return 0
+        return super().mark_as_published_batch(urls)
+
+
+def test_sqlite_storage_batches_claims_and_state(tmp_path):
+    storage = SQLiteNewsStorage(str(tmp_path / "news.sqlite3"))
+
+    assert storage.add_news_batch([article(1), article(2), article(1)]) == [True, True, False]
+    assert storage.add_news_batch([article(2), article(3)]) == [False, True]
+    assert storage.existing_urls([article(1)["url"], "https://example.com/other"]) == {article(1)["url"]}
+
+    # Linhas novas nascem reservadas por quem coletou
+    assert storage.claim_news("collected", "id, url") == []
+    storage.release_claims([article(1)["url"], article(2)["url"]])
+    other = SQLiteNewsStorage(storage.path)
+    assert [row["url"] for row in other.claim_news("collected", "id, url", limit=5)] == \
+        [article(1)["url"], article(2)["url"]]
+    assert storage.claim_news("collected", "id, url") == []
+
+    assert storage.update_translations([{"url": article(1)["url"], "translated_title": "Notícia 1",
+                                         "translated_content": "y", "entities": ["Metallica"]}]) == 1
+    row = next(storage.iter_news_by_status("translated", "url, entities, video_urls", page_size=1))
+    assert row["entities"] == ["Metallica"] and row["video_urls"] == ["https://youtu.be/1"]
+
+    assert storage.mark_as_published_batch([article(1)["url"], article(2)["url"]]) == 2
+    assert [row["url"] for row in storage.iter_news_by_status("collected", "url", page_size=1)] == \
+        [article(3)["url"]]
+
+    storage.set_cursor("blabbermouth", {"guid": "g", "date": "d"})
+    assert other.get_cursor("blabbermouth") == {"guid": "g", "date": "d"}
+    assert other.state.get_many(["cursor:blabbermouth", "cursor:other"]) == \
+        {"cursor:blabbermouth": {"guid": "g", "date": "d"}}
+
+
+def test_claim_query_uses_the_status_index(tmp_path):
+    storage = SQLiteNewsStorage(str(tmp_path / "news.sqlite3"))
+
+    # Com status como parâmetro, um índice parcial seria ignorado (SCAN news)
+    plan = storage._conn.execute(
+        "EXPLAIN QUERY PLAN SELECT id FROM news WHERE status = ?"
+        " AND (claimed_until IS NULL OR claimed_until < ?) ORDER BY id LIMIT ?",
+        ("collected", "2024-01-01", 20)
+    ).fetchall()
+    assert "USING INDEX news_status_id_idx" in " ".join(row[-1] for row in plan)
+
+
+def test_update_translation_takes_the_url_by_name(tmp_path):
+    storage = SQLiteNewsStorage(str(tmp_path / "news.sqlite3"))
+    storage.add_news_batch([article(1)])
+
+    # Chamadas antigas passavam o título na primeira posição
+    with pytest.raises(TypeError):
+        storage.update_translation(article(1)["title"], "Notícia 1", "y", [])
+    assert storage.update_translation(link=article(1)["url"], translated_title="Notícia 1",
+                                      translated_content="y", tags=["Metallica"])
+    rows = storage.get_news_by_url([article(1)["url"]], "url, status, translated_title")
+    assert rows[article(1)["url"]]["translated_title"] == "Notícia 1"
+
+
+def test_write_behind_dedupes_locally_and_syncs_in_batches(tmp_path):
+    remote = CountingStorage(str(tmp_path / "remote.sqlite3"))
+    remote.add_news_batch([article(0)])
+    storage = WriteBehindNewsStorage(SQLiteNewsStorage(str(tmp_path / "local.sqlite3")), remote, batch_size=10)
+
+    assert storage.add_news_batch([article(0), article(1), article(2)]) == [False, True, True]
+    # Nada foi enviado ainda, e a segunda verificação não chega ao Supabase
+    assert remote.existing_urls([article(1)["url"]]) == set()
+    remote.calls.clear()
+    assert storage.existing_urls([article(0)["url"], article(1)["url"]]) == {article(0)["url"], article(1)["url"]}
+    assert remote.calls == []
+
+    storage.update_translations([{"url": article(1)["url"], "translated_title": "Notícia 1",
+                                  "translated_content": "y", "entities": []}])
+    storage.mark_as_published_batch([article(1)["url"]])
+
+    assert storage.flush() == 4
+    assert storage.flush() == 0
+    # Um lote de inserções (add_news_batch confere as duplicadas) e um de traduções
+    assert remote.calls == [("existing_urls", 2), ("update_translations", 1)]
+    rows = remote.get_news_by_url([article(1)["url"], article(2)["url"]], "url, status, translated_title")
+    assert rows[article(1)["url"]]["status"] == "published"
+    assert rows[article(1)["url"]]["translated_title"] == "Notícia 1"
+    assert rows[article(2)["url"]]["status"] == "collected"
+
+
+def test_write_behind_keeps_queue_while_remote_is_down(tmp_path):
+    remote = FlakyStorage(str(tmp_path / "remote.sqlite3"))
+    remote.add_news_batch([article(0)])
+    remote.release_claims([article(0)["url"]])
+    storage = WriteBehindNewsStorage(SQLiteNewsStorage(str(tmp_path / "local.sqlite3")), remote, batch_size=10)
+
+    # A notícia 0 é reservada, publicada localmente, e o envio falha
+    assert [row["url"] for row in storage.claim_news("collected", "id, url")] == [article(0)["url"]]
+    remote.down = True
+    storage.add_news_batch([article(1)])
+    storage.mark_as_published_batch([article(0)["url"]])
+    assert storage.flush() == 0
+    assert len(storage.local.pending_sync()) == 2
+
+    # Com a reserva vencida, o Supabase a oferece de novo; localmente ela já foi publicada
+    remote.release_claims([article(0)["url"]])
+    assert storage.claim_news("collected", "id, url") == []
+
+    remote.down = False
+    assert storage.flush() == 2
+    assert storage.local.pending_sync() == []
+    rows = remote.get_news_by_url([article(0)["url"], article(1)["url"]], "url, status")
+    assert rows[article(0)["url"]]["status"] == "published"
+    assert rows[article(1)["url"]]["status"] == "collected"
+
+
+def test_sqlite_storage_honors_raise_errors(tmp_path):
+    storage = SQLiteNewsStorage(str(tmp_path / "news.sqlite3"))
+    storage._conn.close()
+
+    # Como o NewsStorage: sem raise_errors, o erro é registrado e nada conta como gravado
+    assert storage.add_news_batch([article(1)]) == [False]
+    assert storage.mark_as_published_batch([article(1)["url"]]) == 0
+    with pytest.raises(sqlite3.Error):
+        storage.add_news_batch([article(1)], raise_errors=True)
+    with pytest.raises(sqlite3.Error):
+        storage.update_translations([{"url": article(1)["url"], "translated_title": "t",
+                                      "translated_content": "c", "entities": []}], raise_errors=True)
+
+
+def test_write_behind_remembers_a_bounded_number_of_remote_urls(tmp_path, monkeypatch):
+    monkeypatch.setattr(local_storage, "REMOTE_URLS_MAX", 3)
+    remote = CountingStorage(str(tmp_path / "remote.sqlite3"))
+    remote.add_news_batch([article(i) for i in range(5)])
+    storage = WriteBehindNewsStorage(SQLiteNewsStorage(str(tmp_path / "local.sqlite3")), remote)
+
+    assert len(storage.existing_urls([article(i)["url"] for i in range(5)])) == 5
+    assert list(storage._remote_urls) == [article(i)["url"] for i in range(2, 5)]
+
+    # As mais recentes continuam sem ir ao Supabase; as esquecidas são consultadas de novo
+    remote.calls.clear()
+    storage.existing_urls([article(4)["url"]])
+    assert remote.calls == []
+    storage.existing_urls([article(0)["url"]])
+    assert remote.calls == [("existing_urls", 1)]
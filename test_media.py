@@ -0,0 +1,102 @@
+"""
+Testes do upload de imagens (tipo detectado, streaming e cache de mídia)
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from shared.media import MediaUploader, sniff_image_type
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 200_000
+
+
+class FakeResponse:
+    def __init__(self, body=b"", status_code=200, json_data=None):
+        self.body = body
+        self.status_code = status_code
+        self.json_data = json_data
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size):
+        for start in range(0, len(self.body), chunk_size):
+            yield self.body[start:start + chunk_size]
+
+    def json(self):
+        return self.json_data
+
+
+class FakeSession:
+    """Serve as imagens de `images` e registra cada upload"""
+
+    def __init__(self, images):
+        self.images = images
+        self.uploads = []
+
+    def get(self, url, **kwargs):
+        return FakeResponse(self.images[url])
+
+    def post(self, url, headers=None, data=None, **kwargs):
+        body = b"".join(data)
+        assert len(body) == len(data)
+        self.uploads.append((headers, body))
+        return FakeResponse(status_code=201, json_data={"id": 100 + len(self.uploads)})
+
+
+class MemoryStateStore:
+    def __init__(self):
+        self.data = {}
+        self.writes = 0
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    def set(self, key, value):
+        self.writes += 1
+        self.data[key] = value
+
+
+def test_sniff_image_type():
+    assert sniff_image_type(PNG) == ("image/png", "png")
+    assert sniff_image_type(b"\xff\xd8\xff\xe0") == ("image/jpeg", "jpg")
+    assert sniff_image_type(b"RIFF\x00\x00\x00\x00WEBPVP8 ") == ("image/webp", "webp")
+    assert sniff_image_type(b"<!DOCTYPE html>") is None
+
+
+def test_upload_streams_with_real_type_and_reuses_media():
+    session = FakeSession({
+        "https://example.com/a/photo.jpg": PNG,
+        "https://cdn.example.com/copy.jpg": PNG,
+        "https://example.com/error.jpg": b"<html>404</html>"
+    })
+    state = MemoryStateStore()
+    uploader = MediaUploader(session, "https://wp.example.com/wp-json/wp/v2/media", "Basic x",
+                             state_store=state, spool_bytes=1024)
+
+    assert uploader.upload("https://example.com/a/photo.jpg") == 101
+    headers, body = session.uploads[0]
+    assert body == PNG
+    assert headers["Content-Type"] == "image/png"
+    assert headers["Content-Disposition"] == 'attachment; filename="photo.png"'
+
+    # Mesma URL e mesmo conteúdo em outra URL: nenhum upload novo
+    assert uploader.upload("https://example.com/a/photo.jpg") == 101
+    assert uploader.upload("https://cdn.example.com/copy.jpg") == 101
+    assert uploader.upload("https://example.com/error.jpg") is None
+    assert len(session.uploads) == 1
+
+    # O cache é persistido no state store, uma chave por entrada (url e hash)
+    assert len(state.data) == 3 and state.writes == 3
+
+    again = MediaUploader(session, uploader.media_endpoint, "Basic x", state_store=state)
+    again.prefetch(["https://cdn.example.com/copy.jpg"])
+    assert again.upload("https://cdn.example.com/copy.jpg") == 101
+    assert len(session.uploads) == 1
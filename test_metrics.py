@@ -0,0 +1,65 @@
+"""
+Testes da instrumentação (formato Prometheus, registro por execução e listeners)
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from shared.metrics import Metrics
+
+
+def test_prometheus_text_format():
+    metrics = Metrics(buckets=(0.1, 1))
+    metrics.inc("http_responses_total", host="example.com", status=200)
+    metrics.inc("http_responses_total", host="example.com", status=200)
+    metrics.observe("stage_seconds", 0.05, stage="parse")
+    metrics.observe("stage_seconds", 0.5, stage="parse")
+
+    text = metrics.render_prometheus()
+
+    assert "# TYPE rocknews_http_responses_total counter" in text
+    assert 'rocknews_http_responses_total{host="example.com",status="200"} 2' in text
+    assert "# TYPE rocknews_stage_seconds histogram" in text
+    assert 'rocknews_stage_seconds_bucket{stage="parse",le="0.1"} 1' in text
+    assert 'rocknews_stage_seconds_bucket{stage="parse",le="1"} 2' in text
+    assert 'rocknews_stage_seconds_bucket{stage="parse",le="+Inf"} 2' in text
+    assert 'rocknews_stage_seconds_count{stage="parse"} 2' in text
+
+
+def test_run_record_and_listener():
+    metrics = Metrics()
+    events = []
+    metrics.add_listener(events.append)
+
+    metrics.inc("retries_total", service="gemini")
+    run_id = metrics.start_run("blabbermouth", limit=10)
+    with metrics.timer("stage_seconds", stage="publish"):
+        pass
+    metrics.inc("cache_requests_total", 3, cache="feed", result="hit")
+    metrics.finish_run(run_id, result={"published": 1})
+
+    run = metrics.get_run(run_id)
+    assert run["status"] == "succeeded"
+    assert run["limit"] == 10
+    assert run["result"] == {"published": 1}
+    assert run["timings"]["stage_seconds"]["stage=publish"]["count"] == 1
+    # Valores de antes da execução não entram no registro dela
+    assert run["counters"] == {"cache_requests_total": {"cache=feed,result=hit": 3}}
+    assert [event["run_id"] for event in events[:2]] == [None, run_id]
+
+
+def test_failed_run_and_timer_errors():
+    metrics = Metrics()
+    run_id = metrics.start_run("multi")
+    try:
+        with metrics.timer("external_call_seconds", service="gemini", op="batch"):
+            raise RuntimeError("boom")
+    except RuntimeError as e:
+        metrics.finish_run(run_id, error=e)
+
+    run = metrics.get_run(run_id)
+    assert run["status"] == "failed"
+    assert run["error"] == "boom"
+    assert run["counters"]["errors_total"] == {"metric=external_call_seconds,op=batch,service=gemini": 1}
+    assert metrics.get_run("desconhecida") is None
@@ -0,0 +1,165 @@
+"""
+Testes do Pipeline com storage, tradutor e publicador falsos (sem rede)
+"""
+import sys
+import os
+import asyncio
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from shared.pipeline import Pipeline
+from shared.translation_stage import TranslationStage
+
+
+class FakeStorage:
+    """Tabela news em memória com reservas (claims) como a função claim_news"""
+
+    def __init__(self, rows=()):
+        self.rows = {row["url"]: dict(row) for row in rows}
+        self.claim_calls = 0
+        self.released = set()
+        # URLs cuja tradução não é gravada (ex.: erro do Supabase no lote)
+        self.unsaved = set()
+
+    def add(self, articles):
+        for article in articles:
+            self.rows[article["url"]] = dict(
+                article, id=len(self.rows) + 1, status="collected", claimed_by="me"
+            )
+        return [dict(self.rows[article["url"]]) for article in articles]
+
+    def claim_news(self, status, columns="*", limit=100):
+        self.claim_calls += 1
+        free = [row for row in self.rows.values() if row["status"] == status and not row.get("claimed_by")]
+        for row in free[:limit]:
+            row["claimed_by"] = "me"
+        return [dict(row) for row in free[:limit]]
+
+    def release_claims(self, urls):
+        for url in urls:
+            self.rows[url]["claimed_by"] = None
+        self.released.update(urls)
+
+    def update_translations(self, rows, raise_errors=False):
+        saved = [row for row in rows if row["url"] not in self.unsaved]
+        for row in saved:
+            self.rows[row["url"]].update(status="translated", translated_title=row["translated_title"])
+        return len(saved)
+
+    def mark_as_published_batch(self, urls):
+        for url in urls:
+            self.rows[url]["status"] = "published"
+        return len(urls)
+
+    def flush(self):
+        pass
+
+
+class FakeScraper:
+    def __init__(self, storage, articles):
+        self.storage = storage
+        self.articles = articles
+
+    def iter_feed_batches(self, limit):
+        for start in range(0, len(self.articles), 2):
+            yield self.storage.add(self.articles[start:start + 2])
+
+
+class FakeTranslator:
+    def estimate_requests(self, content):
+        return 1
+
+    def translate_article(self, title, content, raise_errors=False):
+        if "FAIL" in title:
+            raise ValueError("falha na tradução")
+        return {"title": f"[pt] {title}", "content": content, "tags": []}
+
+
+class FakePublisher:
+    def __init__(self, error=None):
+        self.published = []
+        self.error = error
+
+    def prefetch_images(self, image_urls):
+        pass
+
+    def publish_batch(self, rows):
+        if self.error:
+            raise self.error
+        self.published.extend(row["url"] for row in rows)
+        return {"published": [row["url"] for row in rows], "existing": [], "failed": []}
+
+
+def pending(i, status):
+    return {"id": 100 + i, "url": f"old-{i}", "title": f"Old {i}", "content": "x",
+            "status": status, "translated_title": f"[pt] Old {i}", "translated_content": "x",
+            "entities": [], "image_url": None}
+
+
+def test_pipeline_resumes_pending_rows_in_pages_and_releases_failures():
+    storage = FakeStorage(
+        [pending(i, "collected") for i in range(5)]
+        + [pending(i, "translated") for i in range(5, 7)]
+        + [dict(pending(7, "collected"), claimed_by="other-worker")]
+    )
+    articles = [{"url": f"new-{i}", "title": f"New {i}", "content": "y", "image_url": None} for i in range(3)]
+    articles.append({"url": "new-fail", "title": "FAIL", "content": "y", "image_url": None})
+    publisher = FakePublisher()
+    translator = FakeTranslator()
+    pipeline = Pipeline(
+        FakeScraper(storage, articles), storage, translator, publisher,
+        queue_size=2,
+        translation_stage=TranslationStage(storage, translator, rpm=6000, tpm=10 ** 9, max_retries=0)
+    )
+
+    stats = asyncio.run(pipeline.run(limit=10))
+
+    assert stats == {"collected": 4, "resumed": 7, "translated": 8, "published": 10}
+    # Reservadas por outro worker: não são tocadas
+    assert storage.rows["old-7"]["status"] == "collected"
+    assert "old-7" not in publisher.published
+    # Páginas do tamanho da fila: 2 + 2 + 1 + vazia (collected) e 2 + vazia (translated)
+    assert storage.claim_calls == 6
+    # A notícia que falhou fica livre para a próxima execução
+    assert storage.released == {"new-fail"}
+    assert storage.rows["new-fail"]["claimed_by"] is None
+
+
+def test_pipeline_counts_only_translations_that_were_saved():
+    storage = FakeStorage()
+    storage.unsaved.add("new-1")
+    articles = [{"url": f"new-{i}", "title": f"New {i}", "content": "y", "image_url": None} for i in range(3)]
+    translator = FakeTranslator()
+    pipeline = Pipeline(
+        FakeScraper(storage, articles), storage, translator, FakePublisher(),
+        translation_stage=TranslationStage(storage, translator, rpm=6000, tpm=10 ** 9, max_retries=0)
+    )
+
+    publisher = pipeline.publisher
+
+    stats = asyncio.run(pipeline.run(limit=10))
+
+    assert stats == {"collected": 3, "resumed": 0, "translated": 2, "published": 2}
+    # Sem tradução gravada, a notícia não vai para o WordPress
+    assert storage.rows["new-1"].get("translated_title") is None
+    assert "new-1" not in publisher.published
+    assert storage.rows["new-1"]["status"] == "collected"
+    assert storage.released == {"new-1"}
+
+
+def test_pipeline_stops_and_releases_claims_when_a_stage_fails():
+    storage = FakeStorage([pending(i, "translated") for i in range(6)])
+    articles = [{"url": f"new-{i}", "title": f"New {i}", "content": "y", "image_url": None} for i in range(6)]
+    translator = FakeTranslator()
+    pipeline = Pipeline(
+        FakeScraper(storage, articles), storage, translator, FakePublisher(error=ConnectionError("WordPress fora")),
+        queue_size=1,
+        translation_stage=TranslationStage(storage, translator, rpm=6000, tpm=10 ** 9, max_retries=0)
+    )
+
+    # Antes, as filas enchiam e run() nunca terminava
+    with pytest.raises(ConnectionError):
+        asyncio.run(asyncio.wait_for(pipeline.run(limit=10), timeout=5))
+    assert storage.released
+    assert all(row.get("claimed_by") is None for row in storage.rows.values())
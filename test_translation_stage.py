@@ -0,0 +1,129 @@
+"""
+Testes do limitador de taxa (TokenBucket) e das repetições da TranslationStage com relógio falso
+"""
+import sys
+import os
+import asyncio
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+from shared.translation_stage import TokenBucket, TranslationStage
+
+
+class FakeClock:
+    """Relógio que só anda quando alguém "dorme": as esperas viram números exatos"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def make_bucket(rpm=60, tpm=1200):
+    clock = FakeClock()
+    return TokenBucket(rpm, tpm, clock=clock, sleep=clock.sleep), clock
+
+
+class FakeTranslator:
+    """Falha com os erros em `errors`, em ordem, e depois traduz"""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def estimate_requests(self, content):
+        return 1
+
+    def translate_article(self, title, content, raise_errors=False):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return {"title": f"[pt] {title}", "content": content, "tags": []}
+
+
+def test_bucket_spends_quota_and_waits_for_the_refill():
+    bucket, clock = make_bucket(rpm=60, tpm=1200)
+
+    asyncio.run(bucket.acquire(tokens=500))
+    asyncio.run(bucket.acquire(tokens=500))
+    assert clock.sleeps == []
+    assert bucket._requests == 58 and bucket._tokens == 200
+
+    # Faltam 300 tokens a 20 tokens/s: 15 s de espera
+    asyncio.run(bucket.acquire(tokens=500))
+    assert clock.sleeps == [pytest.approx(15.0)]
+    assert bucket._tokens == pytest.approx(0)
+
+    # Um pedido maior que o limite por minuto é limitado ao próprio limite
+    clock.now += 60
+    asyncio.run(bucket.acquire(tokens=10 ** 6))
+    assert bucket._tokens == pytest.approx(0)
+
+
+def test_bucket_waits_for_requests_as_well_as_tokens():
+    bucket, clock = make_bucket(rpm=2, tpm=10 ** 6)
+
+    asyncio.run(bucket.acquire(requests=2))
+    # Uma requisição a cada 30 s
+    asyncio.run(bucket.acquire())
+    assert clock.sleeps == [pytest.approx(30.0)]
+
+
+def test_penalize_halves_the_rate_and_reward_recovers_it():
+    bucket, clock = make_bucket(rpm=60)
+
+    bucket.penalize()
+    assert bucket.rate_factor == 0.5
+    assert bucket._requests == 0
+    # Com metade da taxa, uma requisição leva 2 s em vez de 1 s
+    asyncio.run(bucket.acquire())
+    assert clock.sleeps == [pytest.approx(2.0)]
+
+    for _ in range(10):
+        bucket.penalize()
+    assert bucket.rate_factor == 0.1
+
+    for _ in range(17):
+        bucket.reward()
+    assert bucket.rate_factor == pytest.approx(0.95)
+    bucket.reward()
+    bucket.reward()
+    assert bucket.rate_factor == 1.0
+
+
+def test_stage_backs_off_on_rate_limit_and_recovers():
+    bucket, clock = make_bucket(rpm=6000, tpm=10 ** 9)
+    translator = FakeTranslator(RuntimeError("429 Resource has been exhausted"),
+                                RuntimeError("429 Resource has been exhausted"))
+    stage = TranslationStage(None, translator, max_retries=4, limiter=bucket)
+
+    result = asyncio.run(stage.translate_row({"title": "News", "content": "x"}))
+
+    assert result["title"] == "[pt] News"
+    assert translator.calls == 3
+    # Backoff exponencial (1 s, 2 s) com jitter de até 1 s
+    backoff = [delay for delay in clock.sleeps if delay >= 1]
+    assert len(backoff) == 2
+    assert 1 <= backoff[0] < 2 and 2 <= backoff[1] < 3
+    assert bucket.rate_factor == pytest.approx(0.25 + 0.05)
+
+
+def test_stage_gives_up_on_other_errors_and_after_max_retries():
+    bucket, clock = make_bucket(rpm=6000, tpm=10 ** 9)
+
+    translator = FakeTranslator(ValueError("resposta inválida"))
+    stage = TranslationStage(None, translator, max_retries=4, limiter=bucket)
+    assert asyncio.run(stage.translate_row({"title": "News", "content": "x"})) is None
+    assert translator.calls == 1 and clock.sleeps == []
+
+    translator = FakeTranslator(*[RuntimeError("429")] * 3)
+    stage = TranslationStage(None, translator, max_retries=2, limiter=bucket)
+    assert asyncio.run(stage.translate_row({"title": "News", "content": "x"})) is None
+    assert translator.calls == 3
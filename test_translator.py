@@ -0,0 +1,200 @@
+"""
+Testes do Translator com um modelo falso local (sem chamadas ao Gemini)
+"""
+import sys
+import os
+import json
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from shared.translator import Translator, TranslationError, BATCH_INPUT_MARKER, split_paragraphs
+from shared.translation_cache import SQLiteTranslationCache, SupabaseTranslationCache, PRUNE_EVERY, make_key
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeModel:
+    """Imita o GenerativeModel: "traduz" prefixando [pt] e conta as chamadas"""
+
+    def __init__(self, fail=False, fail_chunks=0):
+        self.calls = 0
+        self.fail = fail
+        self.fail_chunks = fail_chunks
+
+    def generate_content(self, prompt):
+        self.calls += 1
+        if self.fail:
+            raise RuntimeError("429 Resource has been exhausted")
+
+        if BATCH_INPUT_MARKER in prompt:
+            articles = json.loads(prompt.split(BATCH_INPUT_MARKER, 1)[1])
+            result = [
+                {"id": a["id"], "title": f"[pt] {a['title']}",
+                 "content": f"[pt] {a['content']}", "tags": ["Metallica", "Slayer"]}
+                for a in articles
+            ]
+            return FakeResponse("```json\n" + json.dumps(result) + "\n```")
+        if "FAIL" in prompt and self.fail_chunks:
+            self.fail_chunks -= 1
+            raise RuntimeError("500 Internal error")
+        return FakeResponse("[pt] " + prompt.split("Analise o ", 1)[1].split(", e retorne")[0])
+
+
+def test_translate_article_uses_one_request():
+    model = FakeModel()
+    translator = Translator(model=model)
+
+    result = translator.translate_article("Title", "Content")
+
+    assert result == {"title": "[pt] Title", "content": "[pt] Content", "tags": ["Metallica", "Slayer"]}
+    assert model.calls == 1
+
+
+def test_translate_articles_packs_short_articles_within_budget():
+    model = FakeModel()
+    translator = Translator(model=model)
+    articles = [{"title": f"Title {i}", "content": "x" * 400} for i in range(6)]
+
+    results = translator.translate_articles(articles, token_budget=250)
+
+    assert [r["title"] for r in results] == [f"[pt] Title {i}" for i in range(6)]
+    assert model.calls == 3
+
+
+def test_translate_articles_returns_none_on_failure():
+    translator = Translator(model=FakeModel(fail=True))
+
+    assert translator.translate_articles([{"title": "a", "content": "b"}] * 2) == [None, None]
+
+
+def test_cache_skips_model_on_repeated_text(tmp_path):
+    model = FakeModel()
+    cache = SQLiteTranslationCache(path=str(tmp_path / "cache.sqlite3"), max_entries=10)
+    translator = Translator(model=model, cache=cache)
+
+    first = translator.translate_article("Title", "Content")
+    # Outra instância com o mesmo arquivo lê do SQLite, não da memória
+    again = Translator(model=model, cache=SQLiteTranslationCache(path=cache.path))
+    second = again.translate_article("Title", "Content  ")
+
+    assert first == second
+    assert model.calls == 1
+    assert again.cache_stats()["hits"] == 1
+
+
+def test_chunked_retry_only_redoes_failed_chunks(tmp_path):
+    model = FakeModel(fail_chunks=1)
+    translator = Translator(model=model, cache=SQLiteTranslationCache(path=str(tmp_path / "c.sqlite3")))
+    translator.chunk_chars = 50
+    text = "\n\n".join(["First paragraph " + "a" * 30, "FAIL paragraph " + "b" * 30, "Third paragraph " + "c" * 30])
+
+    try:
+        translator.translate_chunked(text)
+        assert False, "deveria falhar"
+    except TranslationError:
+        pass
+    calls = model.calls
+
+    translated = translator.translate_chunked(text)
+
+    assert translated.split("\n\n") == ["[pt] " + p for p in text.split("\n\n")]
+    assert model.calls == calls + 1
+
+
+def test_translate_text_returns_none_instead_of_the_source_text():
+    translator = Translator(model=FakeModel(fail=True))
+
+    assert translator.translate_text("Some news") is None
+    translator.chunk_chars = 20
+    assert translator.translate_text("First paragraph here.\n\nSecond paragraph here.") is None
+
+
+def test_split_paragraphs_keeps_paragraphs_and_words_whole():
+    # Um parágrafo com quebra de linha (ex.: <br>) continua sendo um parágrafo
+    text = "METALLICA has announced\na new tour.\n\nSecond paragraph here."
+    assert split_paragraphs(text, 100) == [text]
+    assert split_paragraphs(text, 40) == ["METALLICA has announced\na new tour.", "Second paragraph here."]
+
+    # Frases maiores que o limite são quebradas em espaços, nunca no meio de uma palavra
+    chunks = split_paragraphs("First sentence is quite long here. Second one is short.", 20)
+    assert chunks == ["First sentence is", "quite long here.", "Second one is short."]
+    assert all(len(chunk) <= 20 for chunk in chunks)
+
+
+def test_long_article_translates_each_chunk_once_and_keeps_prompts_apart(tmp_path):
+    model = FakeModel()
+    cache = SQLiteTranslationCache(path=str(tmp_path / "cache.sqlite3"))
+    translator = Translator(model=model, cache=cache)
+    translator.chunk_chars = 40
+    content = "\n\n".join(["First paragraph " + "a" * 20, "Second paragraph " + "b" * 20])
+
+    result = translator.translate_article("Title", content)
+
+    assert model.calls == translator.estimate_requests(content) == 2
+    assert result["content"].startswith("[pt] First paragraph")
+    # O primeiro bloco veio do prompt de artigos: não entra no cache do prompt de texto
+    first = split_paragraphs(content, 40)[0]
+    assert cache.get(make_key("text", first, translator.model_name, "1")) is None
+
+
+def test_sqlite_cache_batches_reads_and_evicts_least_used(tmp_path):
+    cache = SQLiteTranslationCache(path=str(tmp_path / "cache.sqlite3"), max_entries=3)
+    for i in range(3):
+        cache.set(f"k{i}", f"v{i}")
+    reader = SQLiteTranslationCache(path=cache.path, max_entries=3)
+    statements = []
+    reader._conn.set_trace_callback(statements.append)
+
+    # Leituras não gravam nada na hora; o accessed_at vai junto com a próxima gravação
+    assert reader.get("k0") == "v0"
+    assert not [sql for sql in statements if sql.startswith("UPDATE")]
+    reader.set("k3", "v3")
+
+    assert reader.stats()["size"] == 2
+    assert not [sql for sql in statements if "COUNT" in sql]
+    keys = {row[0] for row in reader._conn.execute("SELECT key FROM translations")}
+    assert keys == {"k0", "k3"}
+
+
+class FakeQuery:
+    def __init__(self, data=None):
+        self.data = data
+
+    def execute(self):
+        return self
+
+
+class FakeSupabase:
+    """Tabela translation_cache (em ordem de created_at) e função prune_translation_cache"""
+
+    def __init__(self):
+        self.rows = {}
+        self.prunes = []
+
+    def table(self, name):
+        return self
+
+    def upsert(self, row, on_conflict=None):
+        self.rows.setdefault(row["key"], row["value"])
+        return FakeQuery()
+
+    def rpc(self, name, params):
+        self.prunes.append(params["p_max_entries"])
+        doomed = list(self.rows)[:max(0, len(self.rows) - params["p_max_entries"])]
+        for key in doomed:
+            del self.rows[key]
+        return FakeQuery(len(doomed))
+
+
+def test_supabase_cache_prunes_oldest_entries_periodically():
+    client = FakeSupabase()
+    cache = SupabaseTranslationCache(client, max_entries=10)
+
+    for i in range(PRUNE_EVERY):
+        cache.set(f"k{i}", i)
+
+    assert client.prunes == [10]
+    assert list(client.rows) == [f"k{i}" for i in range(PRUNE_EVERY - 10, PRUNE_EVERY)]
@@ -0,0 +1,191 @@
+"""
+Testes da publicação em lote no WordPress com uma sessão falsa (sem rede)
+"""
+import sys
+import os
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from shared.wordpress import WordPressPublisher
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, json_data=None):
+        self.status_code = status_code
+        self.json_data = json_data
+        self.headers = {"X-WP-TotalPages": "1"}
+        self.text = ""
+
+    def json(self):
+        return self.json_data
+
+
+class FakeWordPress:
+    """Imita /posts e /tags; o post com "FAIL" no título é recusado"""
+
+    def __init__(self, existing_tags=()):
+        self.lock = threading.Lock()
+        self.posts = []
+        self.tags_created = []
+        self.existing_tags = list(existing_tags)
+        self.tag_listings = 0
+        self.tags_down = False
+
+    def get(self, url, **kwargs):
+        if url.endswith("/tags"):
+            with self.lock:
+                self.tag_listings += 1
+            if self.tags_down:
+                return FakeResponse(503)
+            return FakeResponse(json_data=self.existing_tags)
+        return FakeResponse(json_data=[])
+
+    def post(self, url, json=None, **kwargs):
+        with self.lock:
+            if url.endswith("/tags"):
+                self.tags_created.append(json["name"])
+                return FakeResponse(201, {"id": len(self.tags_created)})
+            if "FAIL" in json["title"]:
+                return FakeResponse(500)
+            self.posts.append(json)
+            return FakeResponse(201, {"id": len(self.posts)})
+
+
+class MemoryStateStore:
+    def __init__(self):
+        self.data = {}
+        self.writes = []
+        self.reads = 0
+
+    def get(self, key, default=None):
+        self.reads += 1
+        return self.data.get(key, default)
+
+    def get_many(self, keys):
+        self.reads += 1
+        return {key: self.data[key] for key in keys if key in self.data}
+
+    def set(self, key, value):
+        self.writes.append(key)
+        self.data[key] = value
+
+
+def make_publisher(monkeypatch, session, **kwargs):
+    monkeypatch.setenv("WORDPRESS_URL", "https://wp.example.com")
+    monkeypatch.setenv("WORDPRESS_USER", "user")
+    monkeypatch.setenv("WORDPRESS_APP_PASSWORD", "secret")
+    return WordPressPublisher(session=session, **kwargs)
+
+
+def row(i, title=None, tags=("Metallica",)):
+    return {
+        "url": f"https://example.com/news/{i}",
+        "translated_title": title or f"Notícia {i}",
+        "translated_content": "Conteúdo",
+        "entities": list(tags),
+        "image_url": None
+    }
+
+
+def test_publish_batch_resolves_tags_once_and_reports_each_row(monkeypatch):
+    session = FakeWordPress()
+    publisher = make_publisher(monkeypatch, session)
+    # Registra um post anterior
+    publisher._remember_published("Já publicada", "https://example.com/news/0")
+
+    rows = [row(0, "Já publicada")] + [row(i, tags=("Metallica", "slayer", "Slayer")) for i in range(1, 6)]
+    rows.append(row(6, "FAIL"))
+    # A mesma notícia duas vezes no lote: só um post
+    rows.append(row(3, tags=("Metallica",)))
+
+    result = publisher.publish_batch(rows, max_workers=3)
+
+    assert result["existing"] == ["https://example.com/news/0", "https://example.com/news/3"]
+    assert len(session.posts) == 5
+    assert result["published"] == [f"https://example.com/news/{i}" for i in range(1, 6)]
+    assert result["failed"] == ["https://example.com/news/6"]
+    assert session.tags_created == ["Metallica", "slayer"]
+    assert all(post["tags"] == [1, 2] for post in session.posts)
+
+
+def test_published_registry_has_one_entry_per_post_and_matches_by_url(monkeypatch):
+    store = MemoryStateStore()
+    publisher = make_publisher(monkeypatch, FakeWordPress(), published_store=store)
+
+    # Mesmo título traduzido, notícias diferentes: as duas são publicadas
+    assert publisher.publish_post("Turnê anunciada", "Conteúdo", source_url="https://example.com/news/1")
+    assert publisher.publish_post("Turnê anunciada", "Conteúdo", source_url="https://example.com/news/2")
+    assert len(store.writes) == 2 and len(set(store.writes)) == 2
+    assert list(store.data.values())[0] == {"post_id": 1, "source_url": "https://example.com/news/1"}
+
+    # Outra instância (ex.: nova instância do Cloud Run) consulta só a entrada da URL
+    again = make_publisher(monkeypatch, FakeWordPress(), published_store=store)
+    assert again.is_published("Outro título", "https://example.com/news/1")
+    assert not again.is_published("Turnê anunciada", "https://example.com/news/3")
+
+
+def test_tag_cache_is_loaded_once_and_refreshed_when_stale(monkeypatch):
+    session = FakeWordPress(existing_tags=[{"id": 7, "name": "Metallica"}])
+    store = MemoryStateStore()
+    # Cópia no formato antigo (sem loaded_at): é recarregada do WordPress
+    store.data["wordpress:tags:https://wp.example.com"] = {"metallica": 1}
+    publisher = make_publisher(monkeypatch, session, state_store=store)
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(publisher.resolve_tags(["Metallica"])))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [[7]] * 4
+    assert session.tag_listings == 1 and session.tags_created == []
+
+    # Cópia persistida recente: nenhuma listagem
+    assert make_publisher(monkeypatch, session, state_store=store).resolve_tags(["metallica"]) == [7]
+    assert session.tag_listings == 1
+
+    # Vencida: recarrega
+    store.data["wordpress:tags:https://wp.example.com"]["loaded_at"] -= 2 * 86400
+    assert make_publisher(monkeypatch, session, state_store=store).resolve_tags(["Metallica"]) == [7]
+    assert session.tag_listings == 2
+
+
+def test_publish_batch_reads_the_registry_once_per_batch(monkeypatch):
+    store = MemoryStateStore()
+    publisher = make_publisher(monkeypatch, FakeWordPress(), published_store=store)
+    publisher._remember_published("Já publicada", "https://example.com/news/0")
+    other = make_publisher(monkeypatch, FakeWordPress(), published_store=store)
+
+    store.reads = 0
+    result = other.publish_batch([row(i, "Já publicada" if i == 0 else None, tags=()) for i in range(5)])
+
+    assert result["existing"] == ["https://example.com/news/0"]
+    assert len(result["published"]) == 4
+    assert store.reads == 1
+
+
+def test_failed_tag_listing_keeps_the_previous_cache_and_retries(monkeypatch):
+    session = FakeWordPress(existing_tags=[{"id": 7, "name": "Metallica"}])
+    store = MemoryStateStore()
+    key = "wordpress:tags:https://wp.example.com"
+    store.data[key] = {"loaded_at": 0, "tags": {"metallica": 7}}
+    session.tags_down = True
+    publisher = make_publisher(monkeypatch, session, state_store=store)
+
+    # 503: a cópia vencida continua em uso, sem criar tags nem gravar um mapa parcial
+    assert publisher.resolve_tags(["Metallica"]) == [7]
+    assert session.tags_created == []
+    assert store.data[key]["loaded_at"] == 0
+    assert publisher.resolve_tags(["Metallica"]) == [7]
+    assert session.tag_listings == 1
+
+    # Passada a espera, a listagem é refeita e só então gravada
+    session.tags_down = False
+    publisher._tags_retry_at = 0
+    assert publisher.resolve_tags(["Metallica"]) == [7]
+    assert session.tag_listings == 2
+    assert store.data[key]["loaded_at"] > 0